@@ -5,14 +5,25 @@
 # accordance with the terms of the Adobe license agreement accompanying
 # it.
 
+import artifact_cache
+import build_registry
+import bundle_delta
+import bundle_verify
+import concurrent.futures
+import dataclasses
 import hashlib
+import os
 import pathlib
 import json
+import requests
 import shutil
+import time
 import dawn_source
 import dawn_builder
+import toolchain
+import zip_stream
 from collections import defaultdict
-from typing import List, Dict, Any
+from typing import Callable, List, Dict, Any, Optional, Tuple
 from dawn_builder import OS, PlatformGroup, TargetConfig
 
 
@@ -32,9 +43,40 @@ EXTRA_APPLE_SDK_TRIPLES: Dict[OS, List[str]] = {
     ],
 }
 
+# zlib levels of the bundle compression profiles. Deflate64 and zstd entries are not
+# offered: zlib cannot write Deflate64, and the unzip / tar tools SwiftPM extracts
+# bundles with do not read zstd-compressed zip entries.
+COMPRESSION_PROFILES: Dict[str, int] = {
+    "store": 0,
+    "fast": 1,
+    "default": 6,
+    "max": 9,
+}
+
+# Version of the platform bundle state files; a change invalidates all of them.
+_BUNDLE_STATE_FORMAT = 1
+
+# Version of the layout of the platform bundles (entry order, shared header trees,
+# zip writer settings), part of their fingerprints. Bump it whenever the same inputs
+# would produce a different bundle.
+_BUNDLE_LAYOUT_VERSION = 2
+
+# Target manifest fields that reach a platform bundle, part of its fingerprint. The
+# other fields (build profile, compiler cache statistics, toolchain) change with every
+# build of the same libraries.
+_BUNDLE_MANIFEST_FIELDS = ["targetName", "libraryName", "supportedTriples", "features", "config", "binPath"]
+
+# DLLs shipped next to the Windows static libraries.
+WINDOWS_DLLS = ["dxcompiler", "dxil", "d3dcompiler_47"]
+
+# Triples of the Windows DLLs, where they differ from the triples of the static library.
+WINDOWS_DLL_TRIPLES = {"arm64-unknown-windows-msvc": "aarch64-unknown-windows-msvc"}
+
 
 def write_target_manifest(
-    manifest_file: pathlib.Path, target_config: TargetConfig
+    manifest_file: pathlib.Path,
+    target_config: TargetConfig,
+    build_result: Optional[dawn_builder.BuildResult] = None,
 ) -> None:
     """
     Write a target manifest file with build configuration information.
@@ -42,6 +84,7 @@ def write_target_manifest(
     Args:
         manifest_file: Path to the manifest file to write
         target_config: Target configuration containing build settings
+        build_result: Result of the build, recorded in the manifest if given
     """
     build_dir = pathlib.Path("builds")
     target_dir = build_dir / str(target_config) / "install"
@@ -58,6 +101,36 @@ def write_target_manifest(
     if target_config.os.is_windows():
         manifest["binPath"] = (target_dir / "bin").as_posix()
 
+    debug_library = target_dir / dawn_builder.DEBUG_DIR_NAME / manifest["libraryName"]
+    if debug_library.exists():
+        unstripped_size = debug_library.stat().st_size
+        stripped_size = (target_dir / "lib" / manifest["libraryName"]).stat().st_size
+        manifest["debugPath"] = debug_library.as_posix()
+        manifest["debugInfo"] = {
+            "unstrippedSize": unstripped_size,
+            "strippedSize": stripped_size,
+            "saved": unstripped_size - stripped_size,
+        }
+
+    manifest["config"] = target_config.config
+    if target_config.features:
+        manifest["features"] = target_config.features.to_dict()
+    manifest["libraryStats"] = dawn_builder.library_stats(target_dir / "lib" / manifest["libraryName"])
+
+    manifest["toolchain"] = toolchain.toolchain_identity()
+
+    if build_result and build_result.compiler_cache_stats:
+        manifest["compilerCache"] = build_result.compiler_cache_stats
+
+    if build_result and build_result.profile:
+        profile = json.loads(build_result.profile.read_text())
+        manifest["buildProfile"] = {
+            "path": build_result.profile.as_posix(),
+            "wallTime": profile["wallTime"],
+            "effectiveParallelism": profile["effectiveParallelism"],
+            "criticalPath": profile["criticalPath"]["duration"],
+        }
+
     manifest_file.write_text(json.dumps(manifest, indent=2))
 
 
@@ -66,10 +139,10 @@ def read_target_manifests() -> List[Dict[str, Any]]:
     Read all target manifest files from the manifests directory.
 
     Returns:
-        List of manifest dictionaries
+        List of manifest dictionaries, sorted by file name
     """
     manifests = []
-    for manifest_file in manifests_dir().glob("*.json"):
+    for manifest_file in sorted(manifests_dir().glob("*.json")):
         with open(manifest_file, "r") as f:
             manifests.append(json.load(f))
     return manifests
@@ -107,7 +180,10 @@ def group_manifests_by_platform(
 
 
 def _build_platform_info_json(
-    platform: PlatformGroup, manifests: List[Dict[str, Any]], version: str
+    platform: PlatformGroup,
+    manifests: List[Dict[str, Any]],
+    version: str,
+    header_paths: Optional[Dict[str, str]] = None,
 ) -> Dict[str, Any]:
     """
     Build the info.json artifact manifest for a platform bundle.
@@ -116,10 +192,13 @@ def _build_platform_info_json(
         platform: The PlatformGroup for this bundle
         manifests: Target manifests for this platform
         version: Version string for the artifacts
+        header_paths: Header directory in the bundle by target name, <target>/include
+            for targets that are not listed
 
     Returns:
         Dictionary representing the info.json content
     """
+    header_paths = header_paths or {}
     target_variants = [
         {
             "path": (
@@ -127,10 +206,11 @@ def _build_platform_info_json(
             ).as_posix(),
             "staticLibraryMetadata": {
                 "headerPaths": [
-                    (pathlib.Path(manifest["targetName"]) / "include").as_posix()
+                    header_paths.get(manifest["targetName"], (pathlib.Path(manifest["targetName"]) / "include").as_posix())
                 ]
             },
             "supportedTriples": manifest["supportedTriples"],
+            **({"dawnFeatures": manifest["features"]} if "features" in manifest else {}),
         }
         for manifest in manifests
     ]
@@ -143,50 +223,26 @@ def _build_platform_info_json(
         }
     }
 
-    # Windows DLL artifacts are only included in the Windows bundle
+    # Windows DLL artifacts are only included in the Windows bundle, taken from the
+    # bin directory of the release target of each architecture
     if platform == PlatformGroup.WINDOWS:
-        artifacts["dxcompiler"] = {
-            "type": "experimentalWindowsDLL",
-            "version": "1.0.0",
-            "variants": [
-                {
-                    "path": "windows_arm64_release/bin/dxcompiler.dll",
-                    "supportedTriples": ["aarch64-unknown-windows-msvc"],
-                },
-                {
-                    "path": "windows_x86_64_release/bin/dxcompiler.dll",
-                    "supportedTriples": ["x86_64-unknown-windows-msvc"],
-                },
-            ],
-        }
-        artifacts["dxil"] = {
-            "type": "experimentalWindowsDLL",
-            "version": "1.0.0",
-            "variants": [
-                {
-                    "path": "windows_arm64_release/bin/dxil.dll",
-                    "supportedTriples": ["aarch64-unknown-windows-msvc"],
-                },
-                {
-                    "path": "windows_x86_64_release/bin/dxil.dll",
-                    "supportedTriples": ["x86_64-unknown-windows-msvc"],
-                },
-            ],
-        }
-        artifacts["d3dcompiler_47"] = {
-            "type": "experimentalWindowsDLL",
-            "version": "1.0.0",
-            "variants": [
-                {
-                    "path": "windows_arm64_release/bin/d3dcompiler_47.dll",
-                    "supportedTriples": ["aarch64-unknown-windows-msvc"],
-                },
-                {
-                    "path": "windows_x86_64_release/bin/d3dcompiler_47.dll",
-                    "supportedTriples": ["x86_64-unknown-windows-msvc"],
-                },
-            ],
-        }
+        dll_targets: Dict[Tuple[str, ...], str] = {}
+        for manifest in sorted(manifests, key=lambda manifest: manifest["targetName"]):
+            if "binPath" in manifest and manifest.get("config", "release") == "release":
+                triples = tuple(WINDOWS_DLL_TRIPLES.get(triple, triple) for triple in manifest["supportedTriples"])
+                dll_targets.setdefault(triples, manifest["targetName"])
+        for dll in WINDOWS_DLLS:
+            artifacts[dll] = {
+                "type": "experimentalWindowsDLL",
+                "version": "1.0.0",
+                "variants": [
+                    {
+                        "path": f"{target_name}/bin/{dll}.dll",
+                        "supportedTriples": list(triples),
+                    }
+                    for triples, target_name in dll_targets.items()
+                ],
+            }
 
     return {"schemaVersion": "1.0", "artifacts": artifacts}
 
@@ -201,23 +257,251 @@ def compute_checksum(file_path: pathlib.Path) -> str:
     Returns:
         Hex-encoded SHA-256 digest string
     """
+    return bundle_verify.sha256_file(file_path)
+
+
+def _bundle_tree_entries(source_dir: pathlib.Path, arc_dir: str) -> List[Tuple[pathlib.Path, str]]:
+    """
+    List the files and directories below a directory with their names in a bundle.
+
+    Args:
+        source_dir: Directory to add to the bundle
+        arc_dir: Name of the directory in the bundle
+
+    Returns:
+        List of (source path, archive name) pairs, directories first, in a stable order
+    """
+    entries = [(source_dir, f"{arc_dir}/")]
+    for dir_path, dir_names, file_names in os.walk(source_dir):
+        dir_names.sort()
+        current = pathlib.Path(dir_path)
+        relative = current.relative_to(source_dir).as_posix()
+        arc_current = arc_dir if relative == "." else f"{arc_dir}/{relative}"
+        for name in dir_names:
+            entries.append((current / name, f"{arc_current}/{name}/"))
+        for name in sorted(file_names):
+            entries.append((current / name, f"{arc_current}/{name}"))
+    return entries
+
+
+@dataclasses.dataclass
+class SharedHeaders:
+    """
+    Placement of the header trees of the variants of a platform bundle.
+
+    Attributes:
+        header_paths: Header directory in the bundle by target name
+        include_dirs: (include directory, header directory in the bundle) pairs of the
+            distinct header trees to add to the bundle
+        bytes_saved: Bytes of headers not stored because variants share a tree
+    """
+
+    header_paths: Dict[str, str] = dataclasses.field(default_factory=dict)
+    include_dirs: List[Tuple[pathlib.Path, str]] = dataclasses.field(default_factory=list)
+    bytes_saved: int = 0
+
+
+def _header_tree_digest(
+    include_dir: pathlib.Path, file_digest: Callable[[pathlib.Path], str] = bundle_verify.sha256_file
+) -> Tuple[str, int]:
+    """
+    Compute a digest of the names and contents of the files and directories below an
+    include directory.
+
+    Args:
+        include_dir: The include directory
+        file_digest: Function computing the SHA-256 digest of a file
+
+    Returns:
+        Tuple of the hex-encoded SHA-256 digest of the tree and the total size of its
+        files
+    """
     sha256 = hashlib.sha256()
-    with open(file_path, "rb") as f:
-        for chunk in iter(lambda: f.read(65536), b""):
-            sha256.update(chunk)
-    return sha256.hexdigest()
+    size = 0
+    for source, arc_name in _bundle_tree_entries(include_dir, "."):
+        if arc_name.endswith("/"):
+            sha256.update(f"{arc_name}\0\0".encode("utf-8"))
+            continue
+        sha256.update(f"{arc_name}\0{file_digest(source)}\0".encode("utf-8"))
+        size += source.stat().st_size
+    return sha256.hexdigest(), size
+
+
+def _shared_headers(
+    manifests: List[Dict[str, Any]], file_digest: Callable[[pathlib.Path], str] = bundle_verify.sha256_file
+) -> SharedHeaders:
+    """
+    Find the variants of a platform bundle whose header trees are identical.
 
+    The Apple targets usually install byte-identical headers. A header tree used by
+    several variants is stored once in include/<digest> at the top of the bundle,
+    and the headerPaths of those variants point there; a tree used by a single
+    variant stays in <target>/include.
 
-def create_platform_artifact_bundle(
+    Args:
+        manifests: Target manifests for this platform
+        file_digest: Function computing the SHA-256 digest of a header
+
+    Returns:
+        SharedHeaders of the bundle
+    """
+    trees: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    tree_sizes: Dict[str, int] = {}
+    for manifest in manifests:
+        digest, size = _header_tree_digest(pathlib.Path(manifest["includePath"]), file_digest)
+        trees[digest].append(manifest)
+        tree_sizes[digest] = size
+
+    shared = SharedHeaders()
+    for digest, tree_manifests in sorted(trees.items()):
+        if len(tree_manifests) == 1:
+            header_path = f"{tree_manifests[0]['targetName']}/include"
+        else:
+            header_path = f"include/{digest[:16]}"
+            shared.bytes_saved += tree_sizes[digest] * (len(tree_manifests) - 1)
+        shared.include_dirs.append((pathlib.Path(tree_manifests[0]["includePath"]), header_path))
+        for manifest in tree_manifests:
+            shared.header_paths[manifest["targetName"]] = header_path
+    return shared
+
+
+@dataclasses.dataclass
+class BundleArchive:
+    """
+    A written artifact bundle zip.
+
+    Attributes:
+        path: Path of the zip archive
+        checksum: Hex-encoded SHA-256 digest of the archive
+        size: Size of the archive in bytes
+        uncompressed_size: Size of the archived data before compression
+        elapsed: Wall time in seconds spent writing the archive
+        reused: Whether an up-to-date archive from an earlier run was kept
+        header_bytes_saved: Bytes of headers not stored because variants share them
+    """
+
+    path: pathlib.Path
+    checksum: str
+    size: int
+    uncompressed_size: int = 0
+    elapsed: float = 0.0
+    reused: bool = False
+    header_bytes_saved: int = 0
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Get the compression statistics of the archive.
+
+        Returns:
+            Dictionary with the sizes, compression ratio, wall time and throughput
+        """
+        return {
+            "fileName": self.path.name,
+            "size": self.size,
+            "uncompressedSize": self.uncompressed_size,
+            "ratio": round(self.uncompressed_size / self.size, 3) if self.size else None,
+            "seconds": round(self.elapsed, 3),
+            "throughputMiBps": round(self.uncompressed_size / (1024 * 1024) / self.elapsed, 1) if self.elapsed else None,
+            "reused": self.reused,
+            "headerBytesSaved": self.header_bytes_saved,
+        }
+
+
+class BundleCompression:
+    """
+    Compression settings and worker threads shared by the archives being written.
+
+    Blocks of all archives are compressed on one pool of worker threads, so bundles
+    written at the same time share the cores instead of each starting its own pool.
+    """
+
+    def __init__(self, jobs: Optional[int] = None, profile: str = "default") -> None:
+        """
+        Create the compression settings.
+
+        Args:
+            jobs: Number of blocks compressed at the same time, the number of CPU cores
+                by default
+            profile: Name of the compression profile, see COMPRESSION_PROFILES
+
+        Raises:
+            ValueError: If the profile is unknown
+        """
+        if profile not in COMPRESSION_PROFILES:
+            raise ValueError(f"Unknown compression profile {profile}, expected one of {', '.join(COMPRESSION_PROFILES)}")
+        self.profile = profile
+        self.level = COMPRESSION_PROFILES[profile]
+        self.jobs = max(1, jobs or os.cpu_count() or 1)
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.jobs) if self.jobs > 1 else None
+
+    def writer(self, out: Any) -> zip_stream.ZipStreamWriter:
+        """
+        Create a zip writer that compresses on the shared worker threads.
+
+        Args:
+            out: Binary stream to write the archive to
+
+        Returns:
+            The zip writer
+        """
+        return zip_stream.ZipStreamWriter(
+            out, level=self.level, executor=self.executor, max_pending_blocks=2 * self.jobs, reproducible=True
+        )
+
+    def shutdown(self) -> None:
+        """
+        Stop the worker threads.
+        """
+        if self.executor:
+            self.executor.shutdown()
+
+
+def _write_zip(
+    zip_path: pathlib.Path,
+    entries: List[Tuple[pathlib.Path, str]],
+    json_entries: Dict[str, Dict[str, Any]],
+    compression: Optional[BundleCompression] = None,
+) -> BundleArchive:
+    """
+    Write a zip archive in a single pass, replacing an existing one.
+
+    The archive is reproducible: entries are sorted by name and get a fixed
+    timestamp and normalized permissions, and JSON documents are written with sorted
+    keys, so unchanged inputs always produce the same bytes and checksum.
+
+    Args:
+        zip_path: Path of the zip archive
+        entries: (source path, archive name) pairs of the files and directories to add
+        json_entries: JSON documents to add after the files, by archive name
+        compression: Compression settings, the default profile on the calling thread by default
+
+    Returns:
+        BundleArchive with the checksum and compression statistics of the archive
+    """
+    zip_path.unlink(missing_ok=True)
+    with open(zip_path, "wb") as f:
+        writer = (compression or BundleCompression(1)).writer(f)
+        for source, arc_name in sorted(entries, key=lambda entry: entry[1]):
+            writer.add_path(source, arc_name)
+        for arc_name, data in sorted(json_entries.items()):
+            writer.add_bytes(arc_name, json.dumps(data, indent=2, sort_keys=True).encode("utf-8"))
+        result = writer.close()
+    return BundleArchive(zip_path, result.sha256, result.size, result.uncompressed_size, result.elapsed)
+
+
+def _platform_bundle_contents(
     platform: PlatformGroup,
     manifests: List[Dict[str, Any]],
     chromium_version: str,
     dawn_hash: str,
     dawn_json: pathlib.Path,
     base_name: str,
-) -> pathlib.Path:
+    file_digest: Callable[[pathlib.Path], str] = bundle_verify.sha256_file,
+) -> Tuple[str, List[Tuple[pathlib.Path, str]], Dict[str, Dict[str, Any]], int]:
     """
-    Create an artifact bundle zip for a single platform group.
+    List the contents of the artifact bundle of a platform group.
+
+    Identical header trees of several variants are listed once, see _shared_headers.
 
     Args:
         platform: The PlatformGroup for this bundle
@@ -226,62 +510,350 @@ def create_platform_artifact_bundle(
         dawn_hash: Dawn hash string
         dawn_json: Path to the dawn.json source file
         base_name: Base name for the bundle (e.g. "dawn_webgpu")
+        file_digest: Function computing the SHA-256 digest of a header
 
     Returns:
-        Path to the created zip archive (without the .zip extension appended by
-        shutil.make_archive; the actual file is at the returned path + ".zip")
+        Tuple of the bundle name, the (source path, archive name) pairs of its files
+        and directories, its JSON documents by archive name, and the bytes of headers
+        not stored because variants share them
     """
     bundle_name = f"{base_name}_{platform.value}.artifactbundle"
-    bundle_dir = dist_directory() / bundle_name
-
-    # Remove any existing bundle directory
-    if bundle_dir.exists():
-        shutil.rmtree(bundle_dir)
-    bundle_dir.mkdir(exist_ok=True, parents=True)
+    headers = _shared_headers(manifests, file_digest)
 
-    # Copy libraries, headers, and (for Windows) binaries
+    # Libraries, headers, and (for Windows) binaries
+    entries: List[Tuple[pathlib.Path, str]] = [(dist_directory(), f"{bundle_name}/")]
     for manifest in manifests:
-        target_dir = bundle_dir / manifest["targetName"]
-        shutil.copytree(manifest["libraryPath"], target_dir)
-        shutil.copytree(manifest["includePath"], target_dir / "include")
+        target_arc_dir = f"{bundle_name}/{manifest['targetName']}"
+        entries.extend(_bundle_tree_entries(pathlib.Path(manifest["libraryPath"]), target_arc_dir))
         if "binPath" in manifest:
-            shutil.copytree(manifest["binPath"], target_dir / "bin")
+            entries.extend(_bundle_tree_entries(pathlib.Path(manifest["binPath"]), f"{target_arc_dir}/bin"))
+    if any(header_path.startswith("include/") for _, header_path in headers.include_dirs):
+        entries.append((dist_directory(), f"{bundle_name}/include/"))
+    for include_dir, header_path in headers.include_dirs:
+        entries.extend(_bundle_tree_entries(include_dir, f"{bundle_name}/{header_path}"))
 
-    # Copy dawn.json
-    shutil.copy2(dawn_json, bundle_dir / "dawn.json")
+    # dawn.json
+    entries.append((dawn_json, f"{bundle_name}/dawn.json"))
 
-    # Write dawn_version.json
+    # dawn_version.json
     version_data = {
         "dawn_hash": dawn_hash,
         "chromium_version": chromium_version,
     }
-    (bundle_dir / "dawn_version.json").write_text(json.dumps(version_data, indent=2))
+    if any("debugPath" in manifest for manifest in manifests):
+        version_data["debug_archive"] = debug_archive_name(base_name, platform)
+
+    # info.json
+    info = _build_platform_info_json(platform, manifests, chromium_version, headers.header_paths)
+
+    json_entries = {f"{bundle_name}/dawn_version.json": version_data, f"{bundle_name}/info.json": info}
+    return bundle_name, entries, json_entries, headers.bytes_saved
+
+
+def create_platform_artifact_bundle(
+    platform: PlatformGroup,
+    manifests: List[Dict[str, Any]],
+    chromium_version: str,
+    dawn_hash: str,
+    dawn_json: pathlib.Path,
+    base_name: str,
+    compression: Optional[BundleCompression] = None,
+    file_digest: Callable[[pathlib.Path], str] = bundle_verify.sha256_file,
+) -> BundleArchive:
+    """
+    Create an artifact bundle zip for a single platform group.
 
-    # Write info.json
-    info = _build_platform_info_json(platform, manifests, chromium_version)
-    (bundle_dir / "info.json").write_text(json.dumps(info, indent=2))
+    The zip is written straight from the install trees of the targets, without
+    staging a copy of the bundle directory. Every file is read once and the archive
+    is checksummed as it is written. Variants with identical headers share one
+    include directory.
+
+    Args:
+        platform: The PlatformGroup for this bundle
+        manifests: Target manifests for this platform
+        chromium_version: Chromium version string
+        dawn_hash: Dawn hash string
+        dawn_json: Path to the dawn.json source file
+        base_name: Base name for the bundle (e.g. "dawn_webgpu")
+        compression: Compression settings, compressing on the calling thread by default
+        file_digest: Function computing the SHA-256 digest of a header, to compare
+            the header trees of the variants
+
+    Returns:
+        BundleArchive of the created zip archive
+    """
+    bundle_name, entries, json_entries, header_bytes_saved = _platform_bundle_contents(
+        platform, manifests, chromium_version, dawn_hash, dawn_json, base_name, file_digest
+    )
+
+    # Remove a bundle directory staged by earlier versions of this script
+    bundle_dir = dist_directory() / bundle_name
+    if bundle_dir.exists():
+        shutil.rmtree(bundle_dir)
 
     # Create the zip archive
-    archive_stem = dist_directory() / bundle_name
-    archive_path_no_ext = archive_stem
-
-    # Remove existing zip if present
-    zip_path = pathlib.Path(str(archive_path_no_ext) + ".zip")
-    if zip_path.exists():
-        zip_path.unlink()
-
-    shutil.make_archive(
-        str(archive_path_no_ext),
-        "zip",
-        root_dir=dist_directory(),
-        base_dir=bundle_name,
+    zip_path = dist_directory() / f"{bundle_name}.zip"
+    bundle_archive = _write_zip(zip_path, entries, json_entries, compression)
+    bundle_archive.header_bytes_saved = header_bytes_saved
+    return bundle_archive
+
+
+def debug_archive_name(base_name: str, platform: PlatformGroup) -> str:
+    """
+    Get the file name of the debug info archive of a platform bundle.
+
+    Args:
+        base_name: Base name for the bundle (e.g. "dawn_webgpu")
+        platform: The PlatformGroup of the bundle
+
+    Returns:
+        File name of the debug info archive
+    """
+    return f"{base_name}_{platform.value}.debug.zip"
+
+
+def _debug_archive_entries(manifests: List[Dict[str, Any]]) -> List[Tuple[pathlib.Path, str]]:
+    """
+    List the unstripped libraries that go into the debug info archive of a platform.
+
+    Args:
+        manifests: Target manifests for this platform
+
+    Returns:
+        (source path, archive name) pairs of the unstripped libraries
+    """
+    return [
+        (pathlib.Path(manifest["debugPath"]), f"{manifest['targetName']}/{manifest['libraryName']}")
+        for manifest in manifests
+        if "debugPath" in manifest
+    ]
+
+
+def create_debug_archive(
+    platform: PlatformGroup,
+    manifests: List[Dict[str, Any]],
+    base_name: str,
+    compression: Optional[BundleCompression] = None,
+) -> Optional[BundleArchive]:
+    """
+    Create the side archive with the unstripped libraries of a platform bundle.
+
+    The archive holds <targetName>/<libraryName> for every stripped variant, so
+    consumers who need the debug info can swap in the unstripped library. The size
+    saved in the bundle by stripping each variant is reported.
+
+    Args:
+        platform: The PlatformGroup of the bundle
+        manifests: Target manifests for this platform
+        base_name: Base name for the bundle (e.g. "dawn_webgpu")
+        compression: Compression settings, compressing on the calling thread by default
+
+    Returns:
+        BundleArchive of the debug info archive, or None if no variant was stripped
+    """
+    stripped = [manifest for manifest in manifests if "debugPath" in manifest]
+    archive_path = dist_directory() / debug_archive_name(base_name, platform)
+    if not stripped:
+        archive_path.unlink(missing_ok=True)
+        return None
+
+    debug_archive = _write_zip(archive_path, _debug_archive_entries(manifests), {}, compression)
+    for manifest in stripped:
+        info = manifest["debugInfo"]
+        print(
+            f"{manifest['targetName']}: {info['unstrippedSize'] / (1024 * 1024):.1f} MiB -> "
+            f"{info['strippedSize'] / (1024 * 1024):.1f} MiB, "
+            f"saved {info['saved'] / (1024 * 1024):.1f} MiB"
+        )
+
+    print(f"Wrote debug info for {platform.value} to {archive_path}")
+    return debug_archive
+
+
+def bundle_state_name(base_name: str, platform: PlatformGroup) -> str:
+    """
+    Get the file name of the state file of a platform bundle.
+
+    Args:
+        base_name: Base name for the bundle (e.g. "dawn_webgpu")
+        platform: The PlatformGroup of the bundle
+
+    Returns:
+        File name of the state file
+    """
+    return f"{base_name}_{platform.value}.bundle-state.json"
+
+
+def _file_digest(path: pathlib.Path, cached: Dict[str, List[Any]], digests: Dict[str, List[Any]]) -> str:
+    """
+    Get the content digest of a file, reusing the digest computed earlier in this run
+    or in an earlier run if the file has the same size and modification time.
+
+    Args:
+        path: Path of the file
+        cached: [size, mtime_ns, digest] by path from the earlier run
+        digests: [size, mtime_ns, digest] by path of this run, updated
+
+    Returns:
+        Hex-encoded SHA-256 digest of the file
+    """
+    st = os.stat(path)
+    key = str(path)
+    entry = digests.get(key) or cached.get(key)
+    if entry and entry[0] == st.st_size and entry[1] == st.st_mtime_ns:
+        digest = entry[2]
+    else:
+        digest = bundle_verify.sha256_file(path)
+    digests[key] = [st.st_size, st.st_mtime_ns, digest]
+    return digest
+
+
+def _archive_state(archive: Optional[BundleArchive]) -> Optional[Dict[str, Any]]:
+    """
+    Get the record of an archive in a bundle state file.
+
+    Args:
+        archive: The archive, or None
+
+    Returns:
+        Dictionary with the file name, checksum and sizes, or None
+    """
+    if not archive:
+        return None
+    return {
+        "fileName": archive.path.name,
+        "checksum": archive.checksum,
+        "size": archive.size,
+        "uncompressedSize": archive.uncompressed_size,
+        "headerBytesSaved": archive.header_bytes_saved,
+    }
+
+
+def _reused_archive(record: Optional[Dict[str, Any]]) -> Optional[BundleArchive]:
+    """
+    Get an archive recorded in a bundle state file if it is still in dist/.
+
+    Args:
+        record: Record of the archive in the state file
+
+    Returns:
+        BundleArchive of the archive, or None if it is missing or has a different size
+    """
+    path = dist_directory() / record["fileName"]
+    if not path.is_file() or path.stat().st_size != record["size"]:
+        return None
+    return BundleArchive(
+        path,
+        record["checksum"],
+        record["size"],
+        record["uncompressedSize"],
+        reused=True,
+        header_bytes_saved=record.get("headerBytesSaved", 0),
     )
 
-    return zip_path
+
+def build_platform_bundle(
+    platform: PlatformGroup,
+    manifests: List[Dict[str, Any]],
+    chromium_version: str,
+    dawn_hash: str,
+    dawn_json: pathlib.Path,
+    base_name: str,
+    compression: BundleCompression,
+    force: bool = False,
+) -> Tuple[BundleArchive, Optional[BundleArchive]]:
+    """
+    Create the artifact bundle and debug info archive of a platform group unless they
+    are up to date.
+
+    The inputs of the bundle are fingerprinted: the manifest fields that reach the
+    bundle, the content digests of every library, header and binary, the version data
+    and info.json, the bundle layout version, and the compression profile and zip
+    writer settings. The fingerprint and the checksums of the archives are kept in
+    dist/<base_name>_<platform>.bundle-state.json; if the fingerprint is unchanged
+    and the archives are still there, they are kept along with their checksums.
+    Content digests, including those comparing the header trees of the variants, are
+    only recomputed for files whose size or modification time changed, so an
+    unchanged platform costs a stat per file.
+
+    Args:
+        platform: The PlatformGroup for this bundle
+        manifests: Target manifests for this platform
+        chromium_version: Chromium version string
+        dawn_hash: Dawn hash string
+        dawn_json: Path to the dawn.json source file
+        base_name: Base name for the bundle (e.g. "dawn_webgpu")
+        compression: Compression settings
+        force: Whether to rebuild the archives even if they are up to date
+
+    Returns:
+        Tuple of the BundleArchive of the bundle and of the debug info archive (None
+        if no variant was stripped)
+    """
+    state_file = dist_directory() / bundle_state_name(base_name, platform)
+    try:
+        state = json.loads(state_file.read_text())
+    except (OSError, ValueError):
+        state = {}
+    if state.get("format") != _BUNDLE_STATE_FORMAT:
+        state = {}
+
+    cached_digests = state.get("files", {})
+    digests: Dict[str, List[Any]] = {}
+
+    def file_digest(path: pathlib.Path) -> str:
+        return _file_digest(path, cached_digests, digests)
+
+    _, entries, json_entries, _ = _platform_bundle_contents(
+        platform, manifests, chromium_version, dawn_hash, dawn_json, base_name, file_digest
+    )
+
+    def content(entries: List[Tuple[pathlib.Path, str]]) -> List[Tuple[str, Optional[str]]]:
+        return sorted(
+            (arc_name, None if arc_name.endswith("/") else file_digest(source))
+            for source, arc_name in entries
+        )
+
+    fingerprint_data = {
+        "manifests": [
+            {field: manifest[field] for field in _BUNDLE_MANIFEST_FIELDS if field in manifest} for manifest in manifests
+        ],
+        "entries": content(entries),
+        "debugEntries": content(_debug_archive_entries(manifests)),
+        "json": json_entries,
+        "layout": _BUNDLE_LAYOUT_VERSION,
+        "profile": compression.profile,
+        "level": compression.level,
+        "blockSize": zip_stream.CHUNK_SIZE,
+        "dateTime": zip_stream.reproducible_date_time(),
+    }
+    fingerprint = hashlib.sha256(json.dumps(fingerprint_data, sort_keys=True).encode("utf-8")).hexdigest()
+
+    if not force and state.get("fingerprint") == fingerprint:
+        bundle_archive = _reused_archive(state["bundle"])
+        debug_archive = _reused_archive(state["debug"]) if state["debug"] else None
+        if bundle_archive and (debug_archive or not state["debug"]):
+            print(f"{platform.value} bundle is up to date, keeping {bundle_archive.path}")
+            return bundle_archive, debug_archive
+
+    bundle_archive = create_platform_artifact_bundle(
+        platform, manifests, chromium_version, dawn_hash, dawn_json, base_name, compression, file_digest
+    )
+    debug_archive = create_debug_archive(platform, manifests, base_name, compression)
+
+    state = {
+        "format": _BUNDLE_STATE_FORMAT,
+        "fingerprint": fingerprint,
+        "bundle": _archive_state(bundle_archive),
+        "debug": _archive_state(debug_archive),
+        "files": digests,
+    }
+    state_file.write_text(json.dumps(state, indent=2))
+    return bundle_archive, debug_archive
 
 
 def create_bundle_index(
-    platform_zip_paths: Dict[PlatformGroup, pathlib.Path],
+    platform_bundles: Dict[PlatformGroup, BundleArchive],
     manifests_by_platform: Dict[PlatformGroup, List[Dict[str, Any]]],
     base_name: str,
 ) -> pathlib.Path:
@@ -289,10 +861,11 @@ def create_bundle_index(
     Create the artifact bundle index zip that references all platform bundles.
 
     The .artifactbundleindex file is written directly to dist/, alongside the
-    platform zip archives it references.
+    platform zip archives it references. The checksums are the ones computed while
+    the bundles were written.
 
     Args:
-        platform_zip_paths: Mapping from PlatformGroup to zip path
+        platform_bundles: Mapping from PlatformGroup to its bundle zip
         manifests_by_platform: Mapping from PlatformGroup to list of manifests
         base_name: Base name for the index (e.g. "dawn_webgpu")
 
@@ -301,7 +874,7 @@ def create_bundle_index(
     """
     # Build the list of bundle entries
     bundle_entries = []
-    for platform, zip_path in sorted(platform_zip_paths.items()):
+    for platform, bundle in sorted(platform_bundles.items()):
         triples: List[str] = []
         for manifest in manifests_by_platform.get(platform, []):
             triples.extend(manifest["supportedTriples"])
@@ -319,8 +892,8 @@ def create_bundle_index(
 
         bundle_entries.append(
             {
-                "fileName": zip_path.name,
-                "checksum": compute_checksum(zip_path),
+                "fileName": bundle.path.name,
+                "checksum": bundle.checksum,
                 "supportedTriples": triples,
             }
         )
@@ -336,13 +909,68 @@ def create_bundle_index(
     return index_file
 
 
-def build_bundle_target(target_config: TargetConfig) -> None:
+def unchanged_bundles(index_file: pathlib.Path, previous_index: str) -> Optional[List[str]]:
+    """
+    Find the bundles of an index that are identical to bundles of a previous index.
+
+    Bundles are reproducible, so a bundle whose checksum appears in the previous
+    index (for example the one published with the previous release) has the same
+    content and does not need to be published again.
+
+    Args:
+        index_file: The .artifactbundleindex file just created
+        previous_index: Path or http(s) URL of the previous .artifactbundleindex
+
+    Returns:
+        File names of the unchanged bundles, or None if the previous index could not
+        be loaded
+    """
+    try:
+        if previous_index.startswith(("http://", "https://")):
+            response = requests.get(previous_index, timeout=60)
+            response.raise_for_status()
+            previous = response.json()
+        else:
+            previous = json.loads(pathlib.Path(previous_index).read_text())
+        previous_checksums = {archive["checksum"] for archive in previous["archives"]}
+    except (requests.exceptions.RequestException, OSError, ValueError, KeyError, TypeError) as e:
+        print(f"Could not load previous bundle index {previous_index}: {e}")
+        return None
+
+    index = json.loads(index_file.read_text())
+    return [archive["fileName"] for archive in index["archives"] if archive["checksum"] in previous_checksums]
+
+
+def build_bundle_target(
+    target_config: TargetConfig,
+    core_budget: Optional[dawn_builder.CoreBudget] = None,
+    log_file: Optional[pathlib.Path] = None,
+    force: bool = False,
+    cache: Optional[artifact_cache.ArtifactCache] = None,
+    registry: Optional[build_registry.BuildRegistry] = None,
+) -> dawn_builder.BuildResult:
     """
     Build a target and create its manifest file.
 
+    With an artifact cache, an install tree that is not up to date is first looked up
+    in the cache by its build fingerprint and restored without running CMake. Trees
+    that had to be built are stored in the cache afterwards. Cache errors are reported
+    and do not fail the build. With a build registry, the manifest and result of the
+    build are recorded in it; registry errors do not fail the build either.
+
     Args:
         target_config: Target configuration for the build
+        core_budget: Budget to take the build parallelism from when building several
+            targets at the same time
+        log_file: File to write the build output to, or None for the console
+        force: Rebuild even if the build fingerprint is unchanged
+        cache: Artifact cache to restore the install tree from and store it in
+        registry: Build registry to record the build in
+
+    Returns:
+        BuildResult describing which build steps ran
     """
+    start = time.monotonic()
     dawn_path = dawn_source.get_dawn_path()
     build_dir = pathlib.Path("builds")
 
@@ -354,23 +982,268 @@ def build_bundle_target(target_config: TargetConfig) -> None:
     manifest_dir.mkdir(exist_ok=True, parents=True)
     manifest_file = manifest_dir / f"{target_name}.json"
 
-    dawn_builder.build_dawn(dawn_path, target_dir, target_config)
-    write_target_manifest(manifest_file, target_config)
+    fingerprint = None
+    if cache:
+        flags = dawn_builder.configure_flags(dawn_path, target_config)
+        fingerprint = dawn_builder.build_fingerprint(dawn_path, target_config, flags)
+    if cache and fingerprint and not force and dawn_builder.installed_fingerprint(target_dir) != fingerprint:
+        try:
+            restored = cache.restore(fingerprint, target_name, target_dir, manifest_file)
+        except artifact_cache.ArtifactCacheError as e:
+            print(f"Artifact cache lookup for {target_name} failed: {e}")
+        else:
+            if restored:
+                print(f"Restored {target_name} from artifact cache {cache} ({fingerprint[:12]})")
+                result = dawn_builder.BuildResult(fingerprint, False, False, time.monotonic() - start, restored=True)
+                _record_build(registry, manifest_file, result)
+                return result
+            print(f"{target_name} ({fingerprint[:12]}) is not in artifact cache {cache}")
+
+    result = dawn_builder.build_dawn(
+        dawn_path,
+        target_dir,
+        target_config,
+        core_budget=core_budget,
+        log_file=log_file,
+        force=force,
+    )
+    # Strip freshly installed libraries, and those installed before stripping existed
+    if result.built or not (target_dir / dawn_builder.DEBUG_DIR_NAME).exists():
+        dawn_builder.split_debug_info(target_config, target_dir, log_file or build_dir / target_name / "build.log")
+
+    write_target_manifest(manifest_file, target_config, result)
+    if target_config.config not in ("release", "debug"):
+        compare_with_release(manifest_file, target_config)
+
+    if cache and result.built and result.fingerprint:
+        try:
+            cache.store(result.fingerprint, target_name, target_dir, manifest_file)
+        except artifact_cache.ArtifactCacheError as e:
+            print(f"Failed to store {target_name} in artifact cache: {e}")
+    _record_build(registry, manifest_file, result)
+    return result
+
+
+def _record_build(
+    registry: Optional[build_registry.BuildRegistry], manifest_file: pathlib.Path, result: dawn_builder.BuildResult
+) -> None:
+    """
+    Record a build in the build registry, reporting errors without failing the build.
+
+    Args:
+        registry: The build registry, or None
+        manifest_file: Manifest file written for the build
+        result: Result of the build
+    """
+    if not registry:
+        return
+    try:
+        registry.record_build(json.loads(manifest_file.read_text()), result)
+    except build_registry.BuildRegistryError as e:
+        print(f"Failed to record {manifest_file.stem} in build registry: {e}")
+    except Exception as e:
+        # The registry is bookkeeping: an unexpected failure must not fail a good build
+        print(f"Failed to record {manifest_file.stem} in build registry: {e!r}")
+
+
+def compare_with_release(manifest_file: pathlib.Path, target_config: TargetConfig) -> None:
+    """
+    Compare the library of an optimized build with the plain release build of the target.
+
+    The comparison is printed and stored in the manifest under "releaseComparison". It
+    is skipped if the release build of the target has no manifest.
+
+    Args:
+        manifest_file: Manifest of the optimized build
+        target_config: Target configuration of the optimized build
+    """
+    release_name = str(dataclasses.replace(target_config, config="release"))
+    release_manifest_file = manifest_file.with_name(f"{release_name}.json")
+    if not release_manifest_file.exists():
+        print(f"No {release_name} build to compare {target_config} with")
+        return
+
+    manifest = json.loads(manifest_file.read_text())
+    stats = manifest.get("libraryStats")
+    release_stats = json.loads(release_manifest_file.read_text()).get("libraryStats")
+    if not stats or not release_stats:
+        return
+
+    comparison = {"target": release_name}
+    for key in ("size", "symbols"):
+        if stats[key] is None or release_stats[key] is None:
+            continue
+        change = round((stats[key] - release_stats[key]) / release_stats[key] * 100, 1) if release_stats[key] else None
+        comparison[key] = {"release": release_stats[key], target_config.config: stats[key], "change": change}
+        change_text = f" ({change:+.1f}%)" if change is not None else ""
+        print(f"{target_config} {key}: {stats[key]} vs {release_stats[key]} in {release_name}{change_text}")
+
+    manifest["releaseComparison"] = comparison
+    manifest_file.write_text(json.dumps(manifest, indent=2))
+
+
+def build_bundle_targets(
+    target_configs: List[TargetConfig],
+    cores: Optional[int] = None,
+    max_concurrent: Optional[int] = None,
+    force: bool = False,
+    cache: Optional[artifact_cache.ArtifactCache] = None,
+    registry: Optional[build_registry.BuildRegistry] = None,
+) -> None:
+    """
+    Build several targets at the same time, splitting the CPU cores between them.
+
+    Each running build gets an equal share of the cores through cmake --build
+    --parallel, and the remaining builds are rebalanced when one finishes. The output
+    of each build goes to builds/<target>/build.log.
+
+    Args:
+        target_configs: Target configurations to build
+        cores: Number of cores to split between the builds, all cores by default
+        max_concurrent: Maximum number of builds running at the same time, all by default
+        force: Rebuild even if the build fingerprints are unchanged
+        cache: Artifact cache to restore install trees from and store them in
+        registry: Build registry to record the builds in
+
+    Raises:
+        BuildDawnError: If any of the builds fail, once all builds have finished
+    """
+    core_budget = dawn_builder.CoreBudget(cores or os.cpu_count() or 1)
+
+    def build(target_config: TargetConfig) -> float:
+        start = time.monotonic()
+        core_budget.acquire(str(target_config))
+        try:
+            log_file = pathlib.Path("builds") / str(target_config) / "build.log"
+            log_file.parent.mkdir(exist_ok=True, parents=True)
+            print(f"[{target_config}] started, logging to {log_file}")
+            build_bundle_target(
+                target_config, core_budget=core_budget, log_file=log_file, force=force, cache=cache, registry=registry
+            )
+        finally:
+            core_budget.release(str(target_config))
+        return time.monotonic() - start
+
+    failed = []
+    finished = []
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=max_concurrent or len(target_configs)
+    ) as executor:
+        futures = {executor.submit(build, config): config for config in target_configs}
+        for future in concurrent.futures.as_completed(futures):
+            target_config = futures[future]
+            try:
+                elapsed = future.result()
+            except (Exception, SystemExit) as e:
+                # Any failure is reported per target, so the other builds can finish
+                print(f"[{target_config}] failed: {e!r}")
+                failed.append(str(target_config))
+            else:
+                print(f"[{target_config}] finished in {elapsed:.0f}s")
+                finished.append(str(target_config))
+
+    if failed:
+        print(f"Built {len(finished)} of {len(target_configs)} targets: {', '.join(finished) or 'none'}")
+        raise dawn_builder.BuildDawnError(f"Failed to build {', '.join(failed)}")
+
+
+def bundle_report_name(base_name: str) -> str:
+    """
+    Get the file name of the compression report of the bundles.
+
+    Args:
+        base_name: Base name for the bundles (e.g. "dawn_webgpu")
+
+    Returns:
+        File name of the compression report
+    """
+    return f"{base_name}.bundle-report.json"
+
+
+def write_bundle_report(
+    archives: List[BundleArchive], compression: BundleCompression, elapsed: float, base_name: str
+) -> pathlib.Path:
+    """
+    Write the compression report of the bundles to dist/ and print a summary.
+
+    The report holds the size, compression ratio, wall time and throughput of each
+    archive, so compression profiles can be compared between pipelines, and the
+    bytes saved by sharing identical header trees between variants.
+
+    Args:
+        archives: The bundles and debug info archives that were written
+        compression: The compression settings they were written with
+        elapsed: Wall time in seconds of writing all archives
+        base_name: Base name for the bundles (e.g. "dawn_webgpu")
+
+    Returns:
+        Path to the report
+    """
+    size = sum(archive.size for archive in archives)
+    uncompressed_size = sum(archive.uncompressed_size for archive in archives)
+    report = {
+        "profile": compression.profile,
+        "level": compression.level,
+        "jobs": compression.jobs,
+        "seconds": round(elapsed, 3),
+        "size": size,
+        "uncompressedSize": uncompressed_size,
+        "ratio": round(uncompressed_size / size, 3) if size else None,
+        "throughputMiBps": round(uncompressed_size / (1024 * 1024) / elapsed, 1) if elapsed else None,
+        "headerBytesSaved": sum(archive.header_bytes_saved for archive in archives),
+        "archives": [archive.report() for archive in sorted(archives, key=lambda archive: archive.path.name)],
+    }
+
+    for entry in report["archives"]:
+        if entry["reused"]:
+            print(f"{entry['fileName']}: up to date, {entry['size'] / (1024 * 1024):.1f} MiB")
+            continue
+        print(
+            f"{entry['fileName']}: {entry['uncompressedSize'] / (1024 * 1024):.1f} MiB -> "
+            f"{entry['size'] / (1024 * 1024):.1f} MiB (ratio {entry['ratio']}) in {entry['seconds']:.1f}s"
+        )
+    print(
+        f"Compressed {uncompressed_size / (1024 * 1024):.1f} MiB with profile {compression.profile} "
+        f"on {compression.jobs} threads in {elapsed:.1f}s"
+    )
+    for entry in report["archives"]:
+        if entry["headerBytesSaved"]:
+            print(f"{entry['fileName']}: shared header trees saved {entry['headerBytesSaved'] / 1024:.1f} KiB")
+
+    report_file = dist_directory() / bundle_report_name(base_name)
+    report_file.write_text(json.dumps(report, indent=2))
+    return report_file
 
 
 def create_artifact_bundles(
-    chromium_version: str, dawn_hash: str, base_name: str
+    chromium_version: str,
+    dawn_hash: str,
+    base_name: str,
+    jobs: Optional[int] = None,
+    compression_profile: str = "default",
+    force: bool = False,
+    registry: Optional[build_registry.BuildRegistry] = None,
 ) -> pathlib.Path:
     """
     Create per-platform artifact bundles and a bundle index zip.
 
     Produces one artifact bundle zip per platform group (apple, windows, linux)
-    and a .artifactbundleindex zip that references all of them.
+    and a .artifactbundleindex zip that references all of them. Only the platform
+    bundles whose inputs changed are rebuilt; the index uses the recorded checksums
+    of the others. The platform bundles are written at the same time, and their file
+    data is compressed in parallel on a shared pool of worker threads. The
+    compression statistics of every archive are written to
+    dist/<base_name>.bundle-report.json and, with a build registry, recorded in it.
 
     Args:
         chromium_version: Chromium version string
         dawn_hash: Dawn hash string
         base_name: Base name used for all output files (e.g. "dawn_webgpu")
+        jobs: Number of blocks compressed at the same time, the number of CPU cores
+            by default
+        compression_profile: Name of the compression profile, see COMPRESSION_PROFILES
+        force: Whether to rebuild every platform bundle even if it is up to date
+        registry: Build registry to record the archives in
 
     Returns:
         Path to the created .artifactbundleindex file
@@ -383,24 +1256,100 @@ def create_artifact_bundles(
     manifests = read_target_manifests()
     manifests_by_platform = group_manifests_by_platform(manifests)
 
-    platform_zip_paths: Dict[PlatformGroup, pathlib.Path] = {}
-    for platform, platform_manifests in manifests_by_platform.items():
-        zip_path = create_platform_artifact_bundle(
+    compression = BundleCompression(jobs, compression_profile)
+
+    def bundle(platform: PlatformGroup) -> Tuple[BundleArchive, Optional[BundleArchive]]:
+        return build_platform_bundle(
             platform,
-            platform_manifests,
+            manifests_by_platform[platform],
             chromium_version,
             dawn_hash,
             dawn_json,
             base_name,
+            compression,
+            force,
         )
-        platform_zip_paths[platform] = zip_path
+
+    start = time.monotonic()
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, len(manifests_by_platform))) as executor:
+            futures = {platform: executor.submit(bundle, platform) for platform in manifests_by_platform}
+            results = {platform: future.result() for platform, future in futures.items()}
+    finally:
+        compression.shutdown()
+
+    platform_bundles = {platform: bundle_archive for platform, (bundle_archive, _) in results.items()}
+    archives = [archive for pair in results.values() for archive in pair if archive]
+    write_bundle_report(archives, compression, time.monotonic() - start, base_name)
+    if registry:
+        try:
+            registry.record_bundles(
+                [{**archive.report(), "checksum": archive.checksum} for archive in archives],
+                chromium_version,
+                dawn_hash,
+                base_name,
+            )
+        except build_registry.BuildRegistryError as e:
+            print(f"Failed to record bundles in build registry: {e}")
+        except Exception as e:
+            print(f"Failed to record bundles in build registry: {e!r}")
 
     index_zip = create_bundle_index(
-        platform_zip_paths, manifests_by_platform, base_name
+        platform_bundles, manifests_by_platform, base_name
     )
     return index_zip
 
 
+def create_bundle_deltas(
+    previous_dir: pathlib.Path, base_name: str, compression_profile: str = "default"
+) -> List[pathlib.Path]:
+    """
+    Create deltas from the bundles of a previous release to the bundles in dist/.
+
+    For every platform bundle of dist/<base_name>.artifactbundleindex, the bundle of
+    the same platform in previous_dir (for example the assets of the previous
+    release) is looked up, and dist/<bundle>.delta.zip is written. The static
+    libraries are compared member by member, and how much of each one the delta
+    carries is printed.
+
+    Args:
+        previous_dir: Directory with the bundle zips of the previous release
+        base_name: Base name of the bundles in dist/ (e.g. "dawn_webgpu")
+        compression_profile: Compression profile the bundles were written with
+
+    Returns:
+        Paths to the created deltas
+
+    Raises:
+        bundle_delta.BundleDeltaError: If a delta cannot be created
+    """
+    index = json.loads((dist_directory() / f"{base_name}.artifactbundleindex").read_text())
+    deltas = []
+    for archive in index["archives"]:
+        platform_suffix = archive["fileName"][len(base_name):]
+        candidates = sorted(previous_dir.glob(f"*{platform_suffix}"))
+        if len(candidates) != 1:
+            print(f"No single previous bundle matching *{platform_suffix} in {previous_dir}, skipping")
+            continue
+
+        bundle = dist_directory() / archive["fileName"]
+        delta_file = dist_directory() / bundle_delta.delta_name(archive["fileName"])
+        stats = bundle_delta.create_bundle_delta(
+            candidates[0], bundle, delta_file, COMPRESSION_PROFILES[compression_profile]
+        )
+        for library in stats:
+            print(
+                f"{library.name}: {library.reused_members} of {library.members} members unchanged, "
+                f"{library.new_bytes / (1024 * 1024):.1f} of {library.size / (1024 * 1024):.1f} MiB new"
+            )
+        print(
+            f"Wrote {delta_file} ({delta_file.stat().st_size / (1024 * 1024):.1f} MiB, "
+            f"bundle {bundle.stat().st_size / (1024 * 1024):.1f} MiB)"
+        )
+        deltas.append(delta_file)
+    return deltas
+
+
 def dist_directory() -> pathlib.Path:
     """
     Get the path to the dist directory.
@@ -432,7 +1381,8 @@ def remove_build_directory() -> None:
 
 def remove_artifact_bundle_directory() -> None:
     """
-    Remove all per-platform artifact bundle directories and index artifacts from dist/.
+    Remove all per-platform artifact bundle directories, debug info archives, deltas,
+    index artifacts, compression reports and bundle state from dist/.
     """
     dist = dist_directory()
     if not dist.exists():
@@ -445,6 +1395,10 @@ def remove_artifact_bundle_directory() -> None:
             entry.unlink()
         elif entry.is_file() and entry.name.endswith(".artifactbundleindex"):
             entry.unlink()
+        elif entry.is_file() and entry.name.endswith((".debug.zip", ".delta.zip")):
+            entry.unlink()
+        elif entry.is_file() and entry.name.endswith((".bundle-report.json", ".bundle-state.json")):
+            entry.unlink()
 
 
 def manifests_dir() -> pathlib.Path:
@@ -0,0 +1,379 @@
+# Copyright 2025 Adobe
+# All Rights Reserved.
+#
+# NOTICE: Adobe permits you to use, modify, and distribute this file in
+# accordance with the terms of the Adobe license agreement accompanying
+# it.
+
+import datetime
+import file_links
+import hashlib
+import hmac
+import json
+import os
+import pathlib
+import time
+import urllib.parse
+import requests
+import requests.adapters
+import tree_archive
+from typing import Any, Dict, Optional
+
+
+# Timeout in seconds for each request to the S3 store.
+_S3_TIMEOUT = 60
+
+# Number of retries for a failed request to the S3 store.
+_S3_RETRIES = 3
+
+# Size of the blocks read from and written to cache entries.
+_CHUNK_SIZE = 1024 * 1024
+
+# Version of the layout of cache entries, part of every entry name.
+_CACHE_FORMAT = 1
+
+_EMPTY_PAYLOAD_HASH = hashlib.sha256(b"").hexdigest()
+
+
+# fmt: off
+class ArtifactCacheError(Exception): pass
+class ArtifactCacheConfigurationError(ArtifactCacheError): pass
+# fmt: on
+
+
+class LocalBackend:
+    """
+    Artifact cache storage in a directory, for example on a shared volume.
+    """
+
+    def __init__(self, directory: pathlib.Path) -> None:
+        self.directory = directory
+
+    def __str__(self) -> str:
+        return str(self.directory)
+
+    def get(self, name: str, dest_file: pathlib.Path) -> bool:
+        """
+        Copy a stored file.
+
+        Args:
+            name: Name of the stored file
+            dest_file: Path to copy the file to
+
+        Returns:
+            True if the file was found
+        """
+        source = self.directory / name
+        if not source.exists():
+            return False
+        file_links.link_or_copy(source, dest_file)
+        return True
+
+    def put(self, name: str, source_file: pathlib.Path) -> None:
+        """
+        Store a file. The file is placed under a temporary name and renamed, so
+        concurrent readers never see a partial file.
+
+        Args:
+            name: Name to store the file under
+            source_file: Path of the file to store
+        """
+        dest_file = self.directory / name
+        dest_file.parent.mkdir(exist_ok=True, parents=True)
+        partial = dest_file.with_name(f"{dest_file.name}.{os.getpid()}.partial")
+        file_links.link_or_copy(source_file, partial)
+        os.replace(partial, dest_file)
+
+
+class S3Backend:
+    """
+    Artifact cache storage in an S3-compatible object store.
+
+    Requests are signed with AWS Signature Version 4 using the credentials from
+    AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY and AWS_SESSION_TOKEN, and sent
+    anonymously if there are none. Objects are addressed path-style, so any
+    S3-compatible server (MinIO, a local stand-in) can be used through the endpoint.
+    """
+
+    def __init__(self, bucket: str, prefix: str = "", endpoint: Optional[str] = None, region: Optional[str] = None) -> None:
+        """
+        Create a backend for a bucket.
+
+        Args:
+            bucket: Name of the bucket
+            prefix: Key prefix of the cache entries in the bucket
+            endpoint: URL of the S3 endpoint, from AWS_ENDPOINT_URL or AWS by default
+            region: Region to sign requests for, from AWS_REGION or us-east-1 by default
+        """
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self.region = region or os.environ.get("AWS_REGION") or os.environ.get("AWS_DEFAULT_REGION") or "us-east-1"
+        self.endpoint = (endpoint or os.environ.get("AWS_ENDPOINT_URL") or f"https://s3.{self.region}.amazonaws.com").rstrip("/")
+        self.access_key = os.environ.get("AWS_ACCESS_KEY_ID")
+        self.secret_key = os.environ.get("AWS_SECRET_ACCESS_KEY")
+        self.session_token = os.environ.get("AWS_SESSION_TOKEN")
+
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(max_retries=_S3_RETRIES)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def __str__(self) -> str:
+        return f"{self.endpoint}/{self.bucket}/{self.prefix}"
+
+    def _url(self, name: str) -> str:
+        """
+        Get the URL of an object.
+
+        Args:
+            name: Name of the object below the prefix
+
+        Returns:
+            Path-style URL of the object
+        """
+        key = f"{self.prefix}/{name}" if self.prefix else name
+        return f"{self.endpoint}/{urllib.parse.quote(self.bucket)}/{urllib.parse.quote(key)}"
+
+    def _signed_headers(self, method: str, url: str, payload_hash: str) -> Dict[str, str]:
+        """
+        Sign a request with AWS Signature Version 4.
+
+        Args:
+            method: HTTP method of the request
+            url: URL of the request, without a query string
+            payload_hash: Hex-encoded SHA-256 digest of the request body
+
+        Returns:
+            Headers to send with the request, including the Authorization header if
+            credentials are configured
+        """
+        if not self.access_key or not self.secret_key:
+            return {}
+
+        parsed = urllib.parse.urlsplit(url)
+        now = datetime.datetime.now(datetime.timezone.utc)
+        amz_date = now.strftime("%Y%m%dT%H%M%SZ")
+        date = now.strftime("%Y%m%d")
+
+        headers = {
+            "host": parsed.netloc,
+            "x-amz-content-sha256": payload_hash,
+            "x-amz-date": amz_date,
+        }
+        if self.session_token:
+            headers["x-amz-security-token"] = self.session_token
+
+        signed_headers = ";".join(sorted(headers))
+        canonical_request = "\n".join(
+            [
+                method,
+                parsed.path,
+                "",
+                "".join(f"{name}:{headers[name]}\n" for name in sorted(headers)),
+                signed_headers,
+                payload_hash,
+            ]
+        )
+        scope = f"{date}/{self.region}/s3/aws4_request"
+        string_to_sign = "\n".join(
+            ["AWS4-HMAC-SHA256", amz_date, scope, hashlib.sha256(canonical_request.encode()).hexdigest()]
+        )
+
+        key = f"AWS4{self.secret_key}".encode()
+        for part in (date, self.region, "s3", "aws4_request"):
+            key = hmac.new(key, part.encode(), hashlib.sha256).digest()
+        signature = hmac.new(key, string_to_sign.encode(), hashlib.sha256).hexdigest()
+
+        headers["Authorization"] = (
+            f"AWS4-HMAC-SHA256 Credential={self.access_key}/{scope}, "
+            f"SignedHeaders={signed_headers}, Signature={signature}"
+        )
+        del headers["host"]
+        return headers
+
+    def get(self, name: str, dest_file: pathlib.Path) -> bool:
+        """
+        Download a stored object.
+
+        Args:
+            name: Name of the object below the prefix
+            dest_file: Path to download the object to
+
+        Returns:
+            True if the object was found
+
+        Raises:
+            ArtifactCacheError: If the request fails
+        """
+        url = self._url(name)
+        try:
+            with self.session.get(
+                url, headers=self._signed_headers("GET", url, _EMPTY_PAYLOAD_HASH), stream=True, timeout=_S3_TIMEOUT
+            ) as response:
+                if response.status_code == 404 or (response.status_code == 403 and not self.access_key):
+                    # Anonymous reads of missing objects are denied rather than not found
+                    return False
+                response.raise_for_status()
+                with open(dest_file, "wb") as f:
+                    for chunk in response.iter_content(_CHUNK_SIZE):
+                        f.write(chunk)
+        except requests.exceptions.RequestException as e:
+            raise ArtifactCacheError(f"Failed to download {url}: {e}")
+        return True
+
+    def put(self, name: str, source_file: pathlib.Path) -> None:
+        """
+        Upload a file as an object.
+
+        Args:
+            name: Name of the object below the prefix
+            source_file: Path of the file to upload
+
+        Raises:
+            ArtifactCacheError: If the request fails
+        """
+        url = self._url(name)
+        sha256 = hashlib.sha256()
+        with open(source_file, "rb") as f:
+            for chunk in iter(lambda: f.read(_CHUNK_SIZE), b""):
+                sha256.update(chunk)
+
+        headers = self._signed_headers("PUT", url, sha256.hexdigest())
+        headers["Content-Length"] = str(source_file.stat().st_size)
+        try:
+            with open(source_file, "rb") as f:
+                response = self.session.put(url, data=f, headers=headers, timeout=_S3_TIMEOUT)
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            raise ArtifactCacheError(f"Failed to upload {url}: {e}")
+
+
+class ArtifactCache:
+    """
+    Content-addressed cache of install trees and their manifests, keyed by build
+    fingerprint.
+
+    Each entry is an archive of the install tree written by tree_archive and a
+    metadata file with the digest of the archive and the target manifest. The
+    metadata is stored last, so an entry is only visible once it is complete.
+    """
+
+    def __init__(self, backend: Any) -> None:
+        self.backend = backend
+
+    def __str__(self) -> str:
+        return str(self.backend)
+
+    @staticmethod
+    def _entry_name(fingerprint: str, target_name: str) -> str:
+        """
+        Get the name of the cache entry of a build.
+
+        Args:
+            fingerprint: Fingerprint of the build
+            target_name: Name of the target
+
+        Returns:
+            Entry name, prefixed with the cache format version
+        """
+        return f"v{_CACHE_FORMAT}/{target_name}/{fingerprint}"
+
+    def restore(
+        self, fingerprint: str, target_name: str, install_dir: pathlib.Path, manifest_file: pathlib.Path
+    ) -> bool:
+        """
+        Restore an install tree and its manifest from the cache.
+
+        Args:
+            fingerprint: Build fingerprint of the target
+            target_name: Name of the target
+            install_dir: Install directory to restore; replaced on a hit
+            manifest_file: Path to write the target manifest to
+
+        Returns:
+            True on a cache hit
+
+        Raises:
+            ArtifactCacheError: If the entry cannot be downloaded or is corrupted
+        """
+        entry = self._entry_name(fingerprint, target_name)
+        meta_file = install_dir.with_name("artifact-cache.json")
+        archive_file = install_dir.with_name("artifact-cache.tar.zst")
+        install_dir.parent.mkdir(exist_ok=True, parents=True)
+        try:
+            if not self.backend.get(f"{entry}.json", meta_file):
+                return False
+            meta = json.loads(meta_file.read_text())
+            if not self.backend.get(f"{entry}.tar.zst", archive_file):
+                return False
+            tree_archive.unpack_tree(archive_file, install_dir, meta["digest"])
+        except (tree_archive.TreeArchiveError, json.JSONDecodeError, KeyError, OSError) as e:
+            raise ArtifactCacheError(f"Failed to restore {entry} from {self}: {e}")
+        finally:
+            meta_file.unlink(missing_ok=True)
+            archive_file.unlink(missing_ok=True)
+
+        manifest_file.parent.mkdir(exist_ok=True, parents=True)
+        manifest_file.write_text(json.dumps(meta["manifest"], indent=2))
+        return True
+
+    def store(
+        self, fingerprint: str, target_name: str, install_dir: pathlib.Path, manifest_file: pathlib.Path
+    ) -> None:
+        """
+        Store an install tree and its manifest in the cache.
+
+        Args:
+            fingerprint: Build fingerprint of the target
+            target_name: Name of the target
+            install_dir: Install directory to store
+            manifest_file: The target manifest
+
+        Raises:
+            ArtifactCacheError: If the entry cannot be uploaded
+        """
+        entry = self._entry_name(fingerprint, target_name)
+        meta_file = install_dir.with_name("artifact-cache.json")
+        archive_file = install_dir.with_name("artifact-cache.tar.zst")
+        try:
+            start = time.monotonic()
+            digest = tree_archive.pack_tree(install_dir, archive_file, exclude_names=())
+            meta = {
+                "fingerprint": fingerprint,
+                "target": target_name,
+                "digest": digest,
+                "manifest": json.loads(manifest_file.read_text()),
+            }
+            meta_file.write_text(json.dumps(meta, indent=2))
+            self.backend.put(f"{entry}.tar.zst", archive_file)
+            self.backend.put(f"{entry}.json", meta_file)
+            size = archive_file.stat().st_size
+        except OSError as e:
+            raise ArtifactCacheError(f"Failed to store {entry} in {self}: {e}")
+        finally:
+            meta_file.unlink(missing_ok=True)
+            archive_file.unlink(missing_ok=True)
+
+        print(f"Stored {target_name} in artifact cache {self} ({size / (1024 * 1024):.1f} MiB in {time.monotonic() - start:.1f}s)")
+
+
+def open_artifact_cache(location: str) -> ArtifactCache:
+    """
+    Open an artifact cache.
+
+    Args:
+        location: A directory path, or s3://bucket[/prefix] for an S3-compatible store
+            (endpoint from AWS_ENDPOINT_URL)
+
+    Returns:
+        The artifact cache
+
+    Raises:
+        ArtifactCacheConfigurationError: If the location is not valid
+    """
+    if location.startswith("s3://"):
+        bucket, _, prefix = location[len("s3://"):].partition("/")
+        if not bucket:
+            raise ArtifactCacheConfigurationError(f"No bucket in artifact cache location {location}")
+        return ArtifactCache(S3Backend(bucket, prefix))
+    return ArtifactCache(LocalBackend(pathlib.Path(location).expanduser()))
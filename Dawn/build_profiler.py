@@ -0,0 +1,409 @@
+# Copyright 2025 Adobe
+# All Rights Reserved.
+#
+# NOTICE: Adobe permits you to use, modify, and distribute this file in
+# accordance with the terms of the Adobe license agreement accompanying
+# it.
+
+import json
+import os
+import pathlib
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+
+# Number of steps listed in the slowest steps and comparison sections of a report.
+_TOP_STEPS = 25
+
+# Output path fragments that assign a build step to a category, checked in order.
+_CATEGORIES = [
+    ("third_party/", "third_party"),
+    ("src/tint/", "tint"),
+    ("src/dawn/native/", "dawn/native"),
+    ("src/dawn/", "dawn/other"),
+]
+
+_COMPILE_SUFFIXES = (".o", ".obj")
+_LINK_SUFFIXES = (".a", ".lib", ".so", ".dylib", ".dll", ".exe")
+
+
+@dataclass
+class NinjaStep:
+    """
+    A build step recorded in a .ninja_log file.
+
+    Attributes:
+        start: Start time in milliseconds since the beginning of the build
+        end: End time in milliseconds since the beginning of the build
+        outputs: Files produced by the step
+    """
+
+    start: int
+    end: int
+    outputs: List[str] = field(default_factory=list)
+
+    @property
+    def duration(self) -> int:
+        """
+        Get the duration of the step in milliseconds.
+
+        Returns:
+            Duration in milliseconds
+        """
+        return self.end - self.start
+
+    @property
+    def name(self) -> str:
+        """
+        Get the name of the step, its first output.
+
+        Returns:
+            The first output path
+        """
+        return self.outputs[0]
+
+    @property
+    def kind(self) -> str:
+        """
+        Classify the step as compile, link or other from its output.
+
+        Returns:
+            "compile", "link" or "other"
+        """
+        if self.name.endswith(_COMPILE_SUFFIXES):
+            return "compile"
+        if self.name.endswith(_LINK_SUFFIXES):
+            return "link"
+        return "other"
+
+    @property
+    def category(self) -> str:
+        """
+        Get the source area the step belongs to.
+
+        Returns:
+            One of tint, dawn/native, dawn/other, third_party or other
+        """
+        for fragment, category in _CATEGORIES:
+            if fragment in self.name:
+                return category
+        return "other"
+
+
+def read_ninja_log(log_file: pathlib.Path, offset: int = 0) -> List[NinjaStep]:
+    """
+    Read the build steps of a .ninja_log file.
+
+    Ninja appends to the log on every run and restarts its clock each time. Runs are
+    detected by the clock going backwards and laid out one after the other, so a build
+    that was interrupted and resumed reads as one continuous build. Steps producing
+    several outputs are merged.
+
+    Ninja recompacts the log from time to time, which can leave the offset past the
+    end of the file (the whole log is read then) or in the middle of a line (the
+    partial line is skipped). Lines that cannot be parsed are skipped.
+
+    Args:
+        log_file: Path to the .ninja_log file
+        offset: Byte offset to start reading at, to skip runs from earlier builds
+
+    Returns:
+        List of build steps ordered by start time
+    """
+    steps: Dict[tuple, NinjaStep] = {}
+    run_offset = 0
+    run_end = 0
+    last_end = 0
+
+    with open(log_file, "rb") as f:
+        if offset > os.fstat(f.fileno()).st_size:
+            offset = 0
+        if offset:
+            f.seek(offset - 1)
+            if f.read(1) != b"\n":
+                f.readline()
+        for raw_line in f:
+            line = raw_line.decode("utf-8", errors="replace")
+            if line.startswith("#"):
+                continue
+            fields = line.rstrip("\n").split("\t")
+            if len(fields) < 5:
+                continue
+            try:
+                start, end = int(fields[0]), int(fields[1])
+            except ValueError:
+                continue
+            output, command_hash = fields[3], fields[4]
+
+            if end < last_end:
+                # The clock went backwards: a new ninja run started
+                run_offset += run_end
+                run_end = 0
+            last_end = end
+            run_end = max(run_end, end)
+
+            key = (command_hash, run_offset + start, run_offset + end)
+            step = steps.setdefault(key, NinjaStep(run_offset + start, run_offset + end))
+            step.outputs.append(output)
+
+    return sorted(steps.values(), key=lambda step: (step.start, step.end))
+
+
+def critical_path(steps: List[NinjaStep]) -> List[NinjaStep]:
+    """
+    Estimate the critical path of a build from its step timings.
+
+    The log does not record dependencies, so the path is reconstructed backwards from
+    the last step to finish: each step's predecessor is the step that finished last
+    before it started.
+
+    Args:
+        steps: Build steps
+
+    Returns:
+        Steps on the estimated critical path, in build order
+    """
+    if not steps:
+        return []
+
+    by_end = sorted(steps, key=lambda step: (step.end, step.duration))
+    current = by_end[-1]
+    path = [current]
+    while True:
+        candidates = [step for step in by_end if step.end <= current.start and step.start < current.start]
+        if not candidates:
+            break
+        current = candidates[-1]
+        path.append(current)
+    return list(reversed(path))
+
+
+def _step_entry(step: NinjaStep) -> Dict[str, Any]:
+    """
+    Describe a step in a report.
+
+    Args:
+        step: The build step
+
+    Returns:
+        Dictionary with the output, kind, category and duration of the step
+    """
+    return {
+        "output": step.name,
+        "kind": step.kind,
+        "category": step.category,
+        "duration": round(step.duration / 1000, 3),
+    }
+
+
+def build_report(steps: List[NinjaStep], target_name: str) -> Dict[str, Any]:
+    """
+    Summarize the build steps of a target.
+
+    Args:
+        steps: Build steps from the ninja log
+        target_name: Name of the built target
+
+    Returns:
+        Report with the slowest steps, per-category and per-kind totals, effective
+        parallelism and the estimated critical path; durations are in seconds
+    """
+    wall_time = (max(step.end for step in steps) - min(step.start for step in steps)) if steps else 0
+    total_time = sum(step.duration for step in steps)
+
+    categories: Dict[str, Dict[str, float]] = defaultdict(lambda: {"steps": 0, "time": 0.0})
+    kinds: Dict[str, Dict[str, float]] = defaultdict(lambda: {"steps": 0, "time": 0.0})
+    for step in steps:
+        for totals, key in ((categories, step.category), (kinds, step.kind)):
+            totals[key]["steps"] += 1
+            totals[key]["time"] += step.duration / 1000
+    for totals in (categories, kinds):
+        for entry in totals.values():
+            entry["time"] = round(entry["time"], 3)
+
+    path = critical_path(steps)
+    return {
+        "target": target_name,
+        "steps": len(steps),
+        "wallTime": round(wall_time / 1000, 3),
+        "totalStepTime": round(total_time / 1000, 3),
+        "effectiveParallelism": round(total_time / wall_time, 2) if wall_time else 0.0,
+        "categories": dict(sorted(categories.items())),
+        "kinds": dict(sorted(kinds.items())),
+        "slowestSteps": [
+            _step_entry(step)
+            for step in sorted(steps, key=lambda step: step.duration, reverse=True)[:_TOP_STEPS]
+        ],
+        "criticalPath": {
+            "duration": round(sum(step.duration for step in path) / 1000, 3),
+            "steps": [_step_entry(step) for step in path],
+        },
+        "stepTimes": {step.name: round(step.duration / 1000, 3) for step in steps},
+    }
+
+
+def chrome_trace(steps: List[NinjaStep]) -> Dict[str, Any]:
+    """
+    Convert build steps to the Chrome trace event format (chrome://tracing, Perfetto).
+
+    Steps are packed onto as few rows as possible, which shows the parallelism of the
+    build over time.
+
+    Args:
+        steps: Build steps
+
+    Returns:
+        Trace event dictionary
+    """
+    lanes: List[int] = []
+    events = []
+    for step in steps:
+        for lane, lane_end in enumerate(lanes):
+            if lane_end <= step.start:
+                break
+        else:
+            lane = len(lanes)
+            lanes.append(0)
+        lanes[lane] = step.end
+        events.append(
+            {
+                "name": step.name,
+                "cat": f"{step.kind},{step.category}",
+                "ph": "X",
+                "ts": step.start * 1000,
+                "dur": step.duration * 1000,
+                "pid": 0,
+                "tid": lane,
+                "args": {"outputs": step.outputs},
+            }
+        )
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def profile_build(
+    build_dir: pathlib.Path, output_dir: pathlib.Path, target_name: str, offset: int = 0
+) -> Optional[pathlib.Path]:
+    """
+    Write a build report and a Chrome trace for a Ninja build.
+
+    Args:
+        build_dir: The Ninja build directory containing .ninja_log
+        output_dir: Directory to write build_profile.json and build_trace.json to
+        target_name: Name of the built target
+        offset: Byte offset in .ninja_log where the build to profile starts
+
+    Returns:
+        Path to the report, or None if the build left no ninja log
+    """
+    log_file = build_dir / ".ninja_log"
+    if not log_file.exists():
+        return None
+
+    steps = read_ninja_log(log_file, offset)
+    report = build_report(steps, target_name)
+
+    report_file = output_dir / "build_profile.json"
+    report_file.write_text(json.dumps(report, indent=2))
+    (output_dir / "build_trace.json").write_text(json.dumps(chrome_trace(steps)))
+
+    print(
+        f"Build profile for {target_name}: {report['steps']} steps in {report['wallTime']:.0f}s, "
+        f"parallelism {report['effectiveParallelism']:.1f}, "
+        f"critical path {report['criticalPath']['duration']:.0f}s"
+    )
+    return report_file
+
+
+def _percent_change(old: float, new: float) -> Optional[float]:
+    """
+    Compute the relative change between two values.
+
+    Args:
+        old: The baseline value
+        new: The new value
+
+    Returns:
+        Change in percent, or None if the baseline is zero
+    """
+    return round((new - old) / old * 100, 1) if old else None
+
+
+def compare_reports(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Diff two build reports.
+
+    Args:
+        old: The baseline report
+        new: The report to compare against the baseline
+
+    Returns:
+        Dictionary with the change of the headline numbers, of each category and of
+        the steps that changed the most
+    """
+    summary = {}
+    for key in ("wallTime", "totalStepTime", "effectiveParallelism", "steps"):
+        summary[key] = {
+            "old": old[key],
+            "new": new[key],
+            "change": _percent_change(old[key], new[key]),
+        }
+    summary["criticalPath"] = {
+        "old": old["criticalPath"]["duration"],
+        "new": new["criticalPath"]["duration"],
+        "change": _percent_change(old["criticalPath"]["duration"], new["criticalPath"]["duration"]),
+    }
+
+    categories = {}
+    for category in sorted(set(old["categories"]) | set(new["categories"])):
+        old_time = old["categories"].get(category, {}).get("time", 0.0)
+        new_time = new["categories"].get(category, {}).get("time", 0.0)
+        categories[category] = {
+            "old": old_time,
+            "new": new_time,
+            "change": _percent_change(old_time, new_time),
+        }
+
+    old_steps, new_steps = old["stepTimes"], new["stepTimes"]
+    deltas = [
+        (name, old_steps.get(name, 0.0), new_steps.get(name, 0.0))
+        for name in set(old_steps) | set(new_steps)
+    ]
+    deltas.sort(key=lambda delta: delta[2] - delta[1])
+
+    def delta_entry(delta) -> Dict[str, Any]:
+        name, old_time, new_time = delta
+        return {"output": name, "old": old_time, "new": new_time, "delta": round(new_time - old_time, 3)}
+
+    return {
+        "summary": summary,
+        "categories": categories,
+        "regressions": [delta_entry(d) for d in reversed(deltas[-_TOP_STEPS:]) if d[2] > d[1]],
+        "improvements": [delta_entry(d) for d in deltas[:_TOP_STEPS] if d[2] < d[1]],
+    }
+
+
+def format_comparison(comparison: Dict[str, Any]) -> str:
+    """
+    Format a report comparison for the console.
+
+    Args:
+        comparison: Result of compare_reports
+
+    Returns:
+        Multi-line text summary
+    """
+
+    def change(entry: Dict[str, Any]) -> str:
+        return "n/a" if entry["change"] is None else f"{entry['change']:+.1f}%"
+
+    lines = ["Build profile comparison (old -> new):"]
+    for key, entry in comparison["summary"].items():
+        lines.append(f"  {key:22} {entry['old']:>10} -> {entry['new']:>10}  {change(entry)}")
+    lines.append("Time per category (s):")
+    for category, entry in comparison["categories"].items():
+        lines.append(f"  {category:22} {entry['old']:>10} -> {entry['new']:>10}  {change(entry)}")
+    lines.append("Largest regressions (s):")
+    for entry in comparison["regressions"][:10]:
+        lines.append(f"  {entry['delta']:+8.2f}  {entry['output']}")
+    return "\n".join(lines)
@@ -0,0 +1,359 @@
+# Copyright 2025 Adobe
+# All Rights Reserved.
+#
+# NOTICE: Adobe permits you to use, modify, and distribute this file in
+# accordance with the terms of the Adobe license agreement accompanying
+# it.
+
+import contextlib
+import json
+import pathlib
+import sqlite3
+import time
+import dawn_builder
+import dawn_source
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+# Version of the registry schema, stored as the user_version of the database.
+_SCHEMA_VERSION = 1
+
+# Seconds to wait for a lock held by another build writing to the registry.
+_LOCK_TIMEOUT = 30
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS builds (
+    id INTEGER PRIMARY KEY,
+    recorded_at REAL NOT NULL,
+    dawn_hash TEXT,
+    chromium_version TEXT,
+    target TEXT NOT NULL,
+    config TEXT NOT NULL,
+    fingerprint TEXT,
+    configured INTEGER NOT NULL,
+    built INTEGER NOT NULL,
+    restored INTEGER NOT NULL,
+    seconds REAL NOT NULL,
+    library_size INTEGER,
+    toolchain TEXT,
+    compiler_cache TEXT,
+    manifest TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS builds_by_version ON builds (dawn_hash, target, config);
+CREATE TABLE IF NOT EXISTS bundles (
+    id INTEGER PRIMARY KEY,
+    recorded_at REAL NOT NULL,
+    dawn_hash TEXT NOT NULL,
+    chromium_version TEXT NOT NULL,
+    bundle_name TEXT NOT NULL,
+    file_name TEXT NOT NULL,
+    checksum TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    uncompressed_size INTEGER NOT NULL,
+    seconds REAL NOT NULL,
+    reused INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS bundles_by_version ON bundles (dawn_hash, file_name);
+"""
+
+
+# fmt: off
+class BuildRegistryError(Exception): pass
+# fmt: on
+
+
+def registry_file() -> pathlib.Path:
+    """
+    Get the path of the default build registry, in the Dawn cache directory.
+
+    Returns:
+        Path to the registry database
+    """
+    return dawn_source.get_cache_path() / "build_registry.sqlite3"
+
+
+def _source_version() -> Tuple[Optional[str], Optional[str]]:
+    """
+    Get the Dawn hash and Chromium version of the Dawn source being built.
+
+    The hash is read from the source directory. CI build runners only fetch the
+    source, so the Chromium version comes from dawn_version.json if get-dawn-version
+    wrote it for the same hash.
+
+    Returns:
+        Tuple of the Dawn hash and the Chromium version, each None if unknown
+    """
+    dawn_hash = dawn_source.get_source_hash(dawn_source.get_dawn_path())
+    try:
+        version = dawn_source.get_version()
+    except (OSError, ValueError):
+        return dawn_hash, None
+    if dawn_hash and version.get("chromium_dawn_hash") != dawn_hash:
+        return dawn_hash, None
+    return dawn_hash or version.get("chromium_dawn_hash"), version.get("chromium_dawn_version")
+
+
+class BuildRegistry:
+    """
+    History of the builds and bundles made on this machine, in a SQLite database.
+
+    Builds are indexed by Dawn hash, target and config and keep the duration, library
+    size, toolchain, compiler cache statistics and full manifest of every build.
+    Every operation opens its own connection, so targets built on concurrent threads
+    (or processes) can record their results at the same time.
+    """
+
+    def __init__(self, path: pathlib.Path) -> None:
+        self.path = path
+
+    def __str__(self) -> str:
+        return str(self.path)
+
+    @contextlib.contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """
+        Open the database, creating or upgrading its schema.
+
+        Yields:
+            Connection committed when the block completes without an exception
+
+        Raises:
+            BuildRegistryError: If the database cannot be opened or the operation fails
+        """
+        try:
+            self.path.parent.mkdir(exist_ok=True, parents=True)
+            connection = sqlite3.connect(self.path, timeout=_LOCK_TIMEOUT)
+        except (OSError, sqlite3.Error) as e:
+            raise BuildRegistryError(f"Cannot open build registry {self.path}: {e}")
+        try:
+            connection.row_factory = sqlite3.Row
+            with connection:
+                version = connection.execute("PRAGMA user_version").fetchone()[0]
+                if version > _SCHEMA_VERSION:
+                    raise BuildRegistryError(f"Build registry {self.path} has schema {version}, newer than {_SCHEMA_VERSION}")
+                if version < _SCHEMA_VERSION:
+                    connection.executescript(_SCHEMA)
+                    connection.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+            with connection:
+                yield connection
+        except sqlite3.Error as e:
+            raise BuildRegistryError(f"Build registry {self.path} failed: {e}")
+        finally:
+            connection.close()
+
+    def record_build(self, manifest: Dict[str, Any], result: dawn_builder.BuildResult) -> None:
+        """
+        Record a target build.
+
+        The Dawn hash is taken from the Dawn source directory, the Chromium version from
+        dawn_version.json when it describes the same hash.
+
+        Args:
+            manifest: Target manifest written for the build
+            result: Result of the build
+
+        Raises:
+            BuildRegistryError: If the build cannot be recorded
+        """
+        dawn_hash, chromium_version = _source_version()
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT INTO builds (recorded_at, dawn_hash, chromium_version, target, config, fingerprint, configured, built, "
+                "restored, seconds, library_size, toolchain, compiler_cache, manifest) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    time.time(),
+                    dawn_hash,
+                    chromium_version,
+                    manifest["targetName"],
+                    manifest.get("config", "release"),
+                    result.fingerprint,
+                    result.configured,
+                    result.built,
+                    result.restored,
+                    result.elapsed,
+                    (manifest.get("libraryStats") or {}).get("size"),
+                    json.dumps(manifest.get("toolchain"), sort_keys=True),
+                    json.dumps(manifest.get("compilerCache"), sort_keys=True),
+                    json.dumps(manifest, sort_keys=True),
+                ),
+            )
+
+    def record_bundles(self, archives: List[Dict[str, Any]], chromium_version: str, dawn_hash: str, bundle_name: str) -> None:
+        """
+        Record the archives written by the bundle step.
+
+        Args:
+            archives: Compression reports of the archives (see BundleArchive.report) with
+                their checksums
+            chromium_version: Chromium version string
+            dawn_hash: Dawn hash string
+            bundle_name: Base name of the bundles
+
+        Raises:
+            BuildRegistryError: If the bundles cannot be recorded
+        """
+        recorded_at = time.time()
+        with self._connect() as connection:
+            connection.executemany(
+                "INSERT INTO bundles (recorded_at, dawn_hash, chromium_version, bundle_name, file_name, checksum, size, "
+                "uncompressed_size, seconds, reused) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        recorded_at,
+                        dawn_hash,
+                        chromium_version,
+                        bundle_name,
+                        archive["fileName"],
+                        archive["checksum"],
+                        archive["size"],
+                        archive["uncompressedSize"],
+                        archive["seconds"],
+                        archive["reused"],
+                    )
+                    for archive in archives
+                ],
+            )
+
+    def build_history(
+        self, target: Optional[str] = None, config: Optional[str] = None, dawn_hash: Optional[str] = None, limit: int = 50
+    ) -> List[Dict[str, Any]]:
+        """
+        Get the most recent builds, oldest first.
+
+        Args:
+            target: Only return builds of targets whose name contains this string
+            config: Only return builds of this config
+            dawn_hash: Only return builds of Dawn hashes starting with this string
+            limit: Maximum number of builds
+
+        Returns:
+            Dictionaries with the columns of the builds except the manifest, with the
+            toolchain and compiler cache statistics decoded
+
+        Raises:
+            BuildRegistryError: If the registry cannot be read
+        """
+        conditions = []
+        parameters: List[Any] = []
+        if target:
+            conditions.append("instr(target, ?) > 0")
+            parameters.append(target)
+        if config:
+            conditions.append("config = ?")
+            parameters.append(config)
+        if dawn_hash:
+            conditions.append("dawn_hash LIKE ? || '%'")
+            parameters.append(dawn_hash)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self._connect() as connection:
+            rows = connection.execute(
+                "SELECT id, recorded_at, dawn_hash, chromium_version, target, config, fingerprint, configured, built, restored, "
+                f"seconds, library_size, toolchain, compiler_cache FROM builds {where} ORDER BY id DESC LIMIT ?",
+                (*parameters, limit),
+            ).fetchall()
+        builds = []
+        for row in reversed(rows):
+            build = dict(row)
+            build["toolchain"] = json.loads(build["toolchain"])
+            build["compiler_cache"] = json.loads(build["compiler_cache"])
+            builds.append(build)
+        return builds
+
+    def bundle_history(self, file_name: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Get the most recently written bundles, oldest first.
+
+        Args:
+            file_name: Only return archives whose file name contains this string
+            limit: Maximum number of archives
+
+        Returns:
+            Dictionaries with the columns of the bundles
+
+        Raises:
+            BuildRegistryError: If the registry cannot be read
+        """
+        where = "WHERE instr(file_name, ?) > 0" if file_name else ""
+        with self._connect() as connection:
+            rows = connection.execute(
+                f"SELECT * FROM bundles {where} ORDER BY id DESC LIMIT ?",
+                (file_name, limit) if file_name else (limit,),
+            ).fetchall()
+        return [dict(row) for row in reversed(rows)]
+
+
+def _change(previous: Optional[float], current: Optional[float]) -> str:
+    """
+    Format the relative change between two values.
+
+    Args:
+        previous: Earlier value
+        current: Later value
+
+    Returns:
+        Signed percentage, or an empty string if there is no earlier value to compare with
+    """
+    if not previous or current is None:
+        return ""
+    return f"{(current - previous) / previous * 100:+.1f}%"
+
+
+def format_build_history(builds: List[Dict[str, Any]]) -> str:
+    """
+    Format builds as a table, with the change of build time and library size since the
+    previous build of the same target and config.
+
+    Args:
+        builds: Builds from BuildRegistry.build_history
+
+    Returns:
+        The formatted table
+    """
+    lines = [
+        f"{'date':<16}  {'target':<32} {'config':<11} {'chromium':<16} {'dawn':<12} "
+        f"{'time':>8} {'change':>8} {'library':>10} {'change':>8}  how"
+    ]
+    previous: Dict[Any, Dict[str, Any]] = {}
+    for build in builds:
+        key = (build["target"], build["config"])
+        last = previous.get(key)
+        how = "restored" if build["restored"] else "built" if build["built"] else "up to date"
+        # Only compare build times of builds that compiled something
+        time_change = _change(last["seconds"], build["seconds"]) if last and build["built"] and last["built"] else ""
+        size = f"{build['library_size'] / (1024 * 1024):.1f} MiB" if build["library_size"] is not None else "-"
+        lines.append(
+            f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(build['recorded_at'])):<16}  {build['target']:<32} "
+            f"{build['config']:<11} {build['chromium_version'] or '-':<16} {(build['dawn_hash'] or '-')[:12]:<12} "
+            f"{build['seconds']:>7.0f}s {time_change:>8} {size:>10} "
+            f"{_change(last['library_size'], build['library_size']) if last else '':>8}  {how}"
+        )
+        previous[key] = build
+    return "\n".join(lines)
+
+
+def format_bundle_history(bundles: List[Dict[str, Any]]) -> str:
+    """
+    Format bundles as a table, with the change of size since the previous bundle of the
+    same platform.
+
+    Args:
+        bundles: Bundles from BuildRegistry.bundle_history
+
+    Returns:
+        The formatted table
+    """
+    lines = [f"{'date':<16}  {'chromium':<16} {'dawn':<12} {'size':>10} {'change':>8} {'time':>7}  archive"]
+    previous: Dict[str, Dict[str, Any]] = {}
+    for bundle in bundles:
+        # Bundle names contain the version, the platform suffix identifies the series
+        platform = bundle["file_name"][len(bundle["bundle_name"]):]
+        last = previous.get(platform)
+        lines.append(
+            f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(bundle['recorded_at'])):<16}  "
+            f"{bundle['chromium_version']:<16} {bundle['dawn_hash'][:12]:<12} "
+            f"{bundle['size'] / (1024 * 1024):>6.1f} MiB {_change(last['size'], bundle['size']) if last else '':>8} "
+            f"{bundle['seconds']:>6.1f}s  {bundle['file_name']}{' (up to date)' if bundle['reused'] else ''}"
+        )
+        previous[platform] = bundle
+    return "\n".join(lines)
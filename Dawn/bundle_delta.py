@@ -0,0 +1,455 @@
+# Copyright 2025 Adobe
+# All Rights Reserved.
+#
+# NOTICE: Adobe permits you to use, modify, and distribute this file in
+# accordance with the terms of the Adobe license agreement accompanying
+# it.
+
+import bundle_verify
+import hashlib
+import json
+import pathlib
+import stat
+import tempfile
+import zipfile
+import zip_stream
+from dataclasses import asdict, dataclass
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+
+# Version of the delta format, recorded in every delta.
+DELTA_FORMAT = 2
+
+# Name of the description of a delta inside the delta archive.
+_DELTA_JSON = "delta.json"
+
+_AR_MAGIC = b"!<arch>\n"
+_AR_HEADER_SIZE = 60
+
+# Size of the slices copied from the previous bundle.
+_COPY_SIZE = 1024 * 1024
+
+
+# fmt: off
+class BundleDeltaError(Exception): pass
+# fmt: on
+
+
+@dataclass
+class LibraryDeltaStats:
+    """
+    Member-level statistics of the delta of a static library.
+
+    Attributes:
+        name: Name of the library in the bundle
+        members: Number of archive members in the new library
+        reused_members: Number of members taken from the previous bundle
+        size: Size of the new library
+        new_bytes: Bytes of the library that are carried by the delta
+    """
+
+    name: str
+    members: int = 0
+    reused_members: int = 0
+    size: int = 0
+    new_bytes: int = 0
+
+
+def delta_name(bundle_file_name: str) -> str:
+    """
+    Get the file name of the delta that rebuilds a bundle.
+
+    Args:
+        bundle_file_name: File name of the bundle zip
+
+    Returns:
+        File name of the delta
+    """
+    return f"{bundle_file_name.removesuffix('.zip')}.delta.zip"
+
+
+def _ar_members(f: BinaryIO) -> Iterator[Tuple[int, bytes, bytes]]:
+    """
+    Read the members of an ar archive (static library) sequentially.
+
+    Works for the GNU, BSD and MSVC variants of the format, since member names and
+    symbol tables are treated as opaque data.
+
+    Args:
+        f: Stream positioned after the ar magic
+
+    Yields:
+        Tuples of the offset of the member in the archive, its header and its data
+        including the padding byte
+    """
+    offset = len(_AR_MAGIC)
+    while True:
+        header = f.read(_AR_HEADER_SIZE)
+        if not header:
+            return
+        if len(header) != _AR_HEADER_SIZE or header[58:60] != b"`\n":
+            raise BundleDeltaError(f"Malformed ar member header at offset {offset}")
+        size = int(header[48:58].decode("ascii").strip())
+        data = f.read(size + size % 2)
+        yield offset, header, data
+        offset += _AR_HEADER_SIZE + len(data)
+
+
+def _entry_digest(archive: zipfile.ZipFile, name: str) -> str:
+    """
+    Compute the SHA-256 digest of the content of a zip entry.
+
+    Args:
+        archive: The zip archive
+        name: Name of the entry
+
+    Returns:
+        Hex-encoded digest
+    """
+    sha256 = hashlib.sha256()
+    with archive.open(name) as f:
+        for chunk in iter(lambda: f.read(_COPY_SIZE), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def _is_ar(archive: zipfile.ZipFile, name: str) -> bool:
+    """
+    Check whether a zip entry is an ar archive (a static library).
+
+    Args:
+        archive: The zip archive
+        name: Name of the entry
+
+    Returns:
+        True if the entry starts with the ar magic
+    """
+    with archive.open(name) as f:
+        return f.read(len(_AR_MAGIC)) == _AR_MAGIC
+
+
+class _PreviousContent:
+    """
+    Index of the content of the previous bundle: whole files, ar members and ar
+    member data by digest, pointing at (entry name, offset, size).
+    """
+
+    def __init__(self, archive: zipfile.ZipFile) -> None:
+        self.blocks: Dict[str, Tuple[str, int, int]] = {}
+        for info in archive.infolist():
+            if info.is_dir():
+                continue
+            self.blocks.setdefault(_entry_digest(archive, info.filename), (info.filename, 0, info.file_size))
+            if not _is_ar(archive, info.filename):
+                continue
+            with archive.open(info.filename) as f:
+                f.read(len(_AR_MAGIC))
+                for offset, header, data in _ar_members(f):
+                    member = hashlib.sha256(header + data).hexdigest()
+                    self.blocks.setdefault(member, (info.filename, offset, _AR_HEADER_SIZE + len(data)))
+                    self.blocks.setdefault(
+                        hashlib.sha256(data).hexdigest(), (info.filename, offset + _AR_HEADER_SIZE, len(data))
+                    )
+
+    def find(self, data: bytes) -> Optional[Tuple[str, int, int]]:
+        """
+        Find bytes in the previous bundle.
+
+        Args:
+            data: Content of a file, ar member or ar member data
+
+        Returns:
+            Tuple of the entry name, offset and size of the same content in the previous
+            bundle, or None if it is not there
+        """
+        return self.blocks.get(hashlib.sha256(data).hexdigest())
+
+
+class _PartsBuilder:
+    """
+    Builds the list of parts of an entry, appending literal bytes to a payload file
+    and merging adjacent parts.
+    """
+
+    def __init__(self, payload: BinaryIO) -> None:
+        self.payload = payload
+        self.parts: List[List[Any]] = []
+        self.new_bytes = 0
+
+    def literal(self, data: bytes) -> None:
+        """
+        Append bytes carried by the delta.
+
+        Args:
+            data: Bytes to write to the payload
+        """
+        if not data:
+            return
+        self.payload.write(data)
+        self.new_bytes += len(data)
+        if self.parts and self.parts[-1][0] == "data":
+            self.parts[-1][1] += len(data)
+        else:
+            self.parts.append(["data", len(data)])
+
+    def base(self, name: str, offset: int, size: int) -> None:
+        """
+        Append a range of an entry of the previous bundle.
+
+        Args:
+            name: Name of the entry in the previous bundle
+            offset: Offset of the range in the entry
+            size: Size of the range
+        """
+        last = self.parts[-1] if self.parts else None
+        if last and last[0] == "base" and last[1] == name and last[2] + last[3] == offset:
+            last[3] += size
+        else:
+            self.parts.append(["base", name, offset, size])
+
+
+def create_bundle_delta(
+    previous_bundle: pathlib.Path, bundle: pathlib.Path, delta_file: pathlib.Path, level: int
+) -> List[LibraryDeltaStats]:
+    """
+    Create a delta that rebuilds a bundle from the previous bundle of the platform.
+
+    Every file of the new bundle is described as parts: ranges of files of the
+    previous bundle and literal bytes carried by the delta. Static libraries are
+    compared member by member, so only the object files (and symbol tables) that
+    changed are carried; other files are reused when their content is unchanged.
+    The delta is a zip with delta.json and one payload file per entry that is not
+    fully reused. The delta is checked by rebuilding the bundle from it, which must
+    give the exact bytes of the bundle on the machine that wrote it.
+
+    There is one delta per platform bundle rather than per variant: the bundle zip
+    is what the index checksums and what gets rebuilt, and it holds the libraries of
+    all variants. The member statistics are kept per variant library.
+
+    Args:
+        previous_bundle: The previous bundle zip
+        bundle: The new bundle zip, written by the bundle command
+        delta_file: Path to write the delta to
+        level: zlib compression level the new bundle was written with
+
+    Returns:
+        LibraryDeltaStats of every static library of the new bundle
+
+    Raises:
+        BundleDeltaError: If the bundles cannot be read or the delta does not rebuild
+            the bundle
+    """
+    library_stats = []
+    try:
+        with zipfile.ZipFile(previous_bundle) as previous_archive, zipfile.ZipFile(bundle) as archive:
+            previous = _PreviousContent(previous_archive)
+            infos = archive.infolist()
+            date_time = next((info.date_time for info in infos), zip_stream.reproducible_date_time())
+
+            entries: List[Dict[str, Any]] = []
+            with tempfile.TemporaryDirectory() as temp_dir:
+                payloads: List[Tuple[pathlib.Path, str]] = []
+                for index, info in enumerate(infos):
+                    mode = stat.S_IMODE(info.external_attr >> 16)
+                    if info.is_dir():
+                        entries.append({"name": info.filename, "type": "directory", "mode": mode})
+                        continue
+
+                    payload_file = pathlib.Path(temp_dir) / str(index)
+                    digest = _entry_digest(archive, info.filename)
+                    with open(payload_file, "wb") as payload:
+                        parts = _PartsBuilder(payload)
+                        whole = previous.blocks.get(digest)
+                        if whole:
+                            parts.base(*whole)
+                        elif _is_ar(archive, info.filename):
+                            stats = LibraryDeltaStats(info.filename, size=info.file_size)
+                            parts.literal(_AR_MAGIC)
+                            with archive.open(info.filename) as f:
+                                f.read(len(_AR_MAGIC))
+                                for _, header, data in _ar_members(f):
+                                    stats.members += 1
+                                    member = previous.find(header + data)
+                                    if member:
+                                        parts.base(*member)
+                                        stats.reused_members += 1
+                                        continue
+                                    parts.literal(header)
+                                    data_part = previous.find(data)
+                                    if data_part:
+                                        parts.base(*data_part)
+                                        stats.reused_members += 1
+                                    else:
+                                        parts.literal(data)
+                            stats.new_bytes = parts.new_bytes
+                            library_stats.append(stats)
+                        else:
+                            with archive.open(info.filename) as f:
+                                for chunk in iter(lambda: f.read(_COPY_SIZE), b""):
+                                    parts.literal(chunk)
+
+                    entry = {
+                        "name": info.filename,
+                        "type": "file",
+                        "mode": mode,
+                        "size": info.file_size,
+                        "crc": info.CRC,
+                        "sha256": digest,
+                        "parts": parts.parts,
+                    }
+                    if parts.new_bytes:
+                        entry["payload"] = f"payload/{index}"
+                        payloads.append((payload_file, entry["payload"]))
+                    entries.append(entry)
+
+                delta = {
+                    "format": DELTA_FORMAT,
+                    "base": {"fileName": previous_bundle.name, "checksum": bundle_verify.sha256_file(previous_bundle)},
+                    "target": {"fileName": bundle.name, "checksum": bundle_verify.sha256_file(bundle)},
+                    "level": level,
+                    "dateTime": list(date_time),
+                    "entries": entries,
+                    "libraries": [asdict(stats) for stats in library_stats],
+                }
+
+                delta_file.parent.mkdir(exist_ok=True, parents=True)
+                with open(delta_file, "wb") as f:
+                    writer = zip_stream.ZipStreamWriter(f, reproducible=True)
+                    writer.add_bytes(_DELTA_JSON, json.dumps(delta, indent=2, sort_keys=True).encode("utf-8"))
+                    for payload_file, arc_name in payloads:
+                        writer.add_path(payload_file, arc_name)
+                    writer.close()
+    except (zipfile.BadZipFile, OSError, ValueError) as e:
+        raise BundleDeltaError(f"Failed to create a delta from {previous_bundle} to {bundle}: {e}")
+
+    # Make sure the delta rebuilds the bundle exactly with the zlib that wrote it
+    with tempfile.TemporaryDirectory() as temp_dir:
+        try:
+            apply_bundle_delta(previous_bundle, delta_file, pathlib.Path(temp_dir), require_identical=True)
+        except BundleDeltaError as e:
+            delta_file.unlink(missing_ok=True)
+            raise BundleDeltaError(f"{e} (was the bundle written with a different compression profile?)")
+
+    return library_stats
+
+
+def apply_bundle_delta(
+    previous_bundle: pathlib.Path, delta_file: pathlib.Path, output_dir: pathlib.Path, require_identical: bool = False
+) -> pathlib.Path:
+    """
+    Rebuild a bundle from the previous bundle of the platform and a delta.
+
+    The previous bundle is checked against the checksum recorded in the delta, the
+    parts of every file are assembled from the previous bundle and the payloads of
+    the delta, and every file of the rebuilt zip is checked against the SHA-256 and
+    CRC-32 of the bundle. The file contents are recompressed with the local zlib;
+    zlib builds such as zlib-ng or Apple's produce different deflate bytes at the
+    same level, so the rebuilt zip only has the checksum of the bundle (and of its
+    index entry) when the local zlib matches the one that wrote the bundle.
+
+    Args:
+        previous_bundle: The previous bundle zip the delta was created from
+        delta_file: The delta
+        output_dir: Directory to write the rebuilt bundle to
+        require_identical: Whether the rebuilt zip must also match the checksum of
+            the bundle
+
+    Returns:
+        Path to the rebuilt bundle
+
+    Raises:
+        BundleDeltaError: If the delta does not apply to the previous bundle, a
+            rebuilt file does not match, or the rebuilt zip does not match the
+            checksum of the bundle when required
+    """
+    try:
+        with zipfile.ZipFile(delta_file) as delta_archive:
+            delta = json.loads(delta_archive.read(_DELTA_JSON))
+            if delta.get("format") != DELTA_FORMAT:
+                raise BundleDeltaError(f"Unsupported delta format {delta.get('format')} in {delta_file}")
+            if bundle_verify.sha256_file(previous_bundle) != delta["base"]["checksum"]:
+                raise BundleDeltaError(f"{delta_file} does not apply to {previous_bundle}: checksum mismatch")
+
+            output_dir.mkdir(exist_ok=True, parents=True)
+            bundle = output_dir / delta["target"]["fileName"]
+            with zipfile.ZipFile(previous_bundle) as previous_archive, tempfile.TemporaryDirectory() as temp_dir:
+                # Extract the files of the previous bundle the delta refers to, so they can be read at any offset
+                extracted: Dict[str, pathlib.Path] = {}
+                for entry in delta["entries"]:
+                    for part in entry.get("parts", []):
+                        if part[0] == "base" and part[1] not in extracted:
+                            extracted[part[1]] = pathlib.Path(temp_dir) / str(len(extracted))
+                            with previous_archive.open(part[1]) as src, open(extracted[part[1]], "wb") as dst:
+                                for chunk in iter(lambda: src.read(_COPY_SIZE), b""):
+                                    dst.write(chunk)
+
+                digests: Dict[str, str] = {}
+
+                def content(entry: Dict[str, Any]) -> Iterator[bytes]:
+                    payload = delta_archive.open(entry["payload"]) if "payload" in entry else None
+                    sha256 = hashlib.sha256()
+                    try:
+                        for part in entry["parts"]:
+                            if part[0] == "data":
+                                remaining = part[1]
+                                while remaining:
+                                    chunk = payload.read(min(remaining, _COPY_SIZE))
+                                    if not chunk:
+                                        raise BundleDeltaError(f"Truncated payload for {entry['name']}")
+                                    remaining -= len(chunk)
+                                    sha256.update(chunk)
+                                    yield chunk
+                            else:
+                                _, name, offset, size = part
+                                with open(extracted[name], "rb") as f:
+                                    f.seek(offset)
+                                    while size:
+                                        chunk = f.read(min(size, _COPY_SIZE))
+                                        if not chunk:
+                                            raise BundleDeltaError(f"{name} of {previous_bundle} is too short")
+                                        size -= len(chunk)
+                                        sha256.update(chunk)
+                                        yield chunk
+                        digests[entry["name"]] = sha256.hexdigest()
+                    finally:
+                        if payload:
+                            payload.close()
+
+                with open(bundle, "wb") as f:
+                    writer = zip_stream.ZipStreamWriter(
+                        f, level=delta["level"], reproducible=True, date_time=tuple(delta["dateTime"])
+                    )
+                    for entry in delta["entries"]:
+                        if entry["type"] == "directory":
+                            writer.add_directory(entry["name"], mode=entry["mode"])
+                        else:
+                            writer.add_chunks(entry["name"], content(entry), entry["size"], mode=entry["mode"])
+                    result = writer.close()
+
+            with zipfile.ZipFile(bundle) as rebuilt:
+                crcs = {info.filename: info.CRC for info in rebuilt.infolist()}
+                damaged = rebuilt.testzip()
+    except (zipfile.BadZipFile, OSError, ValueError, KeyError) as e:
+        raise BundleDeltaError(f"Failed to apply {delta_file} to {previous_bundle}: {e}")
+
+    mismatched = [
+        entry["name"]
+        for entry in delta["entries"]
+        if entry["type"] == "file"
+        and (digests.get(entry["name"]) != entry["sha256"] or crcs.get(entry["name"]) != entry["crc"])
+    ]
+    if damaged or mismatched:
+        bundle.unlink(missing_ok=True)
+        raise BundleDeltaError(f"Rebuilt {delta['target']['fileName']} does not match the bundle: {damaged or ', '.join(mismatched)}")
+
+    if result.sha256 != delta["target"]["checksum"]:
+        if require_identical:
+            bundle.unlink(missing_ok=True)
+            raise BundleDeltaError(
+                f"Rebuilt {delta['target']['fileName']} has checksum {result.sha256}, expected {delta['target']['checksum']}"
+            )
+        print(
+            f"The contents of {bundle} are verified, but the local zlib compressed them differently: its checksum "
+            f"{result.sha256} differs from the published {delta['target']['checksum']}"
+        )
+    return bundle
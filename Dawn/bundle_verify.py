@@ -0,0 +1,192 @@
+# Copyright 2025 Adobe
+# All Rights Reserved.
+#
+# NOTICE: Adobe permits you to use, modify, and distribute this file in
+# accordance with the terms of the Adobe license agreement accompanying
+# it.
+
+import concurrent.futures
+import hashlib
+import json
+import mmap
+import os
+import pathlib
+import time
+import zipfile
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+
+# Size of the slices of a mapped file passed to the hash at a time.
+_HASH_SLICE_SIZE = 8 * 1024 * 1024
+
+_MB = 1000 * 1000
+
+
+# fmt: off
+class BundleVerificationError(Exception): pass
+# fmt: on
+
+
+@dataclass
+class ArchiveVerification:
+    """
+    Outcome of verifying one archive of a bundle index.
+
+    Attributes:
+        file_name: File name of the archive in the index
+        size: Size of the archive in bytes
+        seconds: Time spent hashing the archive
+        problems: Problems found, empty if the archive is valid
+    """
+
+    file_name: str
+    size: int = 0
+    seconds: float = 0.0
+    problems: List[str] = field(default_factory=list)
+
+
+def sha256_file(path: pathlib.Path) -> str:
+    """
+    Compute the SHA-256 digest of a file through a read-only memory mapping.
+
+    The mapped file is hashed in large slices without copying it into Python
+    buffers; hashlib releases the GIL while hashing, so several files can be hashed
+    in parallel on threads.
+
+    Args:
+        path: Path of the file
+
+    Returns:
+        Hex-encoded SHA-256 digest
+    """
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return sha256.hexdigest()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped)
+            try:
+                for offset in range(0, len(view), _HASH_SLICE_SIZE):
+                    sha256.update(view[offset : offset + _HASH_SLICE_SIZE])
+            finally:
+                view.release()
+    return sha256.hexdigest()
+
+
+def _check_bundle_contents(archive_path: pathlib.Path) -> List[str]:
+    """
+    Check that the paths named by the info.json of a bundle exist in the bundle.
+
+    Only the central directory of the zip and info.json are read; nothing is
+    extracted.
+
+    Args:
+        archive_path: Path of the artifact bundle zip
+
+    Returns:
+        Problems found, empty if every variant path and header path is present
+    """
+    try:
+        with zipfile.ZipFile(archive_path) as archive:
+            names = set(archive.namelist())
+            info_names = [name for name in names if name.count("/") == 1 and name.endswith(".artifactbundle/info.json")]
+            if len(info_names) != 1:
+                return ["no <name>.artifactbundle/info.json at the top of the archive"]
+            bundle_dir = info_names[0].rsplit("/", 1)[0]
+            info = json.loads(archive.read(info_names[0]))
+    except (zipfile.BadZipFile, OSError, ValueError) as e:
+        return [f"cannot read the archive: {e}"]
+
+    problems = []
+    for artifact_name, artifact in sorted(info.get("artifacts", {}).items()):
+        for variant in artifact.get("variants", []):
+            path = f"{bundle_dir}/{variant['path']}"
+            if path not in names:
+                problems.append(f"{artifact_name}: {variant['path']} is missing")
+            for header_path in variant.get("staticLibraryMetadata", {}).get("headerPaths", []):
+                prefix = f"{bundle_dir}/{header_path.rstrip('/')}/"
+                if not any(name.startswith(prefix) for name in names):
+                    problems.append(f"{artifact_name}: header path {header_path} is missing")
+    return problems
+
+
+def _verify_archive(archive_path: pathlib.Path, entry: Dict[str, Any]) -> ArchiveVerification:
+    """
+    Verify the checksum and contents of one archive of a bundle index.
+
+    Args:
+        archive_path: Path of the archive
+        entry: Entry of the archive in the index
+
+    Returns:
+        ArchiveVerification of the archive
+    """
+    result = ArchiveVerification(entry["fileName"])
+    if not archive_path.is_file():
+        result.problems.append("archive not found")
+        return result
+
+    start = time.monotonic()
+    checksum = sha256_file(archive_path)
+    result.seconds = time.monotonic() - start
+    result.size = archive_path.stat().st_size
+
+    if checksum != entry["checksum"]:
+        result.problems.append(f"checksum {checksum} does not match the index ({entry['checksum']})")
+        # The contents of an archive that does not match its checksum are irrelevant
+        return result
+    result.problems.extend(_check_bundle_contents(archive_path))
+    return result
+
+
+def verify_bundle_index(index_file: pathlib.Path, jobs: Optional[int] = None) -> List[ArchiveVerification]:
+    """
+    Verify the archives referenced by an .artifactbundleindex.
+
+    Every archive is expected next to the index. The archives are hashed in
+    parallel and compared with the checksums of the index, and the variant paths of
+    their info.json are checked against their central directories. Per-archive and
+    total hashing throughput are printed.
+
+    Args:
+        index_file: Path of the .artifactbundleindex
+        jobs: Number of archives hashed at the same time, the number of CPU cores by
+            default
+
+    Returns:
+        ArchiveVerification of every archive, in index order
+
+    Raises:
+        BundleVerificationError: If the index cannot be read or any archive is invalid
+    """
+    try:
+        entries = json.loads(index_file.read_text())["archives"]
+    except (OSError, ValueError, KeyError) as e:
+        raise BundleVerificationError(f"Cannot read bundle index {index_file}: {e}")
+
+    start = time.monotonic()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=jobs or os.cpu_count() or 1) as executor:
+        results = list(
+            executor.map(lambda entry: _verify_archive(index_file.parent / entry["fileName"], entry), entries)
+        )
+    elapsed = time.monotonic() - start
+
+    for result in results:
+        status = "OK" if not result.problems else "FAILED"
+        if result.seconds:
+            throughput = result.size / _MB / result.seconds
+            print(f"{result.file_name}: {status} ({result.size / _MB:.1f} MB hashed at {throughput:.0f} MB/s)")
+        else:
+            print(f"{result.file_name}: {status}")
+        for problem in result.problems:
+            print(f"  {problem}")
+
+    total_size = sum(result.size for result in results)
+    total_throughput = total_size / _MB / elapsed if elapsed else 0.0
+    print(f"Verified {len(results)} archives, {total_size / _MB:.1f} MB in {elapsed:.2f}s ({total_throughput:.0f} MB/s)")
+
+    failed = [result.file_name for result in results if result.problems]
+    if failed:
+        raise BundleVerificationError(f"Verification of {index_file} failed for {', '.join(failed)}")
+    return results
@@ -8,17 +8,104 @@
 # it.
 
 from ci_targets import ci_target
+from dawn_builder import BUILD_CONFIGS, DAWN_BACKENDS, DAWN_COMPONENTS, BuildDawnError, FeatureSet, TargetConfig
 import archive_builder
 import argparse
+import artifact_cache
+import os
+import build_profiler
+import build_registry
+import bundle_delta
+import bundle_verify
+import dataclasses
 import dawn_source
 import json
+import pathlib
 import platform
+import toolchain
+from typing import Optional
 
 _EXIT_FAILURE = 1
 _EXIT_SUCCESS = 0
 
 
-def build_target(target: str, archs: list[str], config: str = "release") -> None:
+def with_compiler_cache(target_config: TargetConfig, args: argparse.Namespace) -> TargetConfig:
+    """
+    Apply the compiler cache command line options to a target configuration.
+
+    Args:
+        target_config: The target configuration
+        args: Parsed command line arguments
+
+    Returns:
+        The target configuration with the compiler cache settings
+    """
+    return dataclasses.replace(
+        target_config,
+        compiler_cache=args.compiler_cache,
+        compiler_cache_dir=args.compiler_cache_dir,
+        compiler_cache_max_size=args.compiler_cache_max_size,
+    )
+
+
+def open_artifact_cache(args: Optional[argparse.Namespace]) -> Optional[artifact_cache.ArtifactCache]:
+    """
+    Open the artifact cache given on the command line.
+
+    Args:
+        args: Parsed command line arguments with the artifact cache option
+
+    Returns:
+        The artifact cache, or None if none was given
+    """
+    if not args or not args.artifact_cache:
+        return None
+    return artifact_cache.open_artifact_cache(args.artifact_cache)
+
+
+def open_build_registry(args: Optional[argparse.Namespace]) -> Optional[build_registry.BuildRegistry]:
+    """
+    Open the build registry given on the command line.
+
+    Args:
+        args: Parsed command line arguments with the build registry options
+
+    Returns:
+        The build registry, or None if recording was disabled
+    """
+    if not args or args.no_registry:
+        return None
+    return build_registry.BuildRegistry(args.registry)
+
+
+def with_features(target_config: TargetConfig, args: argparse.Namespace) -> TargetConfig:
+    """
+    Apply the --backends and --components command line options to a target configuration.
+
+    Args:
+        target_config: The target configuration with the default features of its OS
+        args: Parsed command line arguments
+
+    Returns:
+        The target configuration with the requested feature set
+    """
+    if args.backends is None and args.components is None:
+        return target_config
+    defaults = target_config.features or FeatureSet(backends=())
+    features = FeatureSet(
+        backends=tuple(filter(None, args.backends.split(","))) if args.backends is not None else defaults.backends,
+        components=tuple(filter(None, args.components.split(","))) if args.components is not None else defaults.components,
+    )
+    return dataclasses.replace(target_config, features=features)
+
+
+def build_target(
+    target: str,
+    archs: list[str],
+    config: str = "release",
+    force: bool = False,
+    args: Optional[argparse.Namespace] = None,
+) -> None:
     """
     Build a target using the specified configuration.
 
@@ -26,22 +113,127 @@ def build_target(target: str, archs: list[str], config: str = "release") -> None
         target: The target OS to build for
         archs: List of architectures to build for
         config: The configuration to build for
+        force: Rebuild even if the build fingerprint is unchanged
+        args: Parsed command line arguments with the feature, compiler cache, artifact cache and
+            build registry options
     """
     target_config = ci_target(target, archs, config)
-    archive_builder.build_bundle_target(target_config)
+    if args:
+        target_config = with_features(with_compiler_cache(target_config, args), args)
+    result = archive_builder.build_bundle_target(
+        target_config, force=force, cache=open_artifact_cache(args), registry=open_build_registry(args)
+    )
+    print(f"Finished {target_config} in {result.elapsed:.1f}s")
 
 
-def bundle(chromium_version: str, dawn_hash: str, bundle_name: str) -> None:
+def resolve_archs(target: str, archs: list[str]) -> list[str]:
+    """
+    Expand "universal" and apply the default architectures for a target.
+
+    Args:
+        target: The target OS to build for
+        archs: Architectures requested on the command line, possibly empty
+
+    Returns:
+        List of architectures to build for
+    """
+    # Handle "universal" architecture
+    if "universal" in archs:
+        archs = [a for a in archs if a != "universal"]
+        archs.extend(["x86_64", "arm64"])
+
+    # Apply defaults if no architectures specified
+    if not archs:
+        if target == "macosx":
+            # macOS defaults to universal (both x86_64 and arm64)
+            archs = ["x86_64", "arm64"]
+        else:
+            # Other platforms default to current machine architecture
+            machine = platform.machine().lower()
+            if machine in ('amd64', 'x86_64', 'x64'):
+                archs = ["x86_64"]
+            elif machine in ('arm64', 'aarch64'):
+                archs = ["aarch64"]
+            else:
+                # Default to x86_64 if unknown
+                archs = ["x86_64"]
+    return archs
+
+
+def build_targets(
+    specs: list[str],
+    cores: Optional[int],
+    max_concurrent: Optional[int],
+    force: bool = False,
+    args: Optional[argparse.Namespace] = None,
+) -> None:
+    """
+    Build several targets at the same time.
+
+    Args:
+        specs: Target specifications of the form target[:arch[+arch...]][:config]
+        cores: Number of cores to split between the builds, all cores by default
+        max_concurrent: Maximum number of builds running at the same time
+        force: Rebuild even if the build fingerprints are unchanged
+        args: Parsed command line arguments with the feature, compiler cache, artifact cache and
+            build registry options
+    """
+    target_configs = []
+    for spec in specs:
+        target, _, rest = spec.partition(":")
+        arch_spec, _, config = rest.partition(":")
+        archs = resolve_archs(target, arch_spec.split("+") if arch_spec else [])
+        target_config = ci_target(target, archs, config or "release")
+        if args:
+            target_config = with_features(with_compiler_cache(target_config, args), args)
+        target_configs.append(target_config)
+    archive_builder.build_bundle_targets(
+        target_configs, cores, max_concurrent, force, cache=open_artifact_cache(args), registry=open_build_registry(args)
+    )
+
+
+def bundle(
+    chromium_version: str,
+    dawn_hash: str,
+    bundle_name: str,
+    jobs: Optional[int],
+    compression: str,
+    previous_index: Optional[str],
+    force: bool,
+    registry: Optional[build_registry.BuildRegistry] = None,
+) -> None:
     """
     Create per-platform artifact bundles and a bundle index from the current Dawn build.
+
+    If a previous index is given, the bundles are compared with it. When every bundle
+    is unchanged, publishing can be skipped: this is printed and, on GitHub Actions,
+    reported as the step output unchanged=true.
     """
     index_zip = archive_builder.create_artifact_bundles(
         chromium_version,
         dawn_hash,
         bundle_name,
+        jobs,
+        compression,
+        force,
+        registry,
     )
     print(f"Bundle index created: {index_zip}")
 
+    if previous_index:
+        unchanged = archive_builder.unchanged_bundles(index_zip, previous_index)
+        archive_count = len(json.loads(index_zip.read_text())["archives"])
+        all_unchanged = unchanged is not None and len(unchanged) == archive_count
+        for file_name in unchanged or []:
+            print(f"{file_name} is identical to the previous release")
+        if all_unchanged:
+            print("All bundles are identical to the previous release, publishing can be skipped")
+
+        github_output = os.environ.get("GITHUB_OUTPUT")
+        if github_output:
+            with open(github_output, "a") as f:
+                f.write(f"unchanged={'true' if all_unchanged else 'false'}\n")
+
 
 def upload(debug: bool) -> None:
     """
@@ -89,6 +281,17 @@ def parse_args() -> argparse.Namespace:
         default="stable",
         help="Chromium channel to use for Dawn",
     )
+    get_parser.add_argument(
+        "--channels",
+        nargs="+",
+        choices=["stable", "beta", "canary"],
+        help="Chromium channels to resolve and record in dawn_version.json, only --channel by default",
+    )
+    get_parser.add_argument(
+        "--chromium-dash-url",
+        default=dawn_source.CHROMIUM_DASH_URL,
+        help="Base URL of the Chromium release dashboard",
+    )
 
     get_parser = subparsers.add_parser("get-source", help="Get the Dawn source")
     get_parser.add_argument(
@@ -96,6 +299,74 @@ def parse_args() -> argparse.Namespace:
         required=True,
         help="Dawn hash to get the source for",
     )
+    get_parser.add_argument(
+        "--full-clone",
+        action="store_true",
+        help="Clone the full Dawn history instead of fetching only the requested commit",
+    )
+    get_parser.add_argument(
+        "--blobless",
+        action="store_true",
+        help="Fetch with a blob:none filter",
+    )
+    get_parser.add_argument(
+        "--mirror-cache",
+        nargs="?",
+        const=dawn_source.get_cache_path(),
+        type=pathlib.Path,
+        help="Fetch through a local mirror cache with one worktree per Dawn hash (default location: %(const)s)",
+    )
+    get_parser.add_argument(
+        "--mirror-cache-budget",
+        type=float,
+        default=dawn_source.DEFAULT_MIRROR_CACHE_BUDGET / (1024**3),
+        help="Size budget in GiB for the worktrees kept in the mirror cache",
+    )
+    get_parser.add_argument(
+        "--jobs",
+        type=int,
+        default=8,
+        help="Maximum number of third party dependencies fetched at the same time",
+    )
+    get_parser.add_argument(
+        "--git-url",
+        default=dawn_source.DAWN_GIT_URL,
+        help="URL of the Dawn git repository",
+    )
+
+    snapshot_parser = subparsers.add_parser(
+        "snapshot-source", help="Pack the Dawn source and its dependencies into an archive"
+    )
+    snapshot_parser.add_argument(
+        "--hash",
+        help="Dawn hash of the source (read from the checkout if omitted)",
+    )
+    snapshot_parser.add_argument(
+        "--output-dir",
+        type=pathlib.Path,
+        default=pathlib.Path("snapshots"),
+        help="Directory to write the snapshot archive to",
+    )
+
+    restore_parser = subparsers.add_parser(
+        "restore-source", help="Restore the Dawn source from a snapshot archive"
+    )
+    restore_source = restore_parser.add_mutually_exclusive_group(required=True)
+    restore_source.add_argument(
+        "--archive",
+        type=pathlib.Path,
+        help="Snapshot archive to restore",
+    )
+    restore_source.add_argument(
+        "--hash",
+        help="Dawn hash to restore the most recent snapshot of from --snapshot-dir",
+    )
+    restore_parser.add_argument(
+        "--snapshot-dir",
+        type=pathlib.Path,
+        default=pathlib.Path("snapshots"),
+        help="Directory holding snapshot archives",
+    )
 
     build_parser = subparsers.add_parser("build-target", help="Build a target")
     build_parser.add_argument(
@@ -112,10 +383,71 @@ def parse_args() -> argparse.Namespace:
     )
     build_parser.add_argument(
         "--config",
-        choices=["release", "debug"],
+        choices=BUILD_CONFIGS,
         default="release",
         help="Configuration to build for",
     )
+    build_parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Configure, build and install even if the build fingerprint is unchanged",
+    )
+
+    builds_parser = subparsers.add_parser(
+        "build-targets", help="Build several targets at the same time"
+    )
+    builds_parser.add_argument(
+        "--target",
+        action="append",
+        required=True,
+        help="Target to build as target[:arch[+arch...]][:config], e.g. linux:x86_64:debug. Can be specified multiple times.",
+    )
+    builds_parser.add_argument(
+        "--cores",
+        type=int,
+        help="Number of CPU cores to split between the builds (default: all)",
+    )
+    builds_parser.add_argument(
+        "--max-concurrent",
+        type=int,
+        help="Maximum number of builds running at the same time (default: all)",
+    )
+    builds_parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Configure, build and install even if the build fingerprints are unchanged",
+    )
+
+    for parser_with_cache in (build_parser, builds_parser):
+        parser_with_cache.add_argument(
+            "--compiler-cache",
+            choices=["ccache", "sccache"],
+            help="Compiler cache to use as compiler launcher",
+        )
+        parser_with_cache.add_argument(
+            "--compiler-cache-dir",
+            help="Directory of the compiler cache",
+        )
+        parser_with_cache.add_argument(
+            "--compiler-cache-max-size",
+            help="Size cap of the compiler cache, e.g. 5G",
+        )
+        parser_with_cache.add_argument(
+            "--backends",
+            help=f"Comma-separated Dawn backends to build instead of the defaults of the target OS "
+            f"({', '.join(DAWN_BACKENDS)})",
+        )
+        parser_with_cache.add_argument(
+            "--components",
+            help=f"Comma-separated optional Dawn components to build instead of the defaults of the "
+            f"target OS ({', '.join(DAWN_COMPONENTS)}); empty for none",
+        )
+        parser_with_cache.add_argument(
+            "--artifact-cache",
+            default=os.environ.get("SWAN_ARTIFACT_CACHE"),
+            help="Cache of install trees keyed by build fingerprint: a directory or s3://bucket[/prefix] "
+            "(endpoint from AWS_ENDPOINT_URL; default: $SWAN_ARTIFACT_CACHE)",
+        )
 
     bundle_parser = subparsers.add_parser("bundle", help="Bundle a target")
     bundle_parser.add_argument(
@@ -133,6 +465,165 @@ def parse_args() -> argparse.Namespace:
         required=True,
         help="Name of the bundle",
     )
+    bundle_parser.add_argument(
+        "--jobs",
+        type=int,
+        help="Number of threads compressing bundle data (default: number of CPU cores)",
+    )
+    bundle_parser.add_argument(
+        "--compression",
+        choices=list(archive_builder.COMPRESSION_PROFILES),
+        default="default",
+        help="Compression profile: store (no compression), fast, default or max deflate",
+    )
+    bundle_parser.add_argument(
+        "--previous-index",
+        help="Path or URL of the .artifactbundleindex of the previous release to compare the bundles with",
+    )
+    bundle_parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Rebuild every platform bundle, even those whose inputs did not change",
+    )
+
+    for parser_with_registry in (build_parser, builds_parser, bundle_parser):
+        parser_with_registry.add_argument(
+            "--registry",
+            type=pathlib.Path,
+            default=build_registry.registry_file(),
+            help="SQLite build registry to record builds and bundles in (default: %(default)s)",
+        )
+        parser_with_registry.add_argument(
+            "--no-registry",
+            action="store_true",
+            help="Do not record in the build registry",
+        )
+
+    history_parser = subparsers.add_parser(
+        "history", help="Show build times and library sizes recorded in the build registry"
+    )
+    history_parser.add_argument(
+        "--registry",
+        type=pathlib.Path,
+        default=build_registry.registry_file(),
+        help="SQLite build registry to read (default: %(default)s)",
+    )
+    history_parser.add_argument(
+        "--target",
+        help="Only show targets whose name contains this string, e.g. macosx or linux_x86_64_release",
+    )
+    history_parser.add_argument(
+        "--config",
+        choices=BUILD_CONFIGS,
+        help="Only show builds of this configuration",
+    )
+    history_parser.add_argument(
+        "--dawn-hash",
+        help="Only show builds of this Dawn hash (or hash prefix)",
+    )
+    history_parser.add_argument(
+        "--bundles",
+        action="store_true",
+        help="Show bundle sizes instead of builds; --target filters the archive names",
+    )
+    history_parser.add_argument(
+        "--limit",
+        type=int,
+        default=50,
+        help="Number of most recent entries to show",
+    )
+    history_parser.add_argument(
+        "--json",
+        action="store_true",
+        help="Print the entries as JSON",
+    )
+
+    delta_parser = subparsers.add_parser(
+        "bundle-delta", help="Create deltas from the bundles of a previous release to the bundles in dist/"
+    )
+    delta_parser.add_argument(
+        "--previous-dir",
+        type=pathlib.Path,
+        required=True,
+        help="Directory with the bundle zips of the previous release",
+    )
+    delta_parser.add_argument(
+        "--bundle-name",
+        required=True,
+        help="Name of the bundle in dist/",
+    )
+    delta_parser.add_argument(
+        "--compression",
+        choices=list(archive_builder.COMPRESSION_PROFILES),
+        default="default",
+        help="Compression profile the bundles were created with",
+    )
+
+    apply_parser = subparsers.add_parser(
+        "apply-delta", help="Rebuild a bundle from the previous bundle and a delta, verifying its contents"
+    )
+    apply_parser.add_argument(
+        "--previous",
+        type=pathlib.Path,
+        required=True,
+        help="The previous bundle zip",
+    )
+    apply_parser.add_argument(
+        "--delta",
+        type=pathlib.Path,
+        required=True,
+        help="The delta created by bundle-delta",
+    )
+    apply_parser.add_argument(
+        "--output-dir",
+        type=pathlib.Path,
+        default=pathlib.Path("."),
+        help="Directory to write the rebuilt bundle to",
+    )
+    apply_parser.add_argument(
+        "--require-identical",
+        action="store_true",
+        help="Fail unless the rebuilt zip has the checksum of the published bundle, not only the same contents",
+    )
+
+    verify_parser = subparsers.add_parser(
+        "verify", help="Verify the checksums and contents of the bundles of an artifact bundle index"
+    )
+    verify_parser.add_argument(
+        "--index",
+        type=pathlib.Path,
+        help="The .artifactbundleindex to verify, with its archives next to it (default: the index in dist/)",
+    )
+    verify_parser.add_argument(
+        "--jobs",
+        type=int,
+        help="Number of archives hashed at the same time (default: number of CPU cores)",
+    )
+
+    profile_parser = subparsers.add_parser(
+        "build-profile", help="Profile a Ninja build or compare two build profiles"
+    )
+    profile_source = profile_parser.add_mutually_exclusive_group(required=True)
+    profile_source.add_argument(
+        "--target-name",
+        help="Target whose builds/<target>/out/.ninja_log to profile, e.g. linux_x86_64_release",
+    )
+    profile_source.add_argument(
+        "--compare",
+        nargs=2,
+        type=pathlib.Path,
+        metavar=("OLD", "NEW"),
+        help="Compare two build_profile.json reports",
+    )
+    profile_parser.add_argument(
+        "--max-regression",
+        type=float,
+        help="With --compare, fail if the wall time grew by more than this many percent",
+    )
+
+    subparsers.add_parser(
+        "toolchain", help="Show the detected build toolchain and SDKs"
+    )
 
     subparsers.add_parser("clean", help="Clean the build environment")
 
@@ -148,40 +639,127 @@ def main() -> int:
     """
     args = parse_args()
     if args.command == "get-dawn-version":
-        dawn_source.get_matching_dawn_for_chromium(args.channel)
+        dawn_source.get_matching_dawn_for_chromium(
+            args.channel, args.channels, args.chromium_dash_url
+        )
         print(json.dumps(dawn_source.get_version(), indent=2))
     elif args.command == "get-source":
-        dawn_source.fetch_dawn_source(args.hash)
+        if args.mirror_cache:
+            stats = dawn_source.fetch_dawn_source_from_mirror(
+                args.hash,
+                args.mirror_cache,
+                budget=int(args.mirror_cache_budget * 1024**3),
+                url=args.git_url,
+                dependency_jobs=args.jobs,
+            )
+        else:
+            stats = dawn_source.fetch_dawn_source(
+                args.hash,
+                shallow=not args.full_clone,
+                blobless=args.blobless,
+                url=args.git_url,
+                dependency_jobs=args.jobs,
+            )
+        print(f"Fetched Dawn {args.hash}: {stats}")
+    elif args.command == "snapshot-source":
+        archive = dawn_source.snapshot_dawn_source(args.output_dir, args.hash)
+        print(f"Dawn source snapshot created: {archive}")
+    elif args.command == "restore-source":
+        archive = args.archive or dawn_source.find_dawn_source_snapshot(
+            args.snapshot_dir, args.hash
+        )
+        hash = dawn_source.restore_dawn_source(archive)
+        print(f"Restored Dawn {hash} from {archive}")
     elif args.command == "build-target":
-        # Determine architectures to build
-        archs = args.arch if args.arch else []
-        
-        # Handle "universal" architecture
-        if "universal" in archs:
-            archs = [a for a in archs if a != "universal"]
-            archs.extend(["x86_64", "arm64"])
-        
-        # Apply defaults if no architectures specified
-        if not archs:
-            if args.target == "macosx":
-                # macOS defaults to universal (both x86_64 and arm64)
-                archs = ["x86_64", "arm64"]
-            else:
-                # Other platforms default to current machine architecture
-                machine = platform.machine().lower()
-                if machine in ('amd64', 'x86_64', 'x64'):
-                    archs = ["x86_64"]
-                elif machine in ('arm64', 'aarch64'):
-                    archs = ["aarch64"]
-                else:
-                    # Default to x86_64 if unknown
-                    archs = ["x86_64"]
-        
-        build_target(args.target, archs, args.config)
+        archs = resolve_archs(args.target, args.arch if args.arch else [])
+        build_target(args.target, archs, args.config, args.force, args)
+    elif args.command == "build-targets":
+        try:
+            build_targets(args.target, args.cores, args.max_concurrent, args.force, args)
+        except BuildDawnError as e:
+            print(e)
+            return _EXIT_FAILURE
     elif args.command == "bundle":
-        bundle(args.chromium_version, args.dawn_hash, args.bundle_name)
+        bundle(
+            args.chromium_version,
+            args.dawn_hash,
+            args.bundle_name,
+            args.jobs,
+            args.compression,
+            args.previous_index,
+            args.force,
+            open_build_registry(args),
+        )
+    elif args.command == "history":
+        if not args.registry.exists():
+            print(f"No build registry at {args.registry}")
+            return _EXIT_FAILURE
+        registry = build_registry.BuildRegistry(args.registry)
+        try:
+            if args.bundles:
+                entries = registry.bundle_history(args.target, args.limit)
+            else:
+                entries = registry.build_history(args.target, args.config, args.dawn_hash, args.limit)
+        except build_registry.BuildRegistryError as e:
+            print(e)
+            return _EXIT_FAILURE
+        if args.json:
+            print(json.dumps(entries, indent=2))
+        elif args.bundles:
+            print(build_registry.format_bundle_history(entries))
+        else:
+            print(build_registry.format_build_history(entries))
+    elif args.command == "bundle-delta":
+        try:
+            archive_builder.create_bundle_deltas(args.previous_dir, args.bundle_name, args.compression)
+        except bundle_delta.BundleDeltaError as e:
+            print(e)
+            return _EXIT_FAILURE
+    elif args.command == "apply-delta":
+        try:
+            rebuilt = bundle_delta.apply_bundle_delta(
+                args.previous, args.delta, args.output_dir, args.require_identical
+            )
+        except bundle_delta.BundleDeltaError as e:
+            print(e)
+            return _EXIT_FAILURE
+        print(f"Rebuilt and verified {rebuilt}")
+    elif args.command == "verify":
+        index_file = args.index
+        if not index_file:
+            indexes = sorted(archive_builder.dist_directory().glob("*.artifactbundleindex"))
+            if len(indexes) != 1:
+                print(f"Expected one .artifactbundleindex in {archive_builder.dist_directory()}, found {len(indexes)}; use --index")
+                return _EXIT_FAILURE
+            index_file = indexes[0]
+        try:
+            bundle_verify.verify_bundle_index(index_file, args.jobs)
+        except bundle_verify.BundleVerificationError as e:
+            print(e)
+            return _EXIT_FAILURE
     elif args.command == "upload":
         upload(args.debug)
+    elif args.command == "build-profile":
+        if args.compare:
+            old, new = (json.loads(path.read_text()) for path in args.compare)
+            comparison = build_profiler.compare_reports(old, new)
+            print(build_profiler.format_comparison(comparison))
+            change = comparison["summary"]["wallTime"]["change"]
+            if args.max_regression is not None and change is not None and change > args.max_regression:
+                print(f"Build time regressed by {change:.1f}% (limit {args.max_regression:.1f}%)")
+                return _EXIT_FAILURE
+        else:
+            target_dir = pathlib.Path("builds") / args.target_name
+            report = build_profiler.profile_build(target_dir / "out", target_dir, args.target_name)
+            if not report:
+                print(f"No ninja log in {target_dir / 'out'}")
+                return _EXIT_FAILURE
+            print(f"Build profile written to {report}")
+    elif args.command == "toolchain":
+        print(json.dumps(toolchain.toolchain_identity(), indent=2))
+        sdks = toolchain.get_sdk_info()
+        if sdks:
+            print(json.dumps([sdk.get("canonicalName") for sdk in sdks], indent=2))
     elif args.command == "clean":
         clean()
 
@@ -6,7 +6,20 @@
 # it.
 
 import platform
-from dawn_builder import TargetConfig, Arch, OS
+from dawn_builder import BUILD_CONFIGS, FeatureSet, TargetConfig, Arch, OS
+from typing import Optional
+
+
+# Dawn backends and components built for each OS. Each platform only ships the native
+# backend its applications use. GLFW stays on for the desktop platforms, where the
+# WindowUtils module creates its windows with it.
+DEFAULT_FEATURES = {
+    OS.MACOS: FeatureSet(backends=("metal",), components=("glfw",)),
+    OS.IPHONE: FeatureSet(backends=("metal",)),
+    OS.IPADOS: FeatureSet(backends=("metal",)),
+    OS.LINUX: FeatureSet(backends=("vulkan",), components=("glfw",)),
+    OS.WINDOWS: FeatureSet(backends=("d3d11", "d3d12"), components=("glfw",)),
+}
 
 
 def get_current_arch() -> Arch:
@@ -26,21 +39,52 @@ def get_current_arch() -> Arch:
         return Arch.X86_64
 
 
-def ci_target(target: str, archs: list[str], config: str = "release") -> TargetConfig:
+def ci_target(
+    target: str,
+    archs: list[str],
+    config: str = "release",
+    features: Optional[FeatureSet] = None,
+) -> TargetConfig:
     """
     Create a TargetConfig for the specified target OS, architectures, and configuration.
 
     Args:
         target: The target OS name (macosx, iphoneos, iphonesimulator, ipados, linux, windows)
         archs: List of architecture strings (x86_64, arm64)
+        config: The configuration to build for: release, debug, release-lto (ThinLTO
+            where the toolchain supports it) or minsize
+        features: Dawn backends and components to build, the defaults of the OS if None
+
+    Returns:
+        TargetConfig object configured for the specified target
+
+    Raises:
+        ValueError: If the target name or configuration is not recognized
+    """
+    if config not in BUILD_CONFIGS:
+        raise ValueError(f"Invalid configuration: {config}")
+    target_config = _ci_target(target, archs, config)
+    target_config.features = features or DEFAULT_FEATURES.get(target_config.os)
+    return target_config
+
+
+def _ci_target(target: str, archs: list[str], config: str) -> TargetConfig:
+    """
+    Create a TargetConfig for the specified target OS, architectures, and configuration,
+    without a feature set.
+
+    Args:
+        target: The target OS name
+        archs: List of architecture strings (x86_64, arm64)
         config: The configuration to build for
 
     Returns:
         TargetConfig object configured for the specified target
 
     Raises:
-        ValueError: If the target name is not recognized
+        ValueError: If the target name or an architecture is not recognized
     """
+
     # Convert architecture strings to Arch enums
     arch_enums = []
     for arch_str in archs:
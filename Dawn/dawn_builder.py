@@ -10,17 +10,61 @@
 import os
 import sys
 import json
+import time
+import hashlib
 import shutil
+import socket
 import pathlib
 import subprocess
+import threading
+import build_profiler
+import dawn_source
+import file_links
+import subprocess_runner
+import toolchain
 from dataclasses import dataclass
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 from enum import Enum
 
 
 _EXIT_FAILURE = 1
 _EXIT_SUCCESS = 0
 
+# Wall-clock and no-output timeouts in seconds of the CMake stages. The build may be
+# silent for a long time while linking with LTO, so it only has a stall timeout.
+_CONFIGURE_TIMEOUT = 60 * 60
+_CONFIGURE_STALL_TIMEOUT = 20 * 60
+_BUILD_STALL_TIMEOUT = 60 * 60
+_INSTALL_TIMEOUT = 20 * 60
+_INSTALL_STALL_TIMEOUT = 10 * 60
+
+# Time limit in seconds for stripping a library.
+_STRIP_TIMEOUT = 10 * 60
+
+# Directory of the install tree that keeps the unstripped library.
+DEBUG_DIR_NAME = "debug"
+
+# Stamp file recording the fingerprint of the build that produced an install tree.
+_INSTALL_STAMP_NAME = ".swan-build.fingerprint"
+
+# Environment variables read by CMake or the compilers that change the build output.
+_FINGERPRINT_ENVIRONMENT = [
+    "CC",
+    "CXX",
+    "CFLAGS",
+    "CXXFLAGS",
+    "CPPFLAGS",
+    "LDFLAGS",
+    "ASMFLAGS",
+    "OBJCFLAGS",
+    "OBJCXXFLAGS",
+    "MACOSX_DEPLOYMENT_TARGET",
+    "SDKROOT",
+]
+
+# ccache stats log of a build, in the build directory of the target.
+_CCACHE_STATS_LOG_NAME = "ccache-stats.log"
+
 
 # fmt: off
 class BuildDawnError(Exception): pass
@@ -38,9 +82,13 @@ def _subprocess_exception_message(exc: subprocess.CalledProcessError) -> None:
     Args:
         exc: The CalledProcessError exception
     """
-    print(f"Command failed with exit code {exc.returncode}")
-    print(f"stdout: {exc.stdout}")
-    print(f"stderr: {exc.stderr}")
+    print(exc)
+    if exc.stdout:
+        print(f"stdout: {exc.stdout}")
+    if exc.stderr:
+        print(f"stderr: {exc.stderr}")
+    if getattr(exc, "log_file", None):
+        print(f"Full output in {exc.log_file}")
 
 
 class PlatformGroup(str, Enum):
@@ -125,6 +173,77 @@ def get_current_os() -> OS:
             return OS.UNKNOWN
 
 
+# Build configurations a TargetConfig can use: plain Debug and Release builds, a
+# Release build with cross-module (Thin)LTO, and a size-optimized build.
+BUILD_CONFIGS = ["release", "debug", "release-lto", "minsize"]
+
+
+# Dawn backends a FeatureSet can enable, with the CMake option that enables each one.
+DAWN_BACKENDS = {
+    "d3d11": "DAWN_ENABLE_D3D11",
+    "d3d12": "DAWN_ENABLE_D3D12",
+    "metal": "DAWN_ENABLE_METAL",
+    "vulkan": "DAWN_ENABLE_VULKAN",
+    "desktop_gl": "DAWN_ENABLE_DESKTOP_GL",
+    "opengles": "DAWN_ENABLE_OPENGLES",
+    "null": "DAWN_ENABLE_NULL",
+}
+
+# Optional Dawn components a FeatureSet can switch, with the CMake option of each one.
+DAWN_COMPONENTS = {
+    "glfw": "DAWN_USE_GLFW",
+    "spirv_validation": "DAWN_ENABLE_SPIRV_VALIDATION",
+    "spirv_reader": "TINT_BUILD_SPV_READER",
+}
+
+
+@dataclass(frozen=True)
+class FeatureSet:
+    """
+    Dawn backends and optional components to build.
+
+    Every backend and component that is not listed is turned off, so unused backends,
+    their Tint writers and their third party dependencies are not compiled.
+
+    Attributes:
+        backends: Names of the enabled backends, keys of DAWN_BACKENDS
+        components: Names of the enabled components, keys of DAWN_COMPONENTS
+    """
+
+    backends: Tuple[str, ...]
+    components: Tuple[str, ...] = ()
+
+    def __post_init__(self) -> None:
+        for backend in self.backends:
+            if backend not in DAWN_BACKENDS:
+                raise ValueError(f"Invalid Dawn backend: {backend}")
+        for component in self.components:
+            if component not in DAWN_COMPONENTS:
+                raise ValueError(f"Invalid Dawn component: {component}")
+
+    def cmake_flags(self) -> List[str]:
+        """
+        Generate the CMake flags that select the backends and components.
+
+        Returns:
+            List of CMake flags
+        """
+        flags = []
+        for name, option in (*DAWN_BACKENDS.items(), *DAWN_COMPONENTS.items()):
+            enabled = name in self.backends or name in self.components
+            flags.append(f"-D{option}={'ON' if enabled else 'OFF'}")
+        return flags
+
+    def to_dict(self) -> Dict[str, List[str]]:
+        """
+        Describe the feature set for manifests.
+
+        Returns:
+            Dictionary with the sorted backends and components
+        """
+        return {"backends": sorted(self.backends), "components": sorted(self.components)}
+
+
 class Arch(Enum):
     X86_64 = "x86_64"
     ARM64 = "arm64"
@@ -139,6 +258,10 @@ class TargetConfig:
     deployment_target: Optional[str] = None
     config: str = "release"
     build_tool: str = "Ninja"
+    compiler_cache: Optional[str] = None
+    compiler_cache_dir: Optional[str] = None
+    compiler_cache_max_size: Optional[str] = None
+    features: Optional[FeatureSet] = None
 
     def __str__(self) -> str:
         """
@@ -175,6 +298,21 @@ class TargetConfig:
             for arch in self.arch
         ]
 
+    def cmake_build_type(self) -> str:
+        """
+        Get the CMake build type for the build configuration.
+
+        Returns:
+            CMake build type (Debug, Release or MinSizeRel)
+        """
+        match self.config:
+            case "debug":
+                return "Debug"
+            case "minsize":
+                return "MinSizeRel"
+            case _:
+                return "Release"
+
 
 def cmake_flags(target_config: TargetConfig) -> List[str]:
     """
@@ -197,97 +335,641 @@ def cmake_flags(target_config: TargetConfig) -> List[str]:
                 f"-DCMAKE_OSX_DEPLOYMENT_TARGET={target_config.deployment_target}"
             )
         if target_config.os != OS.MACOS:
-            flags.append("-DDAWN_USE_GLFW=OFF")
+            if not target_config.features:
+                flags.append("-DDAWN_USE_GLFW=OFF")
             flags.append("-DCMAKE_SYSTEM_NAME=iOS")
 
-    if target_config.config == "debug":
-        flags.append("-DCMAKE_BUILD_TYPE=Debug")
-    else:
-        flags.append("-DCMAKE_BUILD_TYPE=Release")
+    if target_config.features:
+        flags.extend(target_config.features.cmake_flags())
+
+    flags.append(f"-DCMAKE_BUILD_TYPE={target_config.cmake_build_type()}")
+    flags.extend(_build_config_flags(target_config))
 
     if target_config.os.is_apple():
-        sdk_path = find_sdk_path(target_config.sdk)
+        sdk_path = toolchain.find_sdk_path(target_config.sdk)
         if not sdk_path:
             print(f"SDK {target_config.sdk} not found")
             sys.exit(1)
         flags.append(f"-DCMAKE_OSX_SYSROOT={sdk_path}")
 
+    launcher = compiler_cache_executable(target_config)
+    if launcher:
+        languages = ["C", "CXX"]
+        if target_config.os.is_apple():
+            languages += ["OBJC", "OBJCXX"]
+        for language in languages:
+            flags.append(f"-DCMAKE_{language}_COMPILER_LAUNCHER={launcher}")
+
+    return flags
+
+
+def _build_config_flags(target_config: TargetConfig) -> List[str]:
+    """
+    Generate the CMake flags specific to the release-lto and minsize configurations.
+
+    release-lto enables CMake's interprocedural optimization, which is ThinLTO with
+    Clang, so the static library ships LLVM bitcode that is optimized across modules
+    when consumers link it. Linux builds use Clang for this, since GCC LTO objects
+    cannot be linked by Clang-based toolchains. MSVC /GL objects cannot be read by
+    lld-link either, so Windows builds get function-level linking instead.
+
+    minsize optimizes for size and places functions and data in separate sections so
+    the consumer's linker can drop what is unused.
+
+    Args:
+        target_config: Target configuration to generate flags for
+
+    Returns:
+        List of CMake flags
+    """
+    flags = []
+    section_flags = "/Gy /Gw" if target_config.os.is_windows() else "-ffunction-sections -fdata-sections"
+
+    if target_config.config == "release-lto":
+        if target_config.os.is_windows():
+            flags.append(f"-DCMAKE_C_FLAGS_INIT={section_flags}")
+            flags.append(f"-DCMAKE_CXX_FLAGS_INIT={section_flags}")
+        else:
+            flags.append("-DCMAKE_INTERPROCEDURAL_OPTIMIZATION=ON")
+            flags.append("-DCMAKE_POLICY_DEFAULT_CMP0069=NEW")
+            if target_config.os == OS.LINUX and "CC" not in os.environ:
+                flags.append("-DCMAKE_C_COMPILER=clang")
+                flags.append("-DCMAKE_CXX_COMPILER=clang++")
+    elif target_config.config == "minsize" and not target_config.os.is_apple():
+        # Apple's linker dead strips per symbol without separate sections
+        flags.append(f"-DCMAKE_C_FLAGS_INIT={section_flags}")
+        flags.append(f"-DCMAKE_CXX_FLAGS_INIT={section_flags}")
+
     return flags
 
 
-def get_sdk_info() -> Optional[List[Dict[str, Any]]]:
+def library_stats(library_path: pathlib.Path) -> Optional[Dict[str, Any]]:
+    """
+    Measure the size and number of exported symbols of a static library.
+
+    Symbols are counted with llvm-nm if available, which also reads the bitcode of LTO
+    builds, and nm otherwise.
+
+    Args:
+        library_path: Path to the static library
+
+    Returns:
+        Dictionary with the size in bytes and the symbol count (None if no nm tool can
+        read the library), or None if the library does not exist
+    """
+    if not library_path.exists():
+        return None
+
+    symbols = None
+    nm = toolchain.find_tool("llvm-nm") or toolchain.find_tool("nm")
+    if nm:
+        try:
+            result = subprocess.run(
+                [nm.path, "-g", "--defined-only", "-P", str(library_path)],
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+        except (subprocess.SubprocessError, OSError):
+            pass
+        else:
+            symbols = 0
+            for line in result.stdout.splitlines():
+                fields = line.split()
+                if len(fields) >= 2 and len(fields[1]) == 1 and fields[1].isalpha():
+                    symbols += 1
+
+    return {"size": library_path.stat().st_size, "symbols": symbols}
+
+
+def split_debug_info(
+    target_config: TargetConfig, install_dir: pathlib.Path, log_file: Optional[pathlib.Path] = None
+) -> Optional[pathlib.Path]:
+    """
+    Strip the debug info from an installed static library, keeping the unstripped library.
+
+    A copy of the unstripped library is kept in the debug directory of the install
+    tree, where it can be bundled separately, and the library in lib/ keeps only its
+    symbols. Debug
+    builds keep their debug info, release-lto libraries hold LLVM bitcode that strip
+    cannot rewrite, and Windows debug info lives in PDB files, so those are skipped.
+
+    Args:
+        target_config: Target configuration of the build
+        install_dir: The install directory
+        log_file: File to write the output of strip to
+
+    Returns:
+        Path to the unstripped library, or None if the library was not stripped
+    """
+    if target_config.os.is_windows() or target_config.config in ("debug", "release-lto"):
+        return None
+
+    library = install_dir / "lib" / "libwebgpu_dawn.a"
+    if not library.exists():
+        return None
+
+    strip = toolchain.find_tool("strip")
+    if not strip:
+        print("strip not found, bundling the library with its debug info")
+        return None
+
+    debug_library = install_dir / DEBUG_DIR_NAME / library.name
+    # No hard link: strip rewrites libraries with several links in place
+    file_links.link_or_copy(library, debug_library, allow_hardlink=False)
+
+    # Remove the debug info only, the symbols are needed to link the library
+    strip_flag = "-S" if target_config.os.is_apple() else "--strip-debug"
+    try:
+        subprocess_runner.run([strip.path, strip_flag, str(library)], log_file=log_file, timeout=_STRIP_TIMEOUT)
+    except (subprocess.CalledProcessError, OSError) as e:
+        print(f"Failed to strip {library}, bundling it with its debug info: {e}")
+        file_links.link_or_copy(debug_library, library, allow_hardlink=False)
+        shutil.rmtree(debug_library.parent)
+        return None
+
+    print(
+        f"Stripped {library}: {debug_library.stat().st_size / (1024 * 1024):.1f} MiB -> "
+        f"{library.stat().st_size / (1024 * 1024):.1f} MiB"
+    )
+    return debug_library
+
+
+def compiler_cache_executable(target_config: TargetConfig) -> Optional[str]:
+    """
+    Find the compiler cache to use as compiler launcher for a target configuration.
+
+    Compiler launchers are only honored by the Ninja and Makefile generators.
+
+    Args:
+        target_config: Target configuration for the build
+
+    Returns:
+        Path to the compiler cache executable, or None if no cache is used
+    """
+    if not target_config.compiler_cache:
+        return None
+    if not (target_config.build_tool == "Ninja" or "Makefiles" in target_config.build_tool):
+        print(f"{target_config.build_tool} does not support compiler launchers, not using {target_config.compiler_cache}")
+        return None
+
+    tool = toolchain.find_tool(target_config.compiler_cache)
+    if not tool:
+        print(f"Compiler cache {target_config.compiler_cache} not found, building without it")
+        return None
+    return pathlib.Path(tool.path).as_posix()
+
+
+def compiler_cache_environment(target_config: TargetConfig) -> Dict[str, str]:
+    """
+    Get the environment variables that configure the compiler cache.
+
+    Args:
+        target_config: Target configuration for the build
+
+    Returns:
+        Environment variables setting the cache directory and size cap
     """
-    Get information about available SDKs from xcodebuild.
+    env = {}
+    if target_config.compiler_cache == "ccache":
+        if target_config.compiler_cache_dir:
+            env["CCACHE_DIR"] = str(pathlib.Path(target_config.compiler_cache_dir).absolute())
+        if target_config.compiler_cache_max_size:
+            env["CCACHE_MAXSIZE"] = target_config.compiler_cache_max_size
+    elif target_config.compiler_cache == "sccache":
+        if target_config.compiler_cache_dir:
+            env["SCCACHE_DIR"] = str(pathlib.Path(target_config.compiler_cache_dir).absolute())
+        if target_config.compiler_cache_max_size:
+            env["SCCACHE_CACHE_SIZE"] = target_config.compiler_cache_max_size
+    return env
+
+
+def compiler_cache_stats_environment(tool: str, sdk_build_dir: pathlib.Path) -> Dict[str, str]:
+    """
+    Get the environment variables that keep the compiler cache statistics of a build
+    apart from those of other builds sharing the cache.
+
+    ccache logs the result of every compilation of the build to a stats log in the
+    build directory. sccache gets a server of its own on a free port.
+
+    Args:
+        tool: Name of the compiler cache (ccache or sccache)
+        sdk_build_dir: Build directory of the target
 
     Returns:
-        List of SDK information dictionaries, or None if command fails
+        Dictionary of environment variables
+    """
+    if tool == "sccache":
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            return {"SCCACHE_SERVER_PORT": str(s.getsockname()[1])}
+    return {"CCACHE_STATSLOG": str((sdk_build_dir / _CCACHE_STATS_LOG_NAME).absolute())}
+
+
+def _compiler_cache_counts(launcher: str, tool: str, env: Dict[str, str]) -> Optional[Tuple[int, int]]:
+    """
+    Read the hit and miss counters of a compiler cache.
+
+    Args:
+        launcher: Path to the compiler cache executable
+        tool: Name of the compiler cache (ccache or sccache)
+        env: Environment for the compiler cache
+
+    Returns:
+        Tuple of the hit and miss counts, or None if the statistics cannot be read
     """
-    # Run xcodebuild command to get SDK info
     try:
-        result = subprocess.run(
-            ["xcodebuild", "-showsdks", "-json"],
-            capture_output=True,
-            text=True,
-            check=True,
-        )
-    except (subprocess.SubprocessError, OSError):
+        if tool == "sccache":
+            result = subprocess.run(
+                [launcher, "--show-stats", "--stats-format=json"],
+                env=env,
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+            stats = json.loads(result.stdout)["stats"]
+            hits = sum(stats["cache_hits"]["counts"].values())
+            misses = sum(stats["cache_misses"]["counts"].values())
+        else:
+            result = subprocess.run(
+                [launcher, "--print-stats"],
+                env=env,
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+            counters = dict(
+                line.split("\t", 1) for line in result.stdout.splitlines() if "\t" in line
+            )
+            hits = int(counters.get("direct_cache_hit", 0)) + int(
+                counters.get("preprocessed_cache_hit", 0)
+            )
+            misses = int(counters.get("cache_miss", 0))
+    except (subprocess.SubprocessError, OSError, ValueError, KeyError):
         return None
+    return hits, misses
+
+
+def _stats_log_counts(stats_log: pathlib.Path) -> Optional[Tuple[int, int]]:
+    """
+    Count the hits and misses in a ccache stats log.
+
+    The log holds a "# <source file>" line for every compilation followed by the
+    counters the compilation incremented, one per line.
 
-    # Parse JSON output
+    Args:
+        stats_log: Path to the stats log
+
+    Returns:
+        Tuple of the hit and miss counts, or None if there is no stats log
+    """
     try:
-        sdks = json.loads(result.stdout)
-    except json.JSONDecodeError:
+        counters = [line.strip() for line in stats_log.read_text(errors="replace").splitlines()]
+    except OSError:
         return None
+    hits = counters.count("direct_cache_hit") + counters.count("preprocessed_cache_hit")
+    return hits, counters.count("cache_miss")
+
+
+def start_compiler_cache_stats(launcher: str, tool: str, env: Dict[str, str]) -> Optional[Tuple[int, int]]:
+    """
+    Start counting the compiler cache statistics of a build.
+
+    The private sccache server of the build is reset and the ccache stats log is
+    truncated. The counters of the shared cache are read as well, for ccache versions
+    that do not write a stats log.
 
-    # Filter out SDKs that are not macOS or iOS, return unique SDK names
-    sdks = [
-        sdk
-        for sdk in sdks
-        if sdk.get("canonicalName", "").startswith(("macosx", "iphone"))
-    ]
-    return sdks
+    Args:
+        launcher: Path to the compiler cache executable
+        tool: Name of the compiler cache (ccache or sccache)
+        env: Environment for the compiler cache, see compiler_cache_stats_environment
+
+    Returns:
+        Tuple of the hit and miss counts of the shared cache, or None if they cannot
+        be read
+    """
+    if tool == "sccache":
+        subprocess.run([launcher, "--zero-stats"], env=env, capture_output=True)
+        return None
+    pathlib.Path(env["CCACHE_STATSLOG"]).unlink(missing_ok=True)
+    return _compiler_cache_counts(launcher, tool, env)
 
 
-def find_sdk_path(sdk_name: Optional[str]) -> Optional[str]:
+def compiler_cache_stats(
+    launcher: str, tool: str, env: Dict[str, str], baseline: Optional[Tuple[int, int]] = None
+) -> Optional[Dict[str, Any]]:
     """
-    Find the path to a specific SDK.
+    Read the hit and miss counts of a compiler cache for a build, and stop the private
+    sccache server of the build.
+
+    ccache counts are read from the stats log of the build. Without a stats log (ccache
+    older than 4.4), they are the difference with the counters read when the build
+    started, which also include concurrent builds sharing the cache.
 
     Args:
-        sdk_name: Name of the SDK to find
+        launcher: Path to the compiler cache executable
+        tool: Name of the compiler cache (ccache or sccache)
+        env: Environment for the compiler cache, see compiler_cache_stats_environment
+        baseline: Counts returned by start_compiler_cache_stats
 
     Returns:
-        Path to the SDK, or None if not found
+        Dictionary with the tool name, hits, misses and hit rate, or None if the
+        statistics cannot be read
     """
-    if not sdk_name:
+    if tool == "sccache":
+        counts = _compiler_cache_counts(launcher, tool, env)
+        subprocess.run([launcher, "--stop-server"], env=env, capture_output=True)
+    else:
+        counts = _stats_log_counts(pathlib.Path(env["CCACHE_STATSLOG"]))
+        if counts is None and baseline is not None:
+            current = _compiler_cache_counts(launcher, tool, env)
+            counts = current and (current[0] - baseline[0], current[1] - baseline[1])
+    if counts is None:
         return None
 
-    sdks = get_sdk_info()
-    if not sdks:
+    hits, misses = counts
+    total = hits + misses
+    return {
+        "tool": tool,
+        "hits": hits,
+        "misses": misses,
+        "hitRate": round(hits / total, 4) if total else 0.0,
+    }
+
+
+class CoreBudget:
+    """
+    Split a number of CPU cores between builds running at the same time.
+
+    Each registered build gets an equal share of the cores. Whenever a build is
+    released the shares grow, and builds waiting in wait_for_change are woken so they
+    can pick up their larger share.
+    """
+
+    def __init__(self, total: int) -> None:
+        self.total = max(1, total)
+        self.generation = 0
+        self._active: List[str] = []
+        self._changed = threading.Condition()
+
+    def acquire(self, name: str) -> None:
+        """
+        Register a build with the budget. Registering a build twice has no effect.
+
+        Args:
+            name: Unique name of the build
+        """
+        with self._changed:
+            if name in self._active:
+                return
+            self._active.append(name)
+            self.generation += 1
+            self._changed.notify_all()
+
+    def release(self, name: str) -> None:
+        """
+        Remove a build from the budget, giving its cores to the remaining builds.
+
+        Args:
+            name: Name the build was registered with
+        """
+        with self._changed:
+            if name in self._active:
+                self._active.remove(name)
+                self.generation += 1
+                self._changed.notify_all()
+
+    def share(self, name: str) -> int:
+        """
+        Get the number of cores currently assigned to a build.
+
+        Args:
+            name: Name the build was registered with
+
+        Returns:
+            Number of cores, at least 1
+        """
+        with self._changed:
+            if name not in self._active:
+                return self.total
+            count = len(self._active)
+            extra = 1 if self._active.index(name) < self.total % count else 0
+            return max(1, self.total // count + extra)
+
+    def wait_for_change(self, generation: int, timeout: float) -> bool:
+        """
+        Wait until builds were added or removed since the given generation.
+
+        Args:
+            generation: The generation the caller last saw
+            timeout: Maximum time to wait in seconds
+
+        Returns:
+            True if the budget changed
+        """
+        with self._changed:
+            return self._changed.wait_for(lambda: self.generation != generation, timeout)
+
+
+def _run_budgeted_build(
+    command: List[str],
+    build_dir: pathlib.Path,
+    name: str,
+    core_budget: CoreBudget,
+    log_file: pathlib.Path,
+    echo: bool,
+    env: Optional[Dict[str, str]] = None,
+) -> None:
+    """
+    Run the cmake build step with a parallelism that follows the core budget.
+
+    When other builds finish and the share of this build grows by at least half, the
+    build is interrupted and restarted with the larger --parallel value. The build tool
+    picks up where it stopped, so only the steps that were in flight are repeated.
+
+    Args:
+        command: The cmake --build command, without a --parallel argument
+        build_dir: Directory to run the build in
+        name: Name of the build in the core budget
+        core_budget: The budget to take the parallelism from
+        log_file: File to write the build output to
+        echo: Whether to also print the build output to the console
+        env: Environment for the build, the current environment if None
+
+    Raises:
+        subprocess_runner.CommandError: If the build fails or stalls
+    """
+    while True:
+        jobs = core_budget.share(name)
+        generation = core_budget.generation
+        print(f"[{name}] building with {jobs} parallel jobs")
+        build = subprocess_runner.RunningCommand(
+            [*command, "--parallel", str(jobs)],
+            cwd=build_dir,
+            env=env,
+            log_file=log_file,
+            echo=echo,
+            stall_timeout=_BUILD_STALL_TIMEOUT,
+        )
+
+        restarted = False
+        while build.poll() is None:
+            if not core_budget.wait_for_change(generation, timeout=1):
+                continue
+            generation = core_budget.generation
+            new_jobs = core_budget.share(name)
+            if new_jobs >= jobs * 1.5 and build.poll() is None:
+                print(f"[{name}] rebalancing from {jobs} to {new_jobs} parallel jobs")
+                build.stop()
+                restarted = True
+                break
+
+        if restarted:
+            build.wait(check=False)
+            continue
+        build.wait()
+        return
+
+
+@dataclass
+class BuildResult:
+    """
+    Outcome of a Dawn build.
+
+    Attributes:
+        fingerprint: Fingerprint of the build inputs, or None if it could not be computed
+        configured: Whether the CMake configure step ran
+        built: Whether the build and install steps ran
+        elapsed: Wall time of the build in seconds
+        compiler_cache_stats: Hit and miss counts of the compiler cache, if one was used
+        profile: Path to the build profile report, if the build left a ninja log
+        restored: Whether the install tree was restored from the artifact cache
+    """
+
+    fingerprint: Optional[str]
+    configured: bool
+    built: bool
+    elapsed: float
+    compiler_cache_stats: Optional[Dict[str, Any]] = None
+    profile: Optional[pathlib.Path] = None
+    restored: bool = False
+
+
+def build_fingerprint(
+    dawn_path: pathlib.Path,
+    target_config: TargetConfig,
+    flags: List[str],
+) -> Optional[str]:
+    """
+    Compute a fingerprint of everything that determines the output of a build.
+
+    The fingerprint covers the Dawn hash, the CMake wrapper the build is configured
+    through, the CMake flags, the generator, the compiler flag environment variables
+    and the identity of the toolchain (cmake, ninja and the compilers).
+
+    Args:
+        dawn_path: Path to the Dawn source directory
+        target_config: Target configuration for the build
+        flags: CMake flags used to configure the build
+
+    Returns:
+        Hex-encoded SHA-256 fingerprint, or None if the Dawn hash is unknown
+    """
+    dawn_hash = dawn_source.get_source_hash(dawn_path)
+    if not dawn_hash:
         return None
 
-    # Find matching SDK
-    for sdk in sdks:
-        if sdk.get("canonicalName") == sdk_name:
-            return sdk.get("sdkPath")
+    wrapper = dawn_path.parent / "CMakeLists.txt"
+    inputs = {
+        "dawn_hash": dawn_hash,
+        "cmake_wrapper": hashlib.sha256(wrapper.read_bytes()).hexdigest() if wrapper.exists() else None,
+        "target": str(target_config),
+        "cmake_flags": flags,
+        "environment": {name: os.environ[name] for name in _FINGERPRINT_ENVIRONMENT if name in os.environ},
+        "generator": target_config.build_tool,
+        "toolchain": toolchain.toolchain_identity(),
+    }
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode()).hexdigest()
+
+
+def configure_flags(dawn_path: pathlib.Path, target_config: TargetConfig) -> List[str]:
+    """
+    Get the CMake flags a build of the target is configured with.
+
+    Args:
+        dawn_path: Path to the Dawn source directory
+        target_config: Target configuration for the build
 
-    return None
+    Returns:
+        List of CMake flags
+    """
+    flags = cmake_flags(target_config)
+    if dawn_source.has_fetched_dependencies(dawn_path):
+        # The dependencies were fetched with the Dawn source, CMake need not fetch them again
+        flags.append("-DDAWN_FETCH_DEPENDENCIES=OFF")
+    return flags
+
+
+def installed_fingerprint(output_dir: pathlib.Path) -> Optional[str]:
+    """
+    Get the fingerprint of the build an install tree was produced by.
+
+    Args:
+        output_dir: The install directory
+
+    Returns:
+        The fingerprint, or None if the install tree is missing or incomplete
+    """
+    return _read_stamp(output_dir / _INSTALL_STAMP_NAME)
+
+
+def _read_stamp(stamp_file: pathlib.Path) -> Optional[str]:
+    """
+    Read a fingerprint stamp file.
+
+    Args:
+        stamp_file: Path to the stamp file
+
+    Returns:
+        The stored fingerprint, or None if there is no stamp
+    """
+    if not stamp_file.exists():
+        return None
+    return stamp_file.read_text().strip()
 
 
 def build_dawn(
-    dawn_path: pathlib.Path, output_dir: pathlib.Path, target_config: TargetConfig
-) -> None:
+    dawn_path: pathlib.Path,
+    output_dir: pathlib.Path,
+    target_config: TargetConfig,
+    core_budget: Optional[CoreBudget] = None,
+    log_file: Optional[pathlib.Path] = None,
+    force: bool = False,
+) -> BuildResult:
     """
     Build Dawn for the specified target configuration.
 
+    The inputs of the build are fingerprinted. The configure step is skipped if the
+    build directory was configured with the same fingerprint, and the whole build and
+    install are skipped if the install tree was produced with it.
+
     Args:
         dawn_path: Path to the Dawn source directory
         output_dir: Directory to install the built artifacts
         target_config: Target configuration for the build
+        core_budget: Budget to take the build parallelism from, for builds running
+            alongside others; the build tool picks its own parallelism if None
+        log_file: File to write the output of all stages to; if None, the output goes
+            to builds/<target>/build.log and the build output also to the console
+        force: Configure, build and install even if the fingerprints match
+
+    Returns:
+        BuildResult describing which steps ran
 
     Raises:
         CMakeError: If CMake or build commands fail
     """
-    print(f"Building Dawn for {target_config}")
+    start = time.monotonic()
 
     # Create builds directory if it doesn't exist
     builds_dir = pathlib.Path("builds")
@@ -299,49 +981,111 @@ def build_dawn(
     build_dir.mkdir(exist_ok=True, parents=True)
     output_dir.mkdir(exist_ok=True, parents=True)
 
-    flags = cmake_flags(target_config)
+    # All stages log to the build log; the build output also goes to the console
+    # unless the caller asked for a log file
+    echo = log_file is None
+    log_file = log_file or sdk_build_dir / "build.log"
+
+    flags = configure_flags(dawn_path, target_config)
 
-    cmake_exec = shutil.which("cmake", path=os.environ.get("PATH"))
+    cmake_tool = toolchain.find_tool("cmake")
+    if not cmake_tool:
+        raise CMakeError("cmake not found")
+    cmake_exec = cmake_tool.path
+    env = {**os.environ, **compiler_cache_environment(target_config)}
+
+    fingerprint = build_fingerprint(dawn_path, target_config, flags)
+    configure_stamp = sdk_build_dir / "configure.fingerprint"
+    install_stamp = output_dir / _INSTALL_STAMP_NAME
+
+    if not force and fingerprint and _read_stamp(install_stamp) == fingerprint:
+        print(f"Dawn for {target_config} is up to date ({fingerprint[:12]}), skipping build")
+        return BuildResult(fingerprint, False, False, time.monotonic() - start)
+
+    print(f"Building Dawn for {target_config}")
+    install_stamp.unlink(missing_ok=True)
+
+    launcher = compiler_cache_executable(target_config)
+    if launcher:
+        env.update(compiler_cache_stats_environment(target_config.compiler_cache, sdk_build_dir))
 
     # Use the CMakeLists.txt wrapper in the parent directory of dawn_source
     cmake_wrapper_path = dawn_path.parent
-    
-    # Run cmake command to create the build files
-    try:
-        subprocess.run(
-            [cmake_exec, f"-G{target_config.build_tool}", *flags, str(cmake_wrapper_path)],
-            env=os.environ,
-            cwd=build_dir,
-            capture_output=True,
-            text=True,
-            check=True,
-        )
-    except subprocess.CalledProcessError as e:
-        _subprocess_exception_message(e)
-        raise CMakeError
 
-    config = "Debug" if target_config.config == "debug" else "Release"
+    configure = (
+        force
+        or not fingerprint
+        or _read_stamp(configure_stamp) != fingerprint
+        or not (build_dir / "CMakeCache.txt").exists()
+    )
+    if configure:
+        configure_stamp.unlink(missing_ok=True)
+
+        # Run cmake command to create the build files
+        try:
+            subprocess_runner.run(
+                [cmake_exec, f"-G{target_config.build_tool}", *flags, str(cmake_wrapper_path)],
+                env=env,
+                cwd=build_dir,
+                log_file=log_file,
+                timeout=_CONFIGURE_TIMEOUT,
+                stall_timeout=_CONFIGURE_STALL_TIMEOUT,
+            )
+        except subprocess.CalledProcessError as e:
+            _subprocess_exception_message(e)
+            raise CMakeError
+
+        if fingerprint:
+            configure_stamp.write_text(fingerprint)
+    else:
+        print(f"Build directory for {target_config} is configured ({fingerprint[:12]}), skipping configure")
+
+    config = target_config.cmake_build_type()
+
+    cache_baseline = None
+    if launcher:
+        cache_baseline = start_compiler_cache_stats(launcher, target_config.compiler_cache, env)
+
+    # Only profile the steps of this build when the ninja log is appended to
+    ninja_log = build_dir / ".ninja_log"
+    ninja_log_offset = ninja_log.stat().st_size if ninja_log.exists() else 0
 
     # Run the cmake build command
+    build_command = [cmake_exec, "--build", ".", "--config", config]
     try:
-        subprocess.run(
-            [
-                cmake_exec,
-                "--build",
-                ".",
-                "--config",
-                config,
-            ],
-            cwd=build_dir,
-            check=True,
-        )
+        if core_budget:
+            core_budget.acquire(str(target_config))
+            try:
+                _run_budgeted_build(
+                    build_command, build_dir, str(target_config), core_budget, log_file, echo, env
+                )
+            finally:
+                core_budget.release(str(target_config))
+        else:
+            subprocess_runner.run(
+                build_command,
+                cwd=build_dir,
+                env=env,
+                log_file=log_file,
+                echo=echo,
+                stall_timeout=_BUILD_STALL_TIMEOUT,
+            )
     except subprocess.CalledProcessError as e:
         _subprocess_exception_message(e)
         raise CMakeBuildError
 
+    try:
+        profile = build_profiler.profile_build(
+            build_dir, sdk_build_dir, str(target_config), ninja_log_offset
+        )
+    except Exception as e:
+        # The profile is diagnostic: a failure must not fail a good build
+        print(f"Failed to profile the build of {target_config}: {e!r}")
+        profile = None
+
     # Install the library and headers
     try:
-        subprocess.run(
+        subprocess_runner.run(
             [
                 cmake_exec,
                 "--install",
@@ -351,14 +1095,24 @@ def build_dawn(
                 "--config",
                 config,
             ],
-            check=True,
-            capture_output=True,
-            text=True,
+            env=env,
+            log_file=log_file,
+            timeout=_INSTALL_TIMEOUT,
+            stall_timeout=_INSTALL_STALL_TIMEOUT,
         )
     except subprocess.CalledProcessError as e:
         _subprocess_exception_message(e)
         raise CMakeError
 
+    cache_stats = None
+    if launcher:
+        cache_stats = compiler_cache_stats(launcher, target_config.compiler_cache, env, cache_baseline)
+        if cache_stats:
+            print(
+                f"{cache_stats['tool']}: {cache_stats['hits']} hits, {cache_stats['misses']} misses "
+                f"({cache_stats['hitRate']:.1%} hit rate)"
+            )
+
     # Copy DirectX support files to output_dir/bin (Windows only)
     if target_config.os.is_windows():
         source_dir = build_dir / config
@@ -367,4 +1121,11 @@ def build_dawn(
             dest_dir.mkdir(exist_ok=True, parents=True)
             for item in source_dir.iterdir():
                 if item.is_file():
-                    shutil.copy2(item, dest_dir / item.name)
+                    file_links.link_or_copy(item, dest_dir / item.name)
+
+    if fingerprint:
+        install_stamp.write_text(fingerprint)
+
+    return BuildResult(
+        fingerprint, configure, True, time.monotonic() - start, cache_stats, profile
+    )
@@ -5,19 +5,56 @@
 # accordance with the terms of the Adobe license agreement accompanying
 # it.
 
+import ast
+import concurrent.futures
 import json
+import os
 import pathlib
+import posixpath
+import re
 import requests
+import requests.adapters
 import shutil
+import string
 import subprocess
+import subprocess_runner
 import sys
-from typing import Dict, Any, Tuple
+import time
+import tree_archive
+from dataclasses import asdict, dataclass
+from typing import Dict, Any, List, Optional, Tuple
 
 DAWN_GIT_URL = "https://dawn.googlesource.com/dawn"
 
+# Stamp file recording the Dawn hash of a source directory restored from a snapshot.
+_SOURCE_STAMP_NAME = ".swan-source.json"
+
+# Log files of the git commands and of Dawn's dependency fetch script.
+_GIT_LOG = subprocess_runner.LOG_DIR / "git.log"
+_DEPENDENCY_TOOL_LOG = subprocess_runner.LOG_DIR / "fetch_dawn_dependencies.log"
+
+# Wall-clock and no-output timeouts in seconds of git commands and of Dawn's
+# dependency fetch script.
+_GIT_TIMEOUT = 60 * 60
+_GIT_STALL_TIMEOUT = 15 * 60
+_DEPENDENCY_TOOL_TIMEOUT = 60 * 60
+_DEPENDENCY_TOOL_STALL_TIMEOUT = 15 * 60
+
+# Default size budget for the worktrees kept in the Dawn mirror cache.
+DEFAULT_MIRROR_CACHE_BUDGET = 20 * 1024 * 1024 * 1024
+
+# Minimum time in seconds between garbage collections of the mirror after evictions.
+_MIRROR_GC_INTERVAL = 24 * 60 * 60
+
+# Unreachable mirror objects younger than this are kept, so a concurrent fetch into the
+# mirror does not lose objects it has not pinned yet.
+_MIRROR_GC_PRUNE = "1.hour.ago"
+
+CHROMIUM_DASH_URL = "https://chromiumdash.appspot.com"
+
 # URL endpoint for latest release info from the Chromium version history page.
 # We arbitrarily select the Windows platform for fetching the information to reduce the payload size.
-_CHROMIUM_FETCH_VESION_URL = "https://chromiumdash.appspot.com/fetch_releases?channel={channel}&platform=Windows&num=1"
+_CHROMIUM_FETCH_VESION_URL = "{base_url}/fetch_releases?channel={channel}&platform=Windows&num=1"
 
 
 # fmt: off
@@ -28,30 +65,42 @@ class ChromiumVersionParseError(ChromiumVersionError): pass
 class GitOperationError(CiBuildDawnError): pass
 class DawnSourceDirectoryConfigurationError(CiBuildDawnError): pass
 class DawnSourceToolsDirectoryNotFoundError(DawnSourceDirectoryConfigurationError): pass
+class DawnMirrorCacheError(CiBuildDawnError): pass
 # fmt: on
 
 
-def get_matching_dawn_for_chromium(channel: str = "stable") -> None:
+def get_matching_dawn_for_chromium(
+    channel: str = "stable",
+    channels: Optional[List[str]] = None,
+    base_url: str = CHROMIUM_DASH_URL,
+) -> None:
     """
-    Get the Dawn version that matches the latest Chromium release for the given channel
-    and write the version data to the dawn_version.json file.
+    Get the Dawn versions that match the latest Chromium releases and write the version
+    data to the dawn_version.json file.
+
+    All requested channels are resolved concurrently. The top level of the version file
+    describes the selected channel, and the "channels" entry holds every resolved
+    channel.
 
     Args:
-        channel: The Chromium channel to use for fetching the latest version
+        channel: The Chromium channel whose Dawn version is selected
+        channels: The Chromium channels to resolve, only the selected channel by default
+        base_url: Base URL of the Chromium release dashboard
     """
+    channels = list(channels or [channel])
+    if channel not in channels:
+        channels.append(channel)
 
-    chromium_dawn_hash, chromium_dawn_version, chromium_dawn_suffix = (
-        get_latest_chromium_version(channel)
-    )
-    print(
-        f"Found Dawn matching Chromium version {chromium_dawn_version} ({chromium_dawn_hash})..."
-    )
+    releases = resolve_chromium_releases(channels, base_url=base_url)
+    for name, release in releases.items():
+        print(
+            f"Found Dawn matching Chromium {name} version {release['chromium_dawn_version']} "
+            f"({release['chromium_dawn_hash']})..."
+        )
 
     version_data = {
-        "chromium_dawn_hash": chromium_dawn_hash,
-        "chromium_dawn_version": chromium_dawn_version,
-        "chromium_dawn_suffix": chromium_dawn_suffix,
-        "chromium_channel": channel,
+        **releases[channel],
+        "channels": releases,
     }
 
     version_file = pathlib.Path("dawn_version.json")
@@ -71,12 +120,15 @@ def get_version() -> Dict[str, Any]:
         return json.load(f)
 
 
-def get_latest_chromium_version(channel: str = "stable") -> Tuple[str, str, str]:
+def get_latest_chromium_version(
+    channel: str = "stable", base_url: str = CHROMIUM_DASH_URL
+) -> Tuple[str, str, str]:
     """
     Get the version number of the most recently released version of Chromium.
 
     Args:
         channel: The Chromium channel to fetch version from
+        base_url: Base URL of the Chromium release dashboard
 
     Returns:
         Tuple containing (dawn_hash, version, suffix)
@@ -86,97 +138,1099 @@ def get_latest_chromium_version(channel: str = "stable") -> Tuple[str, str, str]
         ChromiumVersionParseError: If the response cannot be parsed
         ChromiumVersionError: If the version cannot be determined
     """
-    url = _CHROMIUM_FETCH_VESION_URL.format(channel=channel)
-    try:
-        response = requests.get(url)
-    except requests.exceptions.ConnectionError as e:
-        raise ChromiumVersionFetchError(e)
-    else:
-        if response.status_code != 200:
-            raise ChromiumVersionFetchError
+    release = resolve_chromium_releases([channel], base_url=base_url)[channel]
+    return (
+        release["chromium_dawn_hash"],
+        release["chromium_dawn_version"],
+        release["chromium_dawn_suffix"],
+    )
 
-    data = response.json()
-    try:
-        data = data.pop()
-    except IndexError as e:
-        raise ChromiumVersionParseError(f"JSON payload is unexpected: {data}")
-    except AttributeError:
+
+def resolve_chromium_releases(
+    channels: List[str],
+    base_url: str = CHROMIUM_DASH_URL,
+    cache_file: Optional[pathlib.Path] = None,
+    timeout: float = 10.0,
+    retries: int = 4,
+) -> Dict[str, Dict[str, str]]:
+    """
+    Resolve the latest Chromium release of several channels concurrently.
+
+    Requests share one pooled session and are retried with exponential backoff on
+    connection errors, timeouts and server errors. Responses are cached on disk and
+    revalidated with ETag / Last-Modified, so an unchanged release costs a 304.
+
+    Args:
+        channels: The Chromium channels to resolve
+        base_url: Base URL of the Chromium release dashboard
+        cache_file: Path of the response cache, in the shared cache directory by default
+        timeout: Timeout in seconds for each request
+        retries: Number of retries for a request after a failed attempt
+
+    Returns:
+        Mapping from channel to its version data
+
+    Raises:
+        ChromiumVersionFetchError: If a request fails
+        ChromiumVersionParseError: If a response cannot be parsed
+        ChromiumVersionError: If a version cannot be determined
+    """
+    cache_file = cache_file or get_cache_path() / "chromium_releases.json"
+    cache: Dict[str, Dict[str, Any]] = {}
+    if cache_file.exists():
+        try:
+            cache = json.loads(cache_file.read_text())
+        except json.JSONDecodeError:
+            cache = {}
+
+    with requests.Session() as session:
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=1, pool_maxsize=max(1, len(channels))
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, len(channels))) as executor:
+            futures = {
+                channel: executor.submit(
+                    _fetch_release,
+                    session,
+                    _CHROMIUM_FETCH_VESION_URL.format(base_url=base_url, channel=channel),
+                    cache,
+                    timeout,
+                    retries,
+                )
+                for channel in channels
+            }
+            responses = {channel: future.result() for channel, future in futures.items()}
+
+    cache_file.parent.mkdir(exist_ok=True, parents=True)
+    cache_file.write_text(json.dumps(cache, indent=2))
+
+    return {
+        channel: _parse_release(payload, channel) for channel, payload in responses.items()
+    }
+
+
+def _fetch_release(
+    session: requests.Session,
+    url: str,
+    cache: Dict[str, Dict[str, Any]],
+    timeout: float,
+    retries: int,
+) -> Any:
+    """
+    Fetch a release payload, revalidating a cached copy if there is one.
+
+    Args:
+        session: The pooled session to use
+        url: URL of the release payload
+        cache: Response cache, updated in place
+        timeout: Timeout in seconds for each request
+        retries: Number of retries after a failed attempt
+
+    Returns:
+        The decoded JSON payload
+
+    Raises:
+        ChromiumVersionFetchError: If the request fails
+        ChromiumVersionParseError: If the payload is not JSON
+    """
+    cached = cache.get(url)
+    headers = {}
+    if cached:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+    for attempt in range(retries + 1):
+        try:
+            response = session.get(url, headers=headers, timeout=timeout)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            error: Any = e
+        else:
+            if response.status_code == 304 and cached:
+                return cached["payload"]
+            if response.status_code == 200:
+                try:
+                    payload = response.json()
+                except ValueError:
+                    raise ChromiumVersionParseError(f"Response from {url} is not JSON")
+                cache[url] = {
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                    "payload": payload,
+                }
+                return payload
+            if response.status_code != 429 and response.status_code < 500:
+                raise ChromiumVersionFetchError(f"{url} returned HTTP {response.status_code}")
+            error = f"HTTP {response.status_code}"
+
+        if attempt < retries:
+            time.sleep(0.5 * 2**attempt)
+
+    raise ChromiumVersionFetchError(f"{url} failed after {retries + 1} attempts: {error}")
+
+
+def _parse_release(data: Any, channel: str) -> Dict[str, str]:
+    """
+    Extract the Dawn version data from a release payload.
+
+    Args:
+        data: The decoded release payload
+        channel: The Chromium channel of the payload
+
+    Returns:
+        Dictionary with the Dawn hash, Chromium version, tag suffix and channel
+
+    Raises:
+        ChromiumVersionParseError: If the payload cannot be parsed
+        ChromiumVersionError: If the version cannot be determined
+    """
+    if data is None:
         raise ChromiumVersionParseError("Response object is None")
+    if not isinstance(data, list) or not data:
+        raise ChromiumVersionParseError(f"JSON payload is unexpected: {data}")
 
     # Get version number from first (most recent) release
+    data = data[-1]
     version = data.get("version")
     if version is None:
         raise ChromiumVersionError("Could not determine latest Chromium version")
 
-    dawn_hash = data.get("hashes").get("dawn")
+    dawn_hash = data.get("hashes", {}).get("dawn")
+    if dawn_hash is None:
+        raise ChromiumVersionParseError(f"No Dawn hash in release {version}")
+
     suffix = f"chromium_{version}_{channel.lower()}_{dawn_hash}"
-    return dawn_hash, version, suffix
+    return {
+        "chromium_dawn_hash": dawn_hash,
+        "chromium_dawn_version": version,
+        "chromium_dawn_suffix": suffix,
+        "chromium_channel": channel,
+    }
+
+
+@dataclass
+class FetchStats:
+    """
+    Transfer statistics for a Dawn source fetch.
+
+    Attributes:
+        bytes_transferred: Growth of the git object store during the fetch
+        elapsed: Wall time of the fetch in seconds
+        updated_in_place: Whether an existing checkout was reused
+    """
+
+    bytes_transferred: int
+    elapsed: float
+    updated_in_place: bool
+
+    def __str__(self) -> str:
+        """
+        Get a human readable summary of the fetch.
+
+        Returns:
+            Summary string
+        """
+        mode = "updated in place" if self.updated_in_place else "fresh checkout"
+        return (
+            f"{self.bytes_transferred / (1024 * 1024):.1f} MiB transferred "
+            f"in {self.elapsed:.1f}s ({mode})"
+        )
+
+
+def _git(args: List[str], cwd: pathlib.Path, error: str) -> str:
+    """
+    Run a git command and return its stdout.
+
+    The output is appended to the git log as it is produced. Commands that exceed the
+    git timeouts are stopped.
+
+    Args:
+        args: Arguments to pass to git
+        cwd: Working directory for the command
+        error: Message prefix used if the command fails
+
+    Returns:
+        The stripped stdout of the command
+
+    Raises:
+        GitOperationError: If the command fails or times out
+    """
+    try:
+        result = subprocess_runner.run(
+            ["git", *args],
+            cwd=cwd,
+            log_file=_GIT_LOG,
+            timeout=_GIT_TIMEOUT,
+            stall_timeout=_GIT_STALL_TIMEOUT,
+            capture_stdout=True,
+        )
+    except subprocess.CalledProcessError as e:
+        raise GitOperationError(f"{error}: {e}\n{e.stdout}")
+    return result.stdout.strip()
+
+
+def _directory_size(path: pathlib.Path) -> int:
+    """
+    Compute the total size of all files below a directory.
+
+    Args:
+        path: Directory to measure
+
+    Returns:
+        Size in bytes, 0 if the directory does not exist
+    """
+    if not path.exists():
+        return 0
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file() and not f.is_symlink())
+
+
+def _fetch_commit(
+    dest_dir: pathlib.Path, hash: str, shallow: bool, blobless: bool
+) -> None:
+    """
+    Fetch a single commit from origin into an existing repository and check it out.
+
+    Args:
+        dest_dir: Path to the git repository
+        hash: The git hash to fetch and checkout
+        shallow: Whether to fetch at depth 1
+        blobless: Whether to fetch with a blob:none filter
+    """
+    fetch_args = ["fetch", "--no-tags", "--progress"]
+    if shallow:
+        fetch_args.append("--depth=1")
+    if blobless:
+        fetch_args.append("--filter=blob:none")
+    _git([*fetch_args, "origin", hash], dest_dir, f"Failed to fetch Dawn commit {hash}")
+    _git(
+        ["checkout", "--force", "--detach", "FETCH_HEAD"],
+        dest_dir,
+        "Failed to checkout Dawn repository",
+    )
 
 
-def fetch_dawn_source(hash: str) -> None:
+def fetch_dawn_source(
+    hash: str,
+    shallow: bool = True,
+    blobless: bool = False,
+    url: str = DAWN_GIT_URL,
+    dependency_jobs: int = 8,
+) -> FetchStats:
     """
-    Clone the Dawn repository and checkout specified branch
+    Fetch the Dawn repository at the specified hash.
+
+    By default only the requested commit is fetched, at depth 1. If a checkout already
+    exists it is updated in place instead of being removed and cloned again.
 
     Args:
         hash: The git hash to checkout
+        shallow: Fetch only the requested commit instead of the full history
+        blobless: Fetch with a blob:none filter, downloading file contents on checkout
+        url: URL of the Dawn git repository
+        dependency_jobs: Maximum number of dependencies fetched at the same time
+
+    Returns:
+        FetchStats describing the transfer
 
     Raises:
         GitOperationError for failed git operations
         DawnSourceDirectoryConfigurationError, DawnSourceToolsDirectoryNotFoundError, for Dawn Source directory errors
     """
-    # Remove destination directory if it exists
+    start = time.monotonic()
     dest_dir = get_dawn_path()
-    if dest_dir.exists():
-        shutil.rmtree(dest_dir)
+    git_dir = dest_dir / ".git"
 
-    # Clone the repository
-    try:
-        subprocess.run(
-            ["git", "clone", DAWN_GIT_URL, str(dest_dir)],
-            check=True,
-            capture_output=True,
-            text=True,
+    updated_in_place = git_dir.is_dir()
+    if updated_in_place:
+        _git(["remote", "set-url", "origin", url], dest_dir, "Failed to set Dawn remote")
+    else:
+        # Not a git checkout (or a link into the mirror cache), start over
+        _remove_dawn_directory(dest_dir)
+
+    size_before = _directory_size(git_dir)
+
+    if updated_in_place:
+        head = _git(["rev-parse", "HEAD"], dest_dir, "Failed to read Dawn HEAD")
+        if head != hash:
+            _fetch_commit(dest_dir, hash, shallow, blobless)
+    elif shallow or blobless:
+        dest_dir.mkdir(parents=True)
+        _git(["init", "--quiet"], dest_dir, "Failed to initialize Dawn repository")
+        _git(["remote", "add", "origin", url], dest_dir, "Failed to add Dawn remote")
+        _fetch_commit(dest_dir, hash, shallow, blobless)
+    else:
+        _git(["clone", "--progress", url, str(dest_dir)], dest_dir.parent, "Failed to clone Dawn repository")
+        _git(["checkout", hash], dest_dir, "Failed to checkout Dawn repository")
+
+    bytes_transferred = max(0, _directory_size(git_dir) - size_before)
+    fetch_dawn_dependencies(dest_dir, jobs=dependency_jobs)
+
+    return FetchStats(
+        bytes_transferred=bytes_transferred,
+        elapsed=time.monotonic() - start,
+        updated_in_place=updated_in_place,
+    )
+
+
+def fetch_dawn_source_from_mirror(
+    hash: str,
+    cache_dir: pathlib.Path,
+    budget: int = DEFAULT_MIRROR_CACHE_BUDGET,
+    url: str = DAWN_GIT_URL,
+    dependency_jobs: int = 8,
+) -> FetchStats:
+    """
+    Fetch the Dawn source at the specified hash through a local mirror cache.
+
+    The cache holds a bare mirror of the Dawn repository that accumulates objects across
+    hashes, and one git worktree per hash. The Dawn source directory is linked to the
+    worktree for the requested hash, so switching between previously fetched hashes only
+    costs creating a link. Least recently used worktrees are evicted once their combined
+    size exceeds the budget.
+
+    Args:
+        hash: The git hash to checkout
+        cache_dir: Directory holding the mirror and its worktrees
+        budget: Size budget in bytes for the worktrees kept in the cache
+        url: URL of the Dawn git repository the mirror fetches from
+        dependency_jobs: Maximum number of dependencies fetched at the same time
+
+    Returns:
+        FetchStats describing the transfer into the mirror
+
+    Raises:
+        GitOperationError for failed git operations
+        DawnMirrorCacheError if the Dawn source directory cannot be linked to the cache
+        DawnSourceDirectoryConfigurationError, DawnSourceToolsDirectoryNotFoundError, for Dawn Source directory errors
+    """
+    start = time.monotonic()
+    mirror_dir = cache_dir / "dawn.git"
+    worktree_dir = cache_dir / "worktrees" / hash
+
+    size_before = _directory_size(mirror_dir)
+    _update_mirror(mirror_dir, hash, url)
+    bytes_transferred = max(0, _directory_size(mirror_dir) - size_before)
+
+    updated_in_place = (worktree_dir / ".git").exists()
+    if not updated_in_place:
+        _git(["worktree", "prune"], mirror_dir, "Failed to prune Dawn worktrees")
+        if worktree_dir.exists():
+            shutil.rmtree(worktree_dir)
+        _git(
+            ["worktree", "add", "--detach", "--force", str(worktree_dir), hash],
+            mirror_dir,
+            f"Failed to create Dawn worktree for {hash}",
         )
-    except subprocess.CalledProcessError as e:
-        raise GitOperationError(f"Failed to clone Dawn repository: {e.stderr}")
 
-    # Checkout the specified hash
+    dest_dir = get_dawn_path()
+    _remove_dawn_directory(dest_dir)
+    _link_directory(worktree_dir, dest_dir)
+
+    fetch_dawn_dependencies(worktree_dir, jobs=dependency_jobs)
+
+    _touch_worktree(cache_dir, hash)
+    evict_mirror_worktrees(cache_dir, budget, keep=[hash])
+
+    return FetchStats(
+        bytes_transferred=bytes_transferred,
+        elapsed=time.monotonic() - start,
+        updated_in_place=updated_in_place,
+    )
+
+
+def _update_mirror(mirror_dir: pathlib.Path, hash: str, url: str) -> None:
+    """
+    Make sure the bare mirror exists and contains the requested commit.
+
+    The commit is pinned with a ref under refs/swan/ so later garbage collection in the
+    mirror keeps its objects.
+
+    Args:
+        mirror_dir: Path to the bare mirror repository
+        hash: The git hash that must be present
+        url: URL of the Dawn git repository
+    """
+    if not mirror_dir.exists():
+        mirror_dir.mkdir(parents=True)
+        _git(["init", "--quiet", "--bare"], mirror_dir, "Failed to initialize Dawn mirror")
+        _git(["remote", "add", "origin", url], mirror_dir, "Failed to add Dawn mirror remote")
+    else:
+        _git(["remote", "set-url", "origin", url], mirror_dir, "Failed to set Dawn mirror remote")
+
     try:
-        subprocess.run(
-            ["git", "checkout", hash],
-            check=True,
-            capture_output=True,
-            text=True,
-            cwd=str(dest_dir),
+        _git(["cat-file", "-e", f"{hash}^{{commit}}"], mirror_dir, "Commit not in mirror")
+    except GitOperationError:
+        _git(
+            ["fetch", "--no-tags", "--progress", "origin", hash],
+            mirror_dir,
+            f"Failed to fetch Dawn commit {hash} into the mirror",
         )
-    except subprocess.CalledProcessError as e:
-        raise GitOperationError(f"Failed to checkout Dawn repository: {e.stderr}")
+    _git(["update-ref", f"refs/swan/{hash}", hash], mirror_dir, "Failed to pin Dawn commit")
+
+
+def _worktree_index_path(cache_dir: pathlib.Path) -> pathlib.Path:
+    """
+    Get the path of the file recording when each cached worktree was last used.
+
+    Args:
+        cache_dir: Directory holding the mirror and its worktrees
+
+    Returns:
+        Path to the worktree index file
+    """
+    return cache_dir / "worktrees.json"
+
+
+def _read_worktree_index(cache_dir: pathlib.Path) -> Dict[str, float]:
+    """
+    Read the last-used times of the cached worktrees.
+
+    Args:
+        cache_dir: Directory holding the mirror and its worktrees
+
+    Returns:
+        Mapping from Dawn hash to last-used timestamp
+    """
+    index_file = _worktree_index_path(cache_dir)
+    if not index_file.exists():
+        return {}
+    try:
+        return json.loads(index_file.read_text())
+    except json.JSONDecodeError:
+        return {}
+
+
+def _touch_worktree(cache_dir: pathlib.Path, hash: str) -> None:
+    """
+    Record that the worktree for a hash has just been used.
+
+    Args:
+        cache_dir: Directory holding the mirror and its worktrees
+        hash: The Dawn hash of the worktree
+    """
+    index = _read_worktree_index(cache_dir)
+    index[hash] = time.time()
+    _worktree_index_path(cache_dir).write_text(json.dumps(index, indent=2))
+
+
+def evict_mirror_worktrees(
+    cache_dir: pathlib.Path, budget: int, keep: Optional[List[str]] = None
+) -> List[str]:
+    """
+    Remove least recently used worktrees until the cached worktrees fit the budget.
+
+    The refs pinning the commits of evicted worktrees are deleted, and the mirror is
+    garbage collected at most once per _MIRROR_GC_INTERVAL, so the objects only
+    those commits used are dropped and the mirror does not grow without bound.
+
+    Args:
+        cache_dir: Directory holding the mirror and its worktrees
+        budget: Size budget in bytes for the worktrees
+        keep: Hashes whose worktrees must not be evicted
+
+    Returns:
+        List of evicted Dawn hashes
+    """
+    keep = keep or []
+    worktrees_dir = cache_dir / "worktrees"
+    if not worktrees_dir.exists():
+        return []
+
+    index = _read_worktree_index(cache_dir)
+    sizes = {
+        worktree.name: _directory_size(worktree)
+        for worktree in worktrees_dir.iterdir()
+        if worktree.is_dir()
+    }
+
+    total = sum(sizes.values())
+    evicted = []
+    for hash in sorted(sizes, key=lambda h: index.get(h, 0.0)):
+        if total <= budget:
+            break
+        if hash in keep:
+            continue
+        print(f"Evicting cached Dawn worktree {hash} ({sizes[hash] / (1024 * 1024):.1f} MiB)")
+        shutil.rmtree(worktrees_dir / hash)
+        index.pop(hash, None)
+        total -= sizes[hash]
+        evicted.append(hash)
+
+    if evicted:
+        mirror_dir = cache_dir / "dawn.git"
+        for hash in evicted:
+            _git(["update-ref", "-d", f"refs/swan/{hash}"], mirror_dir, f"Failed to unpin Dawn commit {hash}")
+        _git(["worktree", "prune"], mirror_dir, "Failed to prune Dawn worktrees")
+        _worktree_index_path(cache_dir).write_text(json.dumps(index, indent=2))
+
+        gc_stamp = mirror_dir / "swan-gc"
+        if not gc_stamp.exists() or time.time() - gc_stamp.stat().st_mtime > _MIRROR_GC_INTERVAL:
+            print("Garbage collecting the Dawn mirror")
+            _git(["gc", "--quiet", f"--prune={_MIRROR_GC_PRUNE}"], mirror_dir, "Failed to garbage collect the Dawn mirror")
+            gc_stamp.touch()
+    return evicted
+
+
+def _is_link(path: pathlib.Path) -> bool:
+    """
+    Check whether a path is a symbolic link or a Windows directory junction.
+
+    Args:
+        path: Path to check
+
+    Returns:
+        True if the path is a link
+    """
+    try:
+        os.readlink(path)
+    except (OSError, ValueError):
+        return False
+    return True
+
+
+def _link_directory(target: pathlib.Path, link: pathlib.Path) -> None:
+    """
+    Create a directory link, using a junction on Windows where symlinks need privileges.
+
+    Args:
+        target: Directory the link points to
+        link: Path of the link to create
+
+    Raises:
+        DawnMirrorCacheError: If the link cannot be created
+    """
+    try:
+        if os.name == "nt":
+            import _winapi
+
+            _winapi.CreateJunction(str(target.resolve()), str(link))
+        else:
+            os.symlink(target.resolve(), link, target_is_directory=True)
+    except OSError as e:
+        raise DawnMirrorCacheError(f"Failed to link {link} to {target}: {e}")
+
+
+def _remove_dawn_directory(path: pathlib.Path) -> None:
+    """
+    Remove a Dawn source directory, or only the link if it points into the mirror cache.
+
+    Args:
+        path: Path to the Dawn source directory
+    """
+    if _is_link(path):
+        if os.name == "nt":
+            os.rmdir(path)
+        else:
+            os.unlink(path)
+    elif path.exists():
+        shutil.rmtree(path)
+
+
+@dataclass
+class DependencyFetchResult:
+    """
+    Result of fetching one third party dependency.
+
+    Attributes:
+        path: Path of the dependency relative to the Dawn checkout
+        url: Git URL the dependency was fetched from
+        commit: The commit that was checked out
+        elapsed: Wall time of the fetch in seconds, including retries
+        size: Size of the checked out dependency in bytes
+        attempts: Number of attempts that were needed
+        up_to_date: Whether the dependency was already at the right commit
+    """
+
+    path: str
+    url: str
+    commit: str
+    elapsed: float
+    size: int
+    attempts: int
+    up_to_date: bool
+
+
+def _parse_deps_file(deps_file: pathlib.Path) -> Dict[str, Any]:
+    """
+    Evaluate a gclient DEPS file.
+
+    Args:
+        deps_file: Path to the DEPS file
+
+    Returns:
+        Dictionary of the variables defined by the DEPS file
+    """
+    deps_globals = {
+        "Var": lambda name: f"{{{name}}}",
+        "Str": str,
+    }
+    deps_locals: Dict[str, Any] = {}
+    exec(deps_file.read_text(), deps_globals, deps_locals)
+    return deps_locals
+
+
+def _required_dependencies(dawn_dir: pathlib.Path) -> Optional[List[str]]:
+    """
+    Read the list of dependencies Dawn requires for a CMake build.
+
+    The list is taken from Dawn's own tools/fetch_dawn_dependencies.py, so it follows
+    the Dawn revision that is checked out.
+
+    Args:
+        dawn_dir: Path to the Dawn checkout
+
+    Returns:
+        List of dependency paths, or None if the list cannot be found
+
+    Raises:
+        DawnSourceToolsDirectoryNotFoundError: If the Dawn tools script is missing
+    """
+    dawn_source_tools = dawn_dir / "tools" / "fetch_dawn_dependencies.py"
+    if not dawn_source_tools.exists():
+        raise DawnSourceToolsDirectoryNotFoundError(dawn_source_tools)
+
+    tree = ast.parse(dawn_source_tools.read_text())
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.Assign):
+            continue
+        for target in node.targets:
+            if isinstance(target, ast.Name) and target.id == "required_submodules":
+                try:
+                    return list(ast.literal_eval(node.value))
+                except ValueError:
+                    return None
+    return None
+
+
+def _expand_deps_vars(
+    value: str, variables: Dict[str, Any], deps_file: pathlib.Path, expanding: Tuple[str, ...] = ()
+) -> str:
+    """
+    Expand the Var() references of a DEPS string.
+
+    The variables a string references are expanded first and the string is then
+    formatted once, so escaped braces stay literal.
+
+    Args:
+        value: The string to expand
+        variables: The vars dictionary of the DEPS file
+        deps_file: Path to the DEPS file, for error messages
+        expanding: Variables being expanded, to detect cycles
+
+    Returns:
+        The expanded string
+
+    Raises:
+        DawnSourceDirectoryConfigurationError: If a variable is undefined or references
+            itself, or the string is malformed
+    """
+    try:
+        names = [name for _, name, _, _ in string.Formatter().parse(value) if name is not None]
+        values = {}
+        for name in names:
+            if name in expanding:
+                raise DawnSourceDirectoryConfigurationError(f"Variable {name} references itself in {deps_file}")
+            if name not in variables:
+                raise DawnSourceDirectoryConfigurationError(f"Undefined variable {name!r} in {deps_file}")
+            values[name] = _expand_deps_vars(str(variables[name]), variables, deps_file, (*expanding, name))
+        return value.format(**values)
+    except (ValueError, IndexError, KeyError) as e:
+        raise DawnSourceDirectoryConfigurationError(f"Cannot expand {value!r} in {deps_file}: {e!r}")
+
+
+def _dependency_url(spec: Any, variables: Dict[str, Any], deps_file: pathlib.Path) -> Optional[Tuple[str, str]]:
+    """
+    Resolve the git URL and commit of a DEPS entry.
+
+    Args:
+        spec: The DEPS entry, either a "url@commit" string or a dictionary
+        variables: The vars dictionary of the DEPS file
+        deps_file: Path to the DEPS file, for error messages
+
+    Returns:
+        Tuple of (url, commit), or None if the entry is not a git dependency
+
+    Raises:
+        DawnSourceDirectoryConfigurationError: If the URL references an undefined variable
+    """
+    if isinstance(spec, dict):
+        if spec.get("dep_type", "git") != "git" or "url" not in spec:
+            return None
+        spec = spec["url"]
+    url = _expand_deps_vars(spec, variables, deps_file)
+    if "@" not in url:
+        return None
+    url, commit = url.rsplit("@", 1)
+    return url, commit
+
+
+def _fetch_dependency(
+    dep_dir: pathlib.Path, relative_path: str, url: str, commit: str, retries: int
+) -> DependencyFetchResult:
+    """
+    Fetch a single dependency at depth 1, retrying transient failures.
+
+    Args:
+        dep_dir: Directory to check the dependency out into
+        relative_path: Path of the dependency relative to the Dawn checkout
+        url: Git URL of the dependency
+        commit: Commit to check out
+        retries: Number of retries after the first failed attempt
+
+    Returns:
+        DependencyFetchResult for the dependency
+
+    Raises:
+        DawnSourceDirectoryConfigurationError: If all attempts fail
+    """
+    start = time.monotonic()
+    if (dep_dir / ".git").is_dir():
+        try:
+            head = _git(["rev-parse", "HEAD"], dep_dir, "Failed to read HEAD")
+        except GitOperationError:
+            head = None
+        if head == commit:
+            return DependencyFetchResult(
+                relative_path, url, commit, time.monotonic() - start, _directory_size(dep_dir), 0, True
+            )
+    else:
+        if dep_dir.exists():
+            shutil.rmtree(dep_dir)
+        dep_dir.mkdir(parents=True)
+        _git(["init", "--quiet"], dep_dir, f"Failed to initialize {relative_path}")
+
+    for attempt in range(1, retries + 2):
+        try:
+            _git(
+                ["fetch", "--no-tags", "--depth=1", url, commit],
+                dep_dir,
+                f"Failed to fetch {relative_path}",
+            )
+            _git(
+                ["checkout", "--force", "--detach", "FETCH_HEAD"],
+                dep_dir,
+                f"Failed to checkout {relative_path}",
+            )
+            break
+        except GitOperationError as e:
+            if attempt > retries:
+                raise DawnSourceDirectoryConfigurationError(
+                    f"Failed to fetch Dawn dependency after {attempt} attempts: {e}"
+                )
+            delay = 2 ** (attempt - 1)
+            print(f"  {relative_path}: attempt {attempt} failed, retrying in {delay}s")
+            time.sleep(delay)
+
+    return DependencyFetchResult(
+        relative_path, url, commit, time.monotonic() - start, _directory_size(dep_dir), attempt, False
+    )
+
+
+def _dependency_jobs(
+    dawn_dir: pathlib.Path, base_dir: pathlib.Path, required: List[str]
+) -> List[Tuple[pathlib.Path, str, str, str]]:
+    """
+    List the required dependencies declared in the DEPS file of a directory.
+
+    Args:
+        dawn_dir: Path to the Dawn checkout
+        base_dir: Directory whose DEPS file is read
+        required: Dependency paths Dawn requires
+
+    Returns:
+        List of (directory, path relative to the Dawn checkout, url, commit) tuples
+
+    Raises:
+        DawnSourceDirectoryConfigurationError: If a dependency URL cannot be resolved
+    """
+    deps_file = base_dir / "DEPS"
+    if not deps_file.is_file():
+        return []
+
+    deps_data = _parse_deps_file(deps_file)
+    deps = deps_data.get("deps", {})
+    variables = deps_data.get("vars", {})
+
+    # Dependency paths are relative to the DEPS file with use_relative_paths, and
+    # relative to the checkout root otherwise
+    root = base_dir if deps_data.get("use_relative_paths") else dawn_dir
+    root_path = root.relative_to(dawn_dir).as_posix()
+
+    required_paths = set(required)
+    jobs = []
+    for dep_path, spec in deps.items():
+        relative_path = posixpath.normpath(posixpath.join(root_path, dep_path))
+        if relative_path not in required_paths:
+            continue
+        resolved = _dependency_url(spec, variables, deps_file)
+        if resolved is None:
+            continue
+        jobs.append((dawn_dir / relative_path, relative_path, *resolved))
+    return jobs
+
+
+def fetch_dawn_dependencies(
+    dawn_dir: pathlib.Path, jobs: int = 8, retries: int = 2
+) -> List[DependencyFetchResult]:
+    """
+    Fetch the third party dependencies of a Dawn checkout concurrently.
+
+    The DEPS file of the checkout is read directly and each required dependency is
+    fetched at depth 1 on a bounded thread pool. Dependencies that declare DEPS files of
+    their own are processed once they are checked out. Progress, durations and sizes
+    are printed as each dependency finishes, and a summary is written to the Dawn
+    checkout so the CMake configure step does not fetch the dependencies again.
+
+    Args:
+        dawn_dir: Path to the Dawn checkout
+        jobs: Maximum number of dependencies fetched at the same time
+        retries: Number of retries for a dependency after a failed attempt
+
+    Returns:
+        List of DependencyFetchResult, in completion order
+
+    Raises:
+        DawnSourceDirectoryConfigurationError, DawnSourceToolsDirectoryNotFoundError, for Dawn Source directory errors
+    """
+    required = _required_dependencies(dawn_dir)
+    if required is None:
+        # Unknown layout of the Dawn tools script, let it fetch the dependencies itself
+        _run_dawn_dependency_tool(dawn_dir)
+        return []
+
+    start = time.monotonic()
+    results: List[DependencyFetchResult] = []
+    pending = _dependency_jobs(dawn_dir, dawn_dir, required)
+    scheduled = {rel for _, rel, _, _ in pending}
+    total = len(pending)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = {
+            executor.submit(_fetch_dependency, dep_dir, rel, url, commit, retries): dep_dir
+            for dep_dir, rel, url, commit in pending
+        }
+        while futures:
+            done, _ = concurrent.futures.wait(
+                futures, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            for future in done:
+                dep_dir = futures.pop(future)
+                result = future.result()
+                results.append(result)
+                status = (
+                    "up to date"
+                    if result.up_to_date
+                    else f"fetched in {result.elapsed:.1f}s"
+                )
+                print(
+                    f"[{len(results)}/{total}] {result.path} {status} "
+                    f"({result.size / (1024 * 1024):.1f} MiB)"
+                )
+
+                for child_dir, rel, url, commit in _dependency_jobs(dawn_dir, dep_dir, required):
+                    # The first declaration of a dependency wins, as with gclient
+                    if rel in scheduled:
+                        continue
+                    scheduled.add(rel)
+                    total += 1
+                    child = executor.submit(_fetch_dependency, child_dir, rel, url, commit, retries)
+                    futures[child] = child_dir
+
+    total_size = sum(result.size for result in results)
+    print(
+        f"Fetched {len(results)} Dawn dependencies ({total_size / (1024 * 1024):.1f} MiB) "
+        f"in {time.monotonic() - start:.1f}s"
+    )
+
+    _dependency_stamp_path(dawn_dir).write_text(
+        json.dumps([asdict(result) for result in results], indent=2)
+    )
+    return results
 
+
+def _dependency_stamp_path(dawn_dir: pathlib.Path) -> pathlib.Path:
+    """
+    Get the path of the file listing the dependencies fetched into a Dawn checkout.
+
+    Args:
+        dawn_dir: Path to the Dawn checkout
+
+    Returns:
+        Path to the dependency stamp file
+    """
+    return dawn_dir / ".swan-dependencies.json"
+
+
+def has_fetched_dependencies(dawn_dir: pathlib.Path) -> bool:
+    """
+    Check whether the dependencies of a Dawn checkout were fetched by these scripts.
+
+    Args:
+        dawn_dir: Path to the Dawn checkout
+
+    Returns:
+        True if the dependencies are present and need not be fetched by CMake
+    """
+    return _dependency_stamp_path(dawn_dir).exists()
+
+
+def _run_dawn_dependency_tool(dest_dir: pathlib.Path) -> None:
+    """
+    Fetch the third party dependencies of a Dawn checkout with Dawn's own script.
+
+    Args:
+        dest_dir: Path to the Dawn checkout
+
+    Raises:
+        DawnSourceDirectoryConfigurationError, DawnSourceToolsDirectoryNotFoundError, for Dawn Source directory errors
+    """
     # Verify Dawn tools directory and fetch dawn dependencies
     dawn_source_tools = dest_dir / "tools" / "fetch_dawn_dependencies.py"
     if not dawn_source_tools.exists():
         raise DawnSourceToolsDirectoryNotFoundError(dawn_source_tools)
 
     try:
-        subprocess.run(
+        subprocess_runner.run(
             [sys.executable, "-B", dawn_source_tools, "-d", str(dest_dir)],
-            check=True,
-            capture_output=True,
-            text=True,
+            log_file=_DEPENDENCY_TOOL_LOG,
+            timeout=_DEPENDENCY_TOOL_TIMEOUT,
+            stall_timeout=_DEPENDENCY_TOOL_STALL_TIMEOUT,
         )
     except subprocess.CalledProcessError as e:
         raise DawnSourceDirectoryConfigurationError(
-            f"Failed to fetch Dawn dependencies: {e.stderr}"
+            f"Failed to fetch Dawn dependencies: {e}\n{e.stdout}"
         )
 
 
+def get_source_hash(dawn_dir: pathlib.Path) -> Optional[str]:
+    """
+    Get the Dawn hash of a source directory.
+
+    Checkouts are asked for their HEAD; source directories restored from a snapshot
+    carry the hash in a stamp file instead.
+
+    Args:
+        dawn_dir: Path to the Dawn source directory
+
+    Returns:
+        The Dawn hash, or None if it cannot be determined
+    """
+    if (dawn_dir / ".git").exists():
+        try:
+            return _git(["rev-parse", "HEAD"], dawn_dir, "Failed to read Dawn HEAD")
+        except GitOperationError:
+            pass
+
+    stamp = dawn_dir / _SOURCE_STAMP_NAME
+    if stamp.exists():
+        return json.loads(stamp.read_text()).get("dawn_hash")
+    return None
+
+
+def snapshot_dawn_source(output_dir: pathlib.Path, hash: Optional[str] = None) -> pathlib.Path:
+    """
+    Pack the Dawn source directory, including its fetched dependencies, into an archive.
+
+    Git metadata is left out. The archive is a zstd-compressed tarball named after the
+    Dawn hash and the SHA-256 digest of its content, which restore_dawn_source checks.
+
+    Args:
+        output_dir: Directory to write the archive to
+        hash: The Dawn hash of the source; read from the checkout if not given
+
+    Returns:
+        Path to the created archive
+
+    Raises:
+        DawnSourceDirectoryConfigurationError: If the source is missing or its hash is unknown
+    """
+    dawn_dir = get_dawn_path()
+    if not dawn_dir.exists():
+        raise DawnSourceDirectoryConfigurationError(f"No Dawn source at {dawn_dir}")
+
+    hash = hash or get_source_hash(dawn_dir)
+    if not hash:
+        raise DawnSourceDirectoryConfigurationError("Could not determine the Dawn hash to snapshot")
+
+    partial_path = output_dir / f"dawn_source_{hash}.partial"
+    digest = tree_archive.pack_tree(
+        dawn_dir,
+        partial_path,
+        exclude_names=(".git", _SOURCE_STAMP_NAME),
+        extra_files={_SOURCE_STAMP_NAME: json.dumps({"dawn_hash": hash}, indent=2).encode()},
+    )
+
+    archive_path = output_dir / f"dawn_source_{hash}_{digest}.tar.zst"
+    partial_path.replace(archive_path)
+    return archive_path
+
+
+def find_dawn_source_snapshot(snapshot_dir: pathlib.Path, hash: str) -> pathlib.Path:
+    """
+    Find the snapshot archive for a Dawn hash.
+
+    Args:
+        snapshot_dir: Directory holding snapshot archives
+        hash: The Dawn hash
+
+    Returns:
+        Path to the most recent matching archive
+
+    Raises:
+        DawnSourceDirectoryConfigurationError: If there is no snapshot for the hash
+    """
+    candidates = sorted(
+        snapshot_dir.glob(f"dawn_source_{hash}_*.tar.zst"),
+        key=lambda path: path.stat().st_mtime,
+    )
+    if not candidates:
+        raise DawnSourceDirectoryConfigurationError(
+            f"No Dawn source snapshot for {hash} in {snapshot_dir}"
+        )
+    return candidates[-1]
+
+
+def restore_dawn_source(archive_path: pathlib.Path) -> str:
+    """
+    Restore the Dawn source directory from a snapshot archive.
+
+    The archive is extracted as a stream and its content digest is verified against the
+    one in its name before it replaces the Dawn source directory.
+
+    Args:
+        archive_path: Path to an archive written by snapshot_dawn_source
+
+    Returns:
+        The Dawn hash of the restored source
+
+    Raises:
+        DawnSourceDirectoryConfigurationError: If the archive name is not a snapshot name
+        TreeArchiveError, TreeArchiveIntegrityError: If the archive is unreadable or corrupt
+    """
+    match = re.fullmatch(r"dawn_source_([0-9a-f]+)_([0-9a-f]{64})\.tar\.zst", archive_path.name)
+    if not match:
+        raise DawnSourceDirectoryConfigurationError(
+            f"{archive_path.name} is not a Dawn source snapshot"
+        )
+    hash, digest = match.groups()
+
+    dest_dir = get_dawn_path()
+    restored_dir = dest_dir.with_name(dest_dir.name + ".restored")
+    tree_archive.unpack_tree(archive_path, restored_dir, digest)
+    _remove_dawn_directory(dest_dir)
+    restored_dir.rename(dest_dir)
+    return hash
+
+
 def remove_dawn_source() -> None:
     """
     Remove the Dawn source directory and version file.
     """
-    dawn_source_dir = get_dawn_path()
-    if dawn_source_dir.exists():
-        shutil.rmtree(dawn_source_dir)
+    _remove_dawn_directory(get_dawn_path())
 
     version_file = pathlib.Path("dawn_version.json")
     if version_file.exists():
@@ -190,4 +1244,19 @@ def get_dawn_path() -> pathlib.Path:
     Returns:
         Path to the Dawn source directory
     """
-    return pathlib.Path("dawn_source").resolve()
+    return pathlib.Path("dawn_source").absolute()
+
+
+def get_cache_path() -> pathlib.Path:
+    """
+    Get the path to the persistent cache directory shared between builds.
+
+    The location can be overridden with the SWAN_DAWN_CACHE environment variable.
+
+    Returns:
+        Path to the cache directory
+    """
+    cache_dir = os.environ.get("SWAN_DAWN_CACHE")
+    if cache_dir:
+        return pathlib.Path(cache_dir).absolute()
+    return pathlib.Path.home() / ".cache" / "swan-dawn"
@@ -0,0 +1,83 @@
+# Copyright 2025 Adobe
+# All Rights Reserved.
+#
+# NOTICE: Adobe permits you to use, modify, and distribute this file in
+# accordance with the terms of the Adobe license agreement accompanying
+# it.
+
+import ctypes
+import ctypes.util
+import os
+import pathlib
+import shutil
+import sys
+
+
+# ioctl request that clones the extents of a file on Linux (btrfs, XFS, bcachefs).
+_FICLONE = 0x40049409
+
+
+def _reflink(source: pathlib.Path, dest: pathlib.Path) -> bool:
+    """
+    Create a copy-on-write clone of a file.
+
+    Args:
+        source: The file to clone
+        dest: Path of the clone, which must not exist
+
+    Returns:
+        True if the clone was created, False if the platform or filesystem does not
+        support it
+    """
+    if sys.platform == "darwin":
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        return libc.clonefile(os.fsencode(source), os.fsencode(dest), 0) == 0
+
+    if sys.platform.startswith("linux"):
+        import fcntl
+
+        with open(source, "rb") as src:
+            try:
+                with open(dest, "xb") as dst:
+                    fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+            except OSError:
+                dest.unlink(missing_ok=True)
+                return False
+        return True
+
+    return False
+
+
+def link_or_copy(source: pathlib.Path, dest: pathlib.Path, allow_hardlink: bool = True) -> str:
+    """
+    Place a file at a destination as cheaply as the filesystem allows.
+
+    The file is reflinked if the filesystem supports copy-on-write clones, otherwise
+    hard linked, and copied if neither works (for example across filesystems).
+    Hard links share their content with the source, so they must only be used for
+    files that nobody modifies in place.
+
+    Args:
+        source: The file to place
+        dest: Destination path, replaced if it exists
+        allow_hardlink: Whether a hard link may be used
+
+    Returns:
+        How the file was placed: "reflink", "hardlink" or "copy"
+    """
+    dest.parent.mkdir(exist_ok=True, parents=True)
+    dest.unlink(missing_ok=True)
+
+    if _reflink(source, dest):
+        shutil.copystat(source, dest)
+        return "reflink"
+
+    if allow_hardlink:
+        try:
+            os.link(source, dest)
+            return "hardlink"
+        except OSError:
+            pass
+
+    shutil.copy2(source, dest)
+    return "copy"
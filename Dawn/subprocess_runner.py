@@ -0,0 +1,362 @@
+# Copyright 2025 Adobe
+# All Rights Reserved.
+#
+# NOTICE: Adobe permits you to use, modify, and distribute this file in
+# accordance with the terms of the Adobe license agreement accompanying
+# it.
+
+import collections
+import os
+import pathlib
+import signal
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, TextIO
+
+
+# Directory the output of the source and build stages is logged to.
+LOG_DIR = pathlib.Path("builds") / "logs"
+
+# Number of output lines kept for error messages.
+DEFAULT_TAIL_LINES = 200
+
+# Time a process gets to exit after being interrupted before it is killed.
+_INTERRUPT_GRACE_PERIOD = 30
+
+# Time to wait for the output of a process that exited. Background children, such as
+# a compiler cache server, can keep the pipes open long after the process exited.
+_OUTPUT_DRAIN_TIMEOUT = 5
+
+# Serializes writes to log files shared by commands running on several threads.
+_log_lock = threading.Lock()
+
+
+class CommandError(subprocess.CalledProcessError):
+    """
+    A command exited with a non-zero status.
+
+    Its stdout holds the last lines of the combined output, the full output is in the
+    log file if one was written.
+    """
+
+    def __init__(self, returncode: int, cmd: Any, output: str, log_file: Optional[pathlib.Path] = None) -> None:
+        super().__init__(returncode, cmd, output)
+        self.log_file = log_file
+
+
+class CommandTimeoutError(CommandError):
+    """
+    A command was stopped because it ran too long or stopped producing output.
+    """
+
+    def __init__(
+        self, returncode: int, cmd: Any, output: str, reason: str, log_file: Optional[pathlib.Path] = None
+    ) -> None:
+        super().__init__(returncode, cmd, output, log_file)
+        self.reason = reason
+
+    def __str__(self) -> str:
+        return f"Command '{self.cmd}' {self.reason}"
+
+
+@dataclass
+class CommandResult:
+    """
+    Outcome of a command that ran to completion.
+
+    Attributes:
+        returncode: Exit status of the command
+        stdout: The standard output, if it was captured
+        tail: The last lines of the combined standard output and error
+        elapsed: Wall time of the command in seconds
+    """
+
+    returncode: int
+    stdout: str = ""
+    tail: List[str] = field(default_factory=list)
+    elapsed: float = 0.0
+
+
+class RunningCommand:
+    """
+    A command running in its own process group with its output streamed line by line.
+
+    Standard output and error are read on background threads. Every line is appended to
+    the log file as it arrives, optionally echoed to the console, and kept in a bounded
+    tail for error messages. A watchdog stops the whole process group when the command
+    exceeds its wall-clock timeout or produces no output for the stall timeout.
+    """
+
+    def __init__(
+        self,
+        command: List[str],
+        cwd: Optional[pathlib.Path] = None,
+        env: Optional[Dict[str, str]] = None,
+        log_file: Optional[pathlib.Path] = None,
+        echo: bool = False,
+        timeout: Optional[float] = None,
+        stall_timeout: Optional[float] = None,
+        tail_lines: int = DEFAULT_TAIL_LINES,
+        capture_stdout: bool = False,
+    ) -> None:
+        """
+        Start a command.
+
+        Args:
+            command: The command and its arguments
+            cwd: Working directory for the command
+            env: Environment for the command, the current environment if None
+            log_file: File to append the output to
+            echo: Whether to also print the output to the console
+            timeout: Maximum run time in seconds
+            stall_timeout: Maximum time in seconds without any output
+            tail_lines: Number of output lines to keep for error messages
+            capture_stdout: Whether to keep the complete standard output
+
+        Raises:
+            OSError: If the command cannot be started
+        """
+        self.command = [str(arg) for arg in command]
+        self.log_file = log_file
+        self._echo = echo
+        self._timeout = timeout
+        self._stall_timeout = stall_timeout
+        self._capture_stdout = capture_stdout
+        self._tail: collections.deque = collections.deque(maxlen=tail_lines)
+        self._stdout: List[str] = []
+        self._lock = threading.Lock()
+        self._timeout_reason: Optional[str] = None
+        self._finished = threading.Event()
+
+        if log_file:
+            log_file.parent.mkdir(exist_ok=True, parents=True)
+        self._log: Optional[TextIO] = open(log_file, "a", encoding="utf-8") if log_file else None
+        if self._log:
+            self._write_log(f"$ {subprocess.list2cmdline(self.command)}\n")
+
+        if os.name == "nt":
+            group_args: Dict[str, Any] = {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+        else:
+            group_args = {"start_new_session": True}
+
+        self._start = time.monotonic()
+        self._last_output = self._start
+        try:
+            self.process = subprocess.Popen(
+                self.command,
+                cwd=cwd,
+                env=env,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                encoding="utf-8",
+                errors="replace",
+                **group_args,
+            )
+        except OSError:
+            if self._log:
+                self._log.close()
+            raise
+
+        self._threads = [
+            threading.Thread(target=self._read, args=(self.process.stdout, True), daemon=True),
+            threading.Thread(target=self._read, args=(self.process.stderr, False), daemon=True),
+        ]
+        if timeout or stall_timeout:
+            self._threads.append(threading.Thread(target=self._watch, daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    def _write_log(self, text: str) -> None:
+        """
+        Append text to the log file.
+
+        Args:
+            text: Text to append
+        """
+        with _log_lock:
+            if self._log:
+                self._log.write(text)
+                self._log.flush()
+
+    def _read(self, stream: TextIO, is_stdout: bool) -> None:
+        """
+        Consume one output stream of the process until it closes.
+
+        Args:
+            stream: The stdout or stderr pipe of the process
+            is_stdout: Whether the stream is the standard output
+        """
+        for line in stream:
+            with self._lock:
+                self._last_output = time.monotonic()
+                self._tail.append(line.rstrip("\n"))
+                if is_stdout and self._capture_stdout:
+                    self._stdout.append(line)
+            if self._log:
+                self._write_log(line)
+            if self._echo:
+                sys.stdout.write(line)
+                sys.stdout.flush()
+        stream.close()
+
+    def _watch(self) -> None:
+        """
+        Stop the process group when the command runs too long or stalls.
+        """
+        while not self._finished.wait(timeout=1):
+            now = time.monotonic()
+            with self._lock:
+                silent = now - self._last_output
+            if self._timeout and now - self._start > self._timeout:
+                self._timeout_reason = f"timed out after {self._timeout:.0f} seconds"
+            elif self._stall_timeout and silent > self._stall_timeout:
+                self._timeout_reason = f"produced no output for {self._stall_timeout:.0f} seconds"
+            else:
+                continue
+            self.stop()
+            return
+
+    def poll(self) -> Optional[int]:
+        """
+        Check whether the process has exited.
+
+        Returns:
+            The exit status, or None if the process is still running
+        """
+        return self.process.poll()
+
+    def stop(self, grace_period: float = _INTERRUPT_GRACE_PERIOD) -> None:
+        """
+        Interrupt the process group and kill it if it does not exit in time.
+
+        The process group receives SIGINT (CTRL_BREAK on Windows) first, which lets
+        build tools such as Ninja stop their own children and leave consistent state.
+        Whatever is left of the group afterwards is killed.
+
+        Args:
+            grace_period: Time in seconds to wait for the process to exit after the interrupt
+        """
+        if self.process.poll() is not None:
+            return
+        try:
+            if os.name == "nt":
+                self.process.send_signal(signal.CTRL_BREAK_EVENT)
+            else:
+                os.killpg(self.process.pid, signal.SIGINT)
+            self.process.wait(timeout=grace_period)
+        except (subprocess.TimeoutExpired, OSError):
+            pass
+        self.kill()
+
+    def kill(self) -> None:
+        """
+        Kill the process and all of its children immediately.
+        """
+        try:
+            if os.name == "nt":
+                if self.process.poll() is None:
+                    subprocess.run(
+                        ["taskkill", "/F", "/T", "/PID", str(self.process.pid)],
+                        stdout=subprocess.DEVNULL,
+                        stderr=subprocess.DEVNULL,
+                    )
+            else:
+                os.killpg(self.process.pid, signal.SIGKILL)
+        except OSError:
+            pass
+        if self.process.poll() is None:
+            self.process.kill()
+        self.process.wait()
+
+    def wait(self, check: bool = True) -> CommandResult:
+        """
+        Wait for the command to exit and collect its output.
+
+        The process group is killed if the wait is interrupted, for example by Ctrl-C,
+        so that no children are left behind.
+
+        Args:
+            check: Whether to raise if the command failed
+
+        Returns:
+            CommandResult of the command
+
+        Raises:
+            CommandTimeoutError: If the command was stopped by a timeout
+            CommandError: If check is set and the command exited with a non-zero status
+        """
+        try:
+            returncode = self.process.wait()
+        except BaseException:
+            self.kill()
+            raise
+        finally:
+            self._finished.set()
+            deadline = time.monotonic() + _OUTPUT_DRAIN_TIMEOUT
+            for thread in self._threads:
+                thread.join(timeout=max(0.0, deadline - time.monotonic()))
+            with _log_lock:
+                if self._log:
+                    self._log.close()
+                    self._log = None
+
+        elapsed = time.monotonic() - self._start
+        tail = list(self._tail)
+        if self._timeout_reason:
+            raise CommandTimeoutError(returncode, self.command, "\n".join(tail), self._timeout_reason, self.log_file)
+        if check and returncode != 0:
+            raise CommandError(returncode, self.command, "\n".join(tail), self.log_file)
+        return CommandResult(returncode, "".join(self._stdout), tail, elapsed)
+
+
+def run(
+    command: List[str],
+    cwd: Optional[pathlib.Path] = None,
+    env: Optional[Dict[str, str]] = None,
+    log_file: Optional[pathlib.Path] = None,
+    echo: bool = False,
+    timeout: Optional[float] = None,
+    stall_timeout: Optional[float] = None,
+    tail_lines: int = DEFAULT_TAIL_LINES,
+    capture_stdout: bool = False,
+    check: bool = True,
+) -> CommandResult:
+    """
+    Run a command to completion, streaming its output.
+
+    Args:
+        command: The command and its arguments
+        cwd: Working directory for the command
+        env: Environment for the command, the current environment if None
+        log_file: File to append the output to
+        echo: Whether to also print the output to the console
+        timeout: Maximum run time in seconds
+        stall_timeout: Maximum time in seconds without any output
+        tail_lines: Number of output lines to keep for error messages
+        capture_stdout: Whether to return the complete standard output
+        check: Whether to raise if the command failed
+
+    Returns:
+        CommandResult of the command
+
+    Raises:
+        CommandTimeoutError: If the command was stopped by a timeout
+        CommandError: If check is set and the command exited with a non-zero status
+        OSError: If the command cannot be started
+    """
+    return RunningCommand(
+        command,
+        cwd=cwd,
+        env=env,
+        log_file=log_file,
+        echo=echo,
+        timeout=timeout,
+        stall_timeout=stall_timeout,
+        tail_lines=tail_lines,
+        capture_stdout=capture_stdout,
+    ).wait(check=check)
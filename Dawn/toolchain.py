@@ -0,0 +1,304 @@
+# Copyright 2025 Adobe
+# All Rights Reserved.
+#
+# NOTICE: Adobe permits you to use, modify, and distribute this file in
+# accordance with the terms of the Adobe license agreement accompanying
+# it.
+
+import json
+import os
+import pathlib
+import shutil
+import subprocess
+import sys
+import threading
+import dawn_source
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional
+
+
+# Tools probed by toolchain_identity, by role, with the environment variable that
+# overrides each one and its default executable name per host.
+_TOOLS = {
+    "cmake": (None, "cmake", "cmake"),
+    "ninja": (None, "ninja", "ninja"),
+    "cc": ("CC", "cc", "cl"),
+    "cxx": ("CXX", "c++", "cl"),
+}
+
+_lock = threading.Lock()
+_cache: Optional[Dict[str, Any]] = None
+
+# Real tools behind the xcrun shims in /usr/bin, resolved once per process.
+_shim_targets: Dict[str, Optional[str]] = {}
+
+
+@dataclass
+class ToolInfo:
+    """
+    Identity of an executable found on the PATH.
+
+    Attributes:
+        path: Absolute path of the executable
+        version: First line of the version output, if the tool reports one
+        mtime: Modification time of the executable, used to invalidate the cache
+        size: Size of the executable, used to invalidate the cache
+        resolved: For xcrun shims on macOS, path, modification time and size of the
+            tool of the selected developer directory the shim runs
+    """
+
+    path: str
+    version: Optional[str]
+    mtime: float
+    size: int
+    resolved: Optional[str] = None
+
+
+def cache_file() -> pathlib.Path:
+    """
+    Get the path of the toolchain probe cache.
+
+    Returns:
+        Path to the cache file
+    """
+    return dawn_source.get_cache_path() / "toolchain.json"
+
+
+def _load_cache() -> Dict[str, Any]:
+    """
+    Load the probe cache from disk once per process.
+
+    Returns:
+        The cache dictionary, shared by all callers
+    """
+    global _cache
+    if _cache is None:
+        _cache = {"tools": {}, "sdks": {}}
+        if cache_file().exists():
+            try:
+                _cache.update(json.loads(cache_file().read_text()))
+            except json.JSONDecodeError:
+                pass
+    return _cache
+
+
+def _save_cache() -> None:
+    """
+    Write the probe cache to disk.
+    """
+    cache_file().parent.mkdir(exist_ok=True, parents=True)
+    cache_file().write_text(json.dumps(_load_cache(), indent=2, sort_keys=True))
+
+
+def _run_version(path: str, args: List[str]) -> Optional[str]:
+    """
+    Run a tool and get the first line of its output.
+
+    Tools such as MSVC's cl print their banner on stderr, so stderr is used when stdout
+    is empty.
+
+    Args:
+        path: Path to the tool
+        args: Arguments that make the tool print its version
+
+    Returns:
+        The first output line, or None if the tool cannot be run
+    """
+    try:
+        result = subprocess.run([path, *args], capture_output=True, text=True, timeout=60)
+    except (subprocess.SubprocessError, OSError):
+        return None
+    lines = (result.stdout.strip() or result.stderr.strip()).splitlines()
+    return lines[0].strip() if lines else None
+
+
+def developer_dir() -> str:
+    """
+    Get the selected Xcode developer directory on macOS.
+
+    xcode-select -s switches it without touching the shims in /usr/bin or the
+    environment, so it is part of the cache keys of the probed tools and SDKs.
+
+    Returns:
+        Resolved developer directory, or an empty string on other hosts or if none is
+        selected
+    """
+    if sys.platform != "darwin":
+        return ""
+    selected = os.environ.get("DEVELOPER_DIR")
+    if not selected:
+        selected = _run_version("xcode-select", ["-p"])
+    return os.path.realpath(selected) if selected else ""
+
+
+def _shim_target(path: str) -> Optional[str]:
+    """
+    Identify the tool an xcrun shim in /usr/bin runs, such as /usr/bin/cc, /usr/bin/c++
+    or /usr/bin/xcodebuild, for the selected developer directory.
+
+    Args:
+        path: Absolute path of the executable
+
+    Returns:
+        "path:mtime:size" of the real tool, or None if the executable is not a shim
+    """
+    if sys.platform != "darwin" or os.path.dirname(path) != "/usr/bin":
+        return None
+    key = f"{path}:{developer_dir()}"
+    if key not in _shim_targets:
+        target = _run_version("xcrun", ["-f", os.path.basename(path)])
+        if target and os.path.realpath(target) != os.path.realpath(path) and os.path.exists(target):
+            stat = os.stat(target)
+            _shim_targets[key] = f"{os.path.realpath(target)}:{stat.st_mtime}:{stat.st_size}"
+        else:
+            _shim_targets[key] = None
+    return _shim_targets[key]
+
+
+def find_tool(name: str) -> Optional[ToolInfo]:
+    """
+    Find a tool on the PATH and identify its version.
+
+    The version is probed once and cached on disk together with the path,
+    modification time and size of the executable. The cached version is reused for as
+    long as the executable is unchanged. For the xcrun shims on macOS, the real tool
+    of the selected Xcode must be unchanged as well.
+
+    Args:
+        name: Name or path of the tool
+
+    Returns:
+        ToolInfo for the tool, or None if it is not found
+    """
+    path = shutil.which(name, path=os.environ.get("PATH"))
+    if not path:
+        return None
+    path = str(pathlib.Path(path).absolute())
+    stat = os.stat(path)
+    resolved = _shim_target(path)
+
+    with _lock:
+        cached = _load_cache()["tools"].get(path)
+        if (
+            cached
+            and cached["mtime"] == stat.st_mtime
+            and cached["size"] == stat.st_size
+            and cached.get("resolved") == resolved
+        ):
+            return ToolInfo(**cached)
+
+        version_args = [] if pathlib.Path(path).stem.lower() == "cl" else ["--version"]
+        info = ToolInfo(path, _run_version(path, version_args), stat.st_mtime, stat.st_size, resolved)
+        _load_cache()["tools"][path] = asdict(info)
+        _save_cache()
+        return info
+
+
+def compiler_tool(role: str) -> Optional[ToolInfo]:
+    """
+    Find the tool CMake will use for a role, honoring CC / CXX.
+
+    Args:
+        role: One of cmake, ninja, cc or cxx
+
+    Returns:
+        ToolInfo for the tool, or None if it is not found
+    """
+    variable, default, windows_default = _TOOLS[role]
+    name = os.environ.get(variable) if variable else None
+    return find_tool(name or (windows_default if os.name == "nt" else default))
+
+
+def toolchain_identity() -> Dict[str, Optional[str]]:
+    """
+    Describe the build toolchain: cmake, ninja and the C and C++ compilers.
+
+    Returns:
+        Mapping from tool role to "path: version", or None for missing tools
+    """
+    identity = {}
+    for role in _TOOLS:
+        info = compiler_tool(role)
+        if not info:
+            identity[role] = None
+        elif info.resolved:
+            # Different Xcodes can ship compilers reporting the same version
+            identity[role] = f"{info.path} ({info.resolved.split(':')[0]}): {info.version}"
+        else:
+            identity[role] = f"{info.path}: {info.version}"
+    return identity
+
+
+def get_sdk_info() -> Optional[List[Dict[str, Any]]]:
+    """
+    Get information about available SDKs from xcodebuild.
+
+    The result is cached and reused until xcodebuild, the Xcode it runs or the
+    selected developer directory change.
+
+    Returns:
+        List of SDK information dictionaries, or None if command fails
+    """
+    xcodebuild = find_tool("xcodebuild")
+    if not xcodebuild:
+        return None
+
+    key = f"{xcodebuild.path}:{xcodebuild.mtime}:{xcodebuild.resolved}:{developer_dir()}"
+    with _lock:
+        cached = _load_cache()["sdks"]
+        if cached.get("key") == key:
+            return cached["sdks"]
+
+    # Run xcodebuild command to get SDK info
+    try:
+        result = subprocess.run(
+            [xcodebuild.path, "-showsdks", "-json"],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (subprocess.SubprocessError, OSError):
+        return None
+
+    # Parse JSON output
+    try:
+        sdks = json.loads(result.stdout)
+    except json.JSONDecodeError:
+        return None
+
+    # Filter out SDKs that are not macOS or iOS, return unique SDK names
+    sdks = [
+        sdk
+        for sdk in sdks
+        if sdk.get("canonicalName", "").startswith(("macosx", "iphone"))
+    ]
+
+    with _lock:
+        _load_cache()["sdks"] = {"key": key, "sdks": sdks}
+        _save_cache()
+    return sdks
+
+
+def find_sdk_path(sdk_name: Optional[str]) -> Optional[str]:
+    """
+    Find the path to a specific SDK.
+
+    Args:
+        sdk_name: Name of the SDK to find
+
+    Returns:
+        Path to the SDK, or None if not found
+    """
+    if not sdk_name:
+        return None
+
+    sdks = get_sdk_info()
+    if not sdks:
+        return None
+
+    # Find matching SDK
+    for sdk in sdks:
+        if sdk.get("canonicalName") == sdk_name:
+            return sdk.get("sdkPath")
+
+    return None
@@ -0,0 +1,253 @@
+# Copyright 2025 Adobe
+# All Rights Reserved.
+#
+# NOTICE: Adobe permits you to use, modify, and distribute this file in
+# accordance with the terms of the Adobe license agreement accompanying
+# it.
+
+import hashlib
+import io
+import os
+import pathlib
+import shutil
+import tarfile
+import zstandard
+from typing import BinaryIO, Dict, Iterable, Iterator, Optional
+
+
+# Size of the blocks read from and written to archive streams.
+_CHUNK_SIZE = 1024 * 1024
+
+
+# fmt: off
+class TreeArchiveError(Exception): pass
+class TreeArchiveIntegrityError(TreeArchiveError): pass
+# fmt: on
+
+
+class _HashingWriter(io.RawIOBase):
+    """
+    Write-only stream that hashes everything written through it.
+    """
+
+    def __init__(self, out: BinaryIO) -> None:
+        self._out = out
+        self.sha256 = hashlib.sha256()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.sha256.update(data)
+        return self._out.write(data)
+
+
+class _HashingReader(io.RawIOBase):
+    """
+    Read-only stream that hashes everything read through it.
+    """
+
+    def __init__(self, source: BinaryIO) -> None:
+        self._source = source
+        self.sha256 = hashlib.sha256()
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._source.read(size)
+        self.sha256.update(data)
+        return data
+
+    def readinto(self, buffer) -> int:
+        data = self.read(len(buffer))
+        buffer[: len(data)] = data
+        return len(data)
+
+    def drain(self) -> None:
+        """
+        Read and hash the remainder of the stream.
+        """
+        while self.read(_CHUNK_SIZE):
+            pass
+
+
+def _normalize(info: tarfile.TarInfo) -> tarfile.TarInfo:
+    """
+    Drop the owner information from an archive entry.
+
+    Args:
+        info: The archive entry
+
+    Returns:
+        The normalized archive entry
+    """
+    info.uid = info.gid = 0
+    info.uname = info.gname = ""
+    return info
+
+
+def _walk(root: pathlib.Path, exclude_names: Iterable[str]) -> Iterable[pathlib.Path]:
+    """
+    List all entries below a directory in a stable order.
+
+    Symbolic links to directories are listed but not followed.
+
+    Args:
+        root: Directory to walk
+        exclude_names: File and directory names to skip at any depth
+
+    Returns:
+        Iterable of paths below the root
+    """
+    exclude_names = set(exclude_names)
+    for dir_path, dir_names, file_names in os.walk(root):
+        dir_names[:] = sorted(name for name in dir_names if name not in exclude_names)
+        current = pathlib.Path(dir_path)
+        for name in dir_names:
+            yield current / name
+        for name in sorted(file_names):
+            if name not in exclude_names:
+                yield current / name
+
+
+def pack_tree(
+    source_dir: pathlib.Path,
+    archive_path: pathlib.Path,
+    exclude_names: Iterable[str] = (".git",),
+    extra_files: Optional[Dict[str, bytes]] = None,
+    level: int = 10,
+) -> str:
+    """
+    Pack a directory into a zstd-compressed tarball.
+
+    Every source file is read once and streamed through the compressor, and the
+    uncompressed tar stream is hashed on the way. The resulting digest identifies the
+    archive content and is checked again by unpack_tree.
+
+    Args:
+        source_dir: Directory to pack
+        archive_path: Path of the archive to write
+        exclude_names: File and directory names to leave out at any depth
+        extra_files: Additional files to store in the archive, by relative path
+        level: zstd compression level
+
+    Returns:
+        Hex-encoded SHA-256 digest of the uncompressed tar stream
+    """
+    compressor = zstandard.ZstdCompressor(level=level, threads=-1, write_checksum=True)
+    archive_path.parent.mkdir(exist_ok=True, parents=True)
+    with open(archive_path, "wb") as f, compressor.stream_writer(f, closefd=False) as compressed:
+        hashing_writer = _HashingWriter(compressed)
+        with tarfile.open(fileobj=hashing_writer, mode="w|", format=tarfile.PAX_FORMAT) as tar:
+            for path in _walk(source_dir, exclude_names):
+                info = _normalize(tar.gettarinfo(str(path), path.relative_to(source_dir).as_posix()))
+                if info.isreg():
+                    with open(path, "rb") as source:
+                        tar.addfile(info, source)
+                else:
+                    tar.addfile(info)
+
+            for name, content in sorted((extra_files or {}).items()):
+                info = _normalize(tarfile.TarInfo(name))
+                info.size = len(content)
+                info.mode = 0o644
+                tar.addfile(info, io.BytesIO(content))
+
+    return hashing_writer.sha256.hexdigest()
+
+
+def _checked_members(tar: tarfile.TarFile, dest_dir: pathlib.Path) -> Iterator[tarfile.TarInfo]:
+    """
+    Check the entries of an archive before they are extracted, for Python versions
+    without tarfile extraction filters (before 3.11.4).
+
+    Applies the rules of the "data" filter: regular files, directories and links
+    only, every path and link target inside the destination, and no special
+    permission bits.
+
+    Args:
+        tar: Archive opened for streaming
+        dest_dir: Directory the archive is extracted into
+
+    Yields:
+        The entries of the archive
+
+    Raises:
+        TreeArchiveError: If an entry would be written outside the destination
+    """
+    root = os.path.realpath(dest_dir)
+
+    def inside(path: str) -> bool:
+        return os.path.commonpath([root, os.path.realpath(path)]) == root
+
+    for member in tar:
+        target = os.path.join(root, member.name)
+        if os.path.isabs(member.name) or not inside(target):
+            raise TreeArchiveError(f"Archive entry {member.name} is outside the destination")
+        if member.issym():
+            if os.path.isabs(member.linkname) or not inside(os.path.join(os.path.dirname(target), member.linkname)):
+                raise TreeArchiveError(f"Archive link {member.name} points outside the destination")
+        elif member.islnk():
+            if not inside(os.path.join(root, member.linkname)):
+                raise TreeArchiveError(f"Archive link {member.name} points outside the destination")
+        elif not (member.isfile() or member.isdir()):
+            raise TreeArchiveError(f"Archive entry {member.name} is not a file, directory or link")
+        if member.mode is not None:
+            member.mode &= 0o755
+        member.uid = member.gid = 0
+        member.uname = member.gname = ""
+        yield member
+
+
+def unpack_tree(
+    archive_path: pathlib.Path, dest_dir: pathlib.Path, expected_digest: str
+) -> None:
+    """
+    Unpack a tarball written by pack_tree, verifying its digest.
+
+    The archive is decompressed and extracted as a stream, so it is never held in
+    memory. Entries are extracted into a temporary directory next to the destination,
+    which replaces the destination only once the digest has been verified.
+
+    Args:
+        archive_path: Path of the archive to unpack
+        dest_dir: Directory to unpack into; replaced if it exists
+        expected_digest: Hex-encoded SHA-256 digest returned by pack_tree
+
+    Raises:
+        TreeArchiveIntegrityError: If the archive does not match the digest
+        TreeArchiveError: If the archive cannot be read
+    """
+    staging_dir = dest_dir.with_name(dest_dir.name + ".unpacking")
+    if staging_dir.exists():
+        shutil.rmtree(staging_dir)
+    staging_dir.mkdir(parents=True)
+
+    decompressor = zstandard.ZstdDecompressor()
+    try:
+        with open(archive_path, "rb") as f, decompressor.stream_reader(f, read_size=_CHUNK_SIZE) as stream:
+            hashing_reader = _HashingReader(stream)
+            with tarfile.open(fileobj=hashing_reader, mode="r|") as tar:
+                if hasattr(tarfile, "data_filter"):
+                    tar.extractall(staging_dir, filter="data")
+                else:
+                    tar.extractall(staging_dir, members=_checked_members(tar, staging_dir))
+            hashing_reader.drain()
+    except TreeArchiveError:
+        shutil.rmtree(staging_dir)
+        raise
+    except (tarfile.TarError, zstandard.ZstdError, OSError) as e:
+        shutil.rmtree(staging_dir)
+        raise TreeArchiveError(f"Failed to unpack {archive_path}: {e}")
+
+    digest = hashing_reader.sha256.hexdigest()
+    if digest != expected_digest:
+        shutil.rmtree(staging_dir)
+        raise TreeArchiveIntegrityError(
+            f"{archive_path} has digest {digest}, expected {expected_digest}"
+        )
+
+    if dest_dir.exists():
+        shutil.rmtree(dest_dir)
+    staging_dir.rename(dest_dir)
@@ -0,0 +1,560 @@
+# Copyright 2025 Adobe
+# All Rights Reserved.
+#
+# NOTICE: Adobe permits you to use, modify, and distribute this file in
+# accordance with the terms of the Adobe license agreement accompanying
+# it.
+
+import collections
+import concurrent.futures
+import hashlib
+import os
+import pathlib
+import stat
+import struct
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Any, BinaryIO, Iterable, Iterator, List, Optional, Tuple
+
+
+# Size of the blocks read from source files and compressed.
+CHUNK_SIZE = 1024 * 1024
+
+# Default number of blocks read ahead of the output while they are being compressed.
+DEFAULT_MAX_PENDING_BLOCKS = 8
+
+# Earliest timestamp a zip header can hold.
+_EARLIEST_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+# Sizes, offsets and entry counts from these limits on need zip64 records; the 32-bit
+# and 16-bit fields then hold the marker values.
+_ZIP64_LIMIT = 0xFFFFFFFF
+_ZIP64_COUNT_LIMIT = 0xFFFF
+_ZIP64_MARKER = 0xFFFFFFFF
+_ZIP64_COUNT_MARKER = 0xFFFF
+
+# General purpose flags: sizes and CRC follow the data, names are UTF-8.
+_FLAG_DATA_DESCRIPTOR = 0x08
+_FLAG_UTF8 = 0x800
+
+_METHOD_STORED = 0
+_METHOD_DEFLATED = 8
+
+# Version needed to extract: 2.0 for deflate and directories, 4.5 for zip64.
+_VERSION_DEFAULT = 20
+_VERSION_ZIP64 = 45
+
+# Version made by: Unix, so that the permissions in the external attributes are used.
+_VERSION_MADE_BY = (3 << 8) | _VERSION_ZIP64
+
+_MSDOS_DIRECTORY = 0x10
+
+
+@dataclass
+class ZipEntry:
+    """
+    Central directory record of an entry written to the archive.
+
+    Attributes:
+        name: Name of the entry, ending with / for directories
+        method: Compression method
+        date_time: Modification time as (year, month, day, hour, minute, second)
+        mode: Unix file type and permissions
+        crc: CRC-32 of the uncompressed data
+        compressed_size: Size of the compressed data
+        size: Size of the uncompressed data
+        offset: Offset of the local header in the archive
+        zip64: Whether the local header announced zip64 sizes
+    """
+
+    name: str
+    method: int
+    date_time: Tuple[int, ...]
+    mode: int
+    crc: int = 0
+    compressed_size: int = 0
+    size: int = 0
+    offset: int = 0
+    zip64: bool = False
+
+
+@dataclass
+class ZipStreamResult:
+    """
+    Summary of a finished archive.
+
+    Attributes:
+        sha256: Hex-encoded SHA-256 digest of the archive
+        size: Size of the archive in bytes
+        entries: Number of entries in the archive
+        uncompressed_size: Total size of the archived data before compression
+        elapsed: Wall time in seconds from creating the writer to closing it
+    """
+
+    sha256: str
+    size: int
+    entries: int
+    uncompressed_size: int
+    elapsed: float
+
+
+def _dos_date_time(date_time: Tuple[int, ...]) -> Tuple[int, int]:
+    """
+    Encode a timestamp in the MS-DOS format of zip headers.
+
+    Args:
+        date_time: Timestamp as (year, month, day, hour, minute, second)
+
+    Returns:
+        Tuple of the encoded time and date
+    """
+    year, month, day, hour, minute, second = date_time[:6]
+    year = max(year, 1980)
+    return (hour << 11) | (minute << 5) | (second // 2), ((year - 1980) << 9) | (month << 5) | day
+
+
+def reproducible_date_time() -> Tuple[int, ...]:
+    """
+    Get the timestamp of the entries of reproducible archives.
+
+    Returns:
+        SOURCE_DATE_EPOCH as a UTC timestamp if it is set, otherwise 1980-01-01 00:00:00
+    """
+    epoch = os.environ.get("SOURCE_DATE_EPOCH")
+    if not epoch:
+        return _EARLIEST_DATE_TIME
+    return max(tuple(time.gmtime(int(epoch))[:6]), _EARLIEST_DATE_TIME)
+
+
+def _blocks(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """
+    Regroup pieces of content into blocks of CHUNK_SIZE bytes.
+
+    Blocks are compressed independently, so cutting the content at the same offsets
+    whatever the pieces keeps the compressed output the same.
+
+    Args:
+        chunks: Iterable of the pieces of the content
+
+    Yields:
+        Blocks of CHUNK_SIZE bytes, the last one possibly shorter
+    """
+    buffer = bytearray()
+    for chunk in chunks:
+        if not buffer and len(chunk) == CHUNK_SIZE:
+            yield chunk
+            continue
+        buffer += chunk
+        while len(buffer) >= CHUNK_SIZE:
+            yield bytes(buffer[:CHUNK_SIZE])
+            del buffer[:CHUNK_SIZE]
+    if buffer:
+        yield bytes(buffer)
+
+
+def _compress_block(data: bytes, level: int, last: bool) -> bytes:
+    """
+    Deflate a block of an entry independently of the other blocks.
+
+    Every block but the last ends with a sync flush, which byte-aligns the output
+    without ending the stream, so the compressed blocks concatenate into a single
+    valid deflate stream.
+
+    Args:
+        data: The block
+        level: zlib compression level
+        last: Whether this is the last block of the entry
+
+    Returns:
+        The raw deflate data of the block
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    return compressor.compress(data) + compressor.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+
+
+class ZipStreamWriter:
+    """
+    Zip archive writer that streams entries to an output once, without seeking.
+
+    Each entry is written as a local header followed by its data and a data
+    descriptor with the CRC and sizes, so source files are read exactly once in
+    chunks and the output never has to be patched. The SHA-256 digest of the archive
+    is computed over the bytes as they are written, so the archive does not have to
+    be read again to checksum it. Archives larger than 4 GiB use zip64 records.
+
+    File data is deflated in independent blocks of CHUNK_SIZE bytes. With an
+    executor the blocks are compressed on its worker threads while this writer keeps
+    reading ahead, and the compressed blocks are written in order as they complete;
+    the number of blocks in flight is bounded, so memory use does not depend on the
+    size of the files. The output is the same with or without an executor.
+
+    Reproducible archives give every entry the same timestamp and normalize the
+    permissions to 0755 for directories and executables and 0644 for other files, so
+    the same content in the same order always produces the same bytes.
+    """
+
+    def __init__(
+        self,
+        out: BinaryIO,
+        level: int = zlib.Z_DEFAULT_COMPRESSION,
+        executor: Optional[concurrent.futures.Executor] = None,
+        max_pending_blocks: int = DEFAULT_MAX_PENDING_BLOCKS,
+        reproducible: bool = False,
+        date_time: Optional[Tuple[int, ...]] = None,
+    ) -> None:
+        """
+        Create a writer.
+
+        Args:
+            out: Binary stream to write the archive to
+            level: zlib compression level of file entries, 0 to store them
+            executor: Executor to compress blocks on, or None to compress them inline
+            max_pending_blocks: Maximum number of blocks being compressed at a time
+            reproducible: Whether to use a fixed timestamp and normalized permissions
+            date_time: Timestamp of all entries of a reproducible archive,
+                reproducible_date_time() by default
+        """
+        self._out = out
+        self._level = level
+        self._executor = executor
+        self._max_pending_blocks = max_pending_blocks
+        self._fixed_date_time = (date_time or reproducible_date_time()) if reproducible else None
+        # Writes that are waiting for earlier blocks: (kind, entry, payload) in output order
+        self._pending: collections.deque = collections.deque()
+        self._pending_blocks = 0
+        self._sha256 = hashlib.sha256()
+        self._offset = 0
+        self._entries: List[ZipEntry] = []
+        self._uncompressed_size = 0
+        self._start = time.monotonic()
+
+    def _write(self, data: bytes) -> None:
+        """
+        Write bytes to the archive and hash them.
+
+        Args:
+            data: Bytes to write
+        """
+        self._sha256.update(data)
+        self._out.write(data)
+        self._offset += len(data)
+
+    def _write_local_header(self, entry: ZipEntry, flags: int) -> None:
+        """
+        Write the local header of an entry.
+
+        Args:
+            entry: The entry, with its offset set
+            flags: General purpose flags of the entry
+        """
+        name = entry.name.encode("utf-8")
+        dos_time, dos_date = _dos_date_time(entry.date_time)
+        # The CRC and sizes follow in the data descriptor (directories have none)
+        if entry.zip64:
+            # The extra field marks the sizes in the data descriptor as 64-bit
+            extra = struct.pack("<HHQQ", 0x0001, 16, 0, 0)
+            sizes = (_ZIP64_MARKER, _ZIP64_MARKER)
+            version = _VERSION_ZIP64
+        else:
+            extra = b""
+            sizes = (0, 0)
+            version = _VERSION_DEFAULT
+        self._write(
+            struct.pack(
+                "<IHHHHHIIIHH",
+                0x04034B50,
+                version,
+                flags,
+                entry.method,
+                dos_time,
+                dos_date,
+                0,
+                *sizes,
+                len(name),
+                len(extra),
+            )
+            + name
+            + extra
+        )
+
+    def _entry_attributes(self, date_time: Optional[Tuple[int, ...]], mode: int) -> Tuple[Tuple[int, ...], int]:
+        """
+        Get the timestamp and mode to record for an entry.
+
+        Args:
+            date_time: Modification time, or None for the current time
+            mode: Unix file type and permissions
+
+        Returns:
+            Tuple of the timestamp and mode, normalized for reproducible archives
+        """
+        if self._fixed_date_time:
+            permissions = 0o755 if stat.S_ISDIR(mode) or mode & 0o111 else 0o644
+            return self._fixed_date_time, stat.S_IFMT(mode) | permissions
+        return date_time or time.localtime()[:6], mode
+
+    def add_directory(self, name: str, date_time: Optional[Tuple[int, ...]] = None, mode: int = 0o755) -> None:
+        """
+        Add a directory entry.
+
+        Args:
+            name: Name of the directory in the archive
+            date_time: Modification time, the current time by default
+            mode: Permissions of the directory
+        """
+        date_time, mode = self._entry_attributes(date_time, stat.S_IFDIR | mode)
+        entry = ZipEntry(
+            name=name.rstrip("/") + "/",
+            method=_METHOD_STORED,
+            date_time=date_time,
+            mode=mode,
+        )
+        self._queue("header", entry, _FLAG_UTF8)
+
+    def add_bytes(
+        self, name: str, data: bytes, date_time: Optional[Tuple[int, ...]] = None, mode: int = 0o644
+    ) -> None:
+        """
+        Add a file entry with in-memory content.
+
+        Args:
+            name: Name of the file in the archive
+            data: Content of the file
+            date_time: Modification time, the current time by default
+            mode: Permissions of the file
+        """
+        self._add_stream(name, [data], len(data), date_time, stat.S_IFREG | mode)
+
+    def add_chunks(
+        self,
+        name: str,
+        chunks: Iterable[bytes],
+        size: int,
+        date_time: Optional[Tuple[int, ...]] = None,
+        mode: int = 0o644,
+    ) -> None:
+        """
+        Add a file entry whose content is produced in pieces of any size.
+
+        Args:
+            name: Name of the file in the archive
+            chunks: Iterable of the pieces of the file content
+            size: Total size of the content
+            date_time: Modification time, the current time by default
+            mode: Permissions of the file
+        """
+        self._add_stream(name, chunks, size, date_time, stat.S_IFREG | mode)
+
+    def add_path(self, path: pathlib.Path, name: str) -> None:
+        """
+        Add a file or directory from disk. Files are read once, in chunks.
+
+        Args:
+            path: Path of the file or directory
+            name: Name of the entry in the archive
+        """
+        st = os.stat(path)
+        date_time = time.localtime(st.st_mtime)[:6]
+        if stat.S_ISDIR(st.st_mode):
+            self.add_directory(name, date_time, stat.S_IMODE(st.st_mode))
+            return
+        with open(path, "rb") as f:
+            chunks = iter(lambda: f.read(CHUNK_SIZE), b"")
+            self._add_stream(name, chunks, st.st_size, date_time, stat.S_IFREG | stat.S_IMODE(st.st_mode))
+
+    def _add_stream(
+        self, name: str, chunks: Iterable[bytes], size: int, date_time: Optional[Tuple[int, ...]], mode: int
+    ) -> None:
+        """
+        Add a file entry from a sequence of chunks.
+
+        Args:
+            name: Name of the file in the archive
+            chunks: Iterable of the chunks of the file content
+            size: Expected total size of the content, used to decide on zip64
+            date_time: Modification time, or None for the current time
+            mode: Unix file type and permissions
+        """
+        date_time, mode = self._entry_attributes(date_time, mode)
+        entry = ZipEntry(
+            name=name,
+            method=_METHOD_STORED if self._level == 0 else _METHOD_DEFLATED,
+            date_time=date_time,
+            mode=mode,
+            # Leave room for incompressible data growing slightly when deflated
+            zip64=size + size // 100 + 65536 > _ZIP64_LIMIT,
+        )
+        self._queue("header", entry, _FLAG_DATA_DESCRIPTOR | _FLAG_UTF8)
+
+        # Look one chunk ahead to know which block is the last; an empty file still
+        # needs one final deflate block
+        chunks = _blocks(chunks)
+        block = next(chunks, b"")
+        while True:
+            following = next(chunks, None)
+            last = following is None
+            entry.crc = zlib.crc32(block, entry.crc)
+            entry.size += len(block)
+            if entry.method == _METHOD_STORED:
+                self._queue("data", entry, block)
+            elif self._executor:
+                self._queue("data", entry, self._executor.submit(_compress_block, block, self._level, last))
+            else:
+                self._queue("data", entry, _compress_block(block, self._level, last))
+            if last:
+                break
+            block = following
+
+        self._queue("descriptor", entry)
+        self._uncompressed_size += entry.size
+
+    def _queue(self, kind: str, entry: ZipEntry, payload: Any = None) -> None:
+        """
+        Queue a write and perform the queued writes that are ready.
+
+        Args:
+            kind: "header" (payload: flags), "data" (payload: bytes or a future of
+                them) or "descriptor"
+            entry: The entry the write belongs to
+            payload: Payload of the write
+        """
+        self._pending.append((kind, entry, payload))
+        if kind == "data":
+            self._pending_blocks += 1
+        self._write_pending(wait=False)
+
+    def _write_pending(self, wait: bool) -> None:
+        """
+        Perform queued writes in order.
+
+        Args:
+            wait: Whether to wait for all blocks; otherwise only wait while too many
+                blocks are in flight
+        """
+        while self._pending:
+            kind, entry, payload = self._pending[0]
+            if (
+                kind == "data"
+                and isinstance(payload, concurrent.futures.Future)
+                and not payload.done()
+                and not wait
+                and self._pending_blocks <= self._max_pending_blocks
+            ):
+                return
+            self._pending.popleft()
+
+            if kind == "header":
+                entry.offset = self._offset
+                self._write_local_header(entry, payload)
+                self._entries.append(entry)
+            elif kind == "data":
+                data = payload.result() if isinstance(payload, concurrent.futures.Future) else payload
+                self._pending_blocks -= 1
+                entry.compressed_size += len(data)
+                self._write(data)
+            elif entry.zip64:
+                self._write(struct.pack("<IIQQ", 0x08074B50, entry.crc, entry.compressed_size, entry.size))
+            else:
+                self._write(struct.pack("<IIII", 0x08074B50, entry.crc, entry.compressed_size, entry.size))
+
+    def _write_central_directory_header(self, entry: ZipEntry) -> None:
+        """
+        Write the central directory record of an entry.
+
+        Args:
+            entry: The entry
+        """
+        name = entry.name.encode("utf-8")
+        dos_time, dos_date = _dos_date_time(entry.date_time)
+
+        zip64_fields = []
+        size, compressed_size, offset = entry.size, entry.compressed_size, entry.offset
+        if size >= _ZIP64_LIMIT or entry.zip64:
+            zip64_fields.append(size)
+            size = _ZIP64_MARKER
+        if compressed_size >= _ZIP64_LIMIT or entry.zip64:
+            zip64_fields.append(compressed_size)
+            compressed_size = _ZIP64_MARKER
+        if offset >= _ZIP64_LIMIT:
+            zip64_fields.append(offset)
+            offset = _ZIP64_MARKER
+        extra = b""
+        if zip64_fields:
+            extra = struct.pack(f"<HH{len(zip64_fields)}Q", 0x0001, 8 * len(zip64_fields), *zip64_fields)
+
+        external_attr = (entry.mode << 16) | (_MSDOS_DIRECTORY if stat.S_ISDIR(entry.mode) else 0)
+        flags = _FLAG_UTF8 | (0 if stat.S_ISDIR(entry.mode) else _FLAG_DATA_DESCRIPTOR)
+        self._write(
+            struct.pack(
+                "<IHHHHHHIIIHHHHHII",
+                0x02014B50,
+                _VERSION_MADE_BY,
+                _VERSION_ZIP64 if zip64_fields else _VERSION_DEFAULT,
+                flags,
+                entry.method,
+                dos_time,
+                dos_date,
+                entry.crc,
+                compressed_size,
+                size,
+                len(name),
+                len(extra),
+                0,
+                0,
+                0,
+                external_attr,
+                offset,
+            )
+            + name
+            + extra
+        )
+
+    def close(self) -> ZipStreamResult:
+        """
+        Write the central directory and finish the archive.
+
+        The output stream is not closed.
+
+        Returns:
+            ZipStreamResult with the digest and size of the archive
+        """
+        self._write_pending(wait=True)
+        directory_offset = self._offset
+        for entry in self._entries:
+            self._write_central_directory_header(entry)
+        directory_size = self._offset - directory_offset
+
+        count = len(self._entries)
+        if count >= _ZIP64_COUNT_LIMIT or directory_offset >= _ZIP64_LIMIT or directory_size >= _ZIP64_LIMIT:
+            zip64_end_offset = self._offset
+            self._write(
+                struct.pack(
+                    "<IQHHIIQQQQ",
+                    0x06064B50,
+                    44,
+                    _VERSION_MADE_BY,
+                    _VERSION_ZIP64,
+                    0,
+                    0,
+                    count,
+                    count,
+                    directory_size,
+                    directory_offset,
+                )
+            )
+            self._write(struct.pack("<IIQI", 0x07064B50, 0, zip64_end_offset, 1))
+            count = _ZIP64_COUNT_MARKER
+            directory_size = _ZIP64_MARKER
+            directory_offset = _ZIP64_MARKER
+
+        self._write(
+            struct.pack("<IHHHHIIH", 0x06054B50, 0, 0, count, count, directory_size, directory_offset, 0)
+        )
+        return ZipStreamResult(
+            self._sha256.hexdigest(),
+            self._offset,
+            len(self._entries),
+            self._uncompressed_size,
+            time.monotonic() - self._start,
+        )